@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Project, Task
+from .models import Job, Project, Task
 
 
 @admin.register(Project)
@@ -15,4 +15,12 @@ class TaskAdmin(admin.ModelAdmin):
     list_display = ('title', 'owner', 'status', 'due_date', 'priority', 'project')
     list_filter = ('status', 'priority', 'due_date', 'project')
     search_fields = ('title', 'description', 'owner__username', 'project__title')
-    ordering = ('due_date', 'priority')
\ No newline at end of file
+    ordering = ('due_date', 'priority')
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'owner', 'status', 'priority', 'attempts', 'run_after', 'created_at', 'finished_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'owner__username')
+    ordering = ('-created_at',)
@@ -0,0 +1,78 @@
+"""
+Overdue and upcoming tasks, for one owner's agenda or across every owner.
+
+Both read only open tasks with a due date through the partial indexes on
+Task: ``task_owner_open_due_idx`` for one owner, ``task_open_due_idx`` for
+a date window across owners. The cross-owner ``scan()`` first counts the
+window's tasks per owner in one grouped query, then loads whole owners in
+batches of about ``batch_size`` tasks, so every chunk it yields holds all
+of one owner's tasks in the window.
+"""
+import datetime
+from itertools import groupby
+from operator import itemgetter
+
+from django.db.models import Count
+
+from .models import OPEN_WITH_DUE_DATE, Task
+from .rows import task_rows
+
+SCAN_FIELDS = ('id', 'owner', 'project', 'title', 'due_date', 'priority', 'status')
+
+
+def open_due_tasks():
+    return Task.objects.filter(OPEN_WITH_DUE_DATE)
+
+
+def agenda(owner, today, days=7, limit=200):
+    """
+    The owner's open tasks due up to ``days`` after ``today``, soonest first,
+    as ``{'overdue': [...], 'due_today': [...], 'upcoming': [...], 'truncated': bool}``
+    of TaskRow tuples. At most ``limit`` tasks are returned.
+    """
+    end = today + datetime.timedelta(days=days)
+    tasks = open_due_tasks().filter(owner=owner, due_date__lte=end).order_by('due_date', 'created_at')
+    tasks = list(task_rows(tasks)[:limit + 1])
+    sections = {'overdue': [], 'due_today': [], 'upcoming': [], 'truncated': len(tasks) > limit}
+    for task in tasks[:limit]:
+        if task.due_date < today:
+            sections['overdue'].append(task)
+        elif task.due_date == today:
+            sections['due_today'].append(task)
+        else:
+            sections['upcoming'].append(task)
+    return sections
+
+
+def owner_counts(start, end):
+    """``(owner_id, tasks)`` for every owner with open tasks due from ``start`` to ``end``, by owner id."""
+    window = open_due_tasks().filter(due_date__range=(start, end)).order_by()
+    return window.values('owner').annotate(total=Count('*')).order_by('owner').values_list('owner', 'total')
+
+
+def scan(start, end, batch_size=1000, fields=SCAN_FIELDS):
+    """
+    Yields ``(owner_id, rows)`` for every owner with open tasks due from
+    ``start`` to ``end`` (inclusive). ``rows`` are ``values()`` dicts of
+    ``fields``, ordered by due date, and hold all of the owner's tasks in
+    the window; owners come in id order.
+    """
+    fields = tuple(fields) + tuple(field for field in ('owner', 'due_date', 'id') if field not in fields)
+    batch, size = [], 0
+    for owner_id, total in owner_counts(start, end).iterator():
+        batch.append(owner_id)
+        size += total
+        if size >= batch_size:
+            yield from load_owners(batch, start, end, fields)
+            batch, size = [], 0
+    if batch:
+        yield from load_owners(batch, start, end, fields)
+
+
+def load_owners(owner_ids, start, end, fields):
+    rows = (
+        open_due_tasks().filter(owner__in=owner_ids, due_date__range=(start, end))
+        .order_by('owner', 'due_date', 'id').values(*fields)
+    )
+    for owner_id, group in groupby(rows, key=itemgetter('owner')):
+        yield owner_id, list(group)
@@ -1,40 +1,488 @@
+import asyncio
+import concurrent.futures
 import datetime
+import hashlib
+import json
+import logging
+import re
+import threading
+import urllib.request
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+NUMBER_WORDS = {
+    'a': 1, 'an': 1, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+    'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
+}
+STATUS_WORDS = {
+    'todo': 'todo', '[ ]': 'todo',
+    'doing': 'in_progress', 'in-progress': 'in_progress', 'in_progress': 'in_progress',
+    '[~]': 'in_progress', '[-]': 'in_progress',
+    'done': 'done', '[x]': 'done',
+}
+DUE = r'(?:(?:due|by|on)\s+)?'
+
+
+class Rule:
+    """
+    One recognisable phrase: a regex fragment and a handler that turns its
+    match into ``(field, value)``. The rule name and the group names inside
+    ``pattern`` must be unique across all rules of a parser.
+    """
+
+    def __init__(self, name, pattern, handler):
+        self.name = name
+        self.pattern = pattern
+        self.handler = handler
+
+
+def _relative_day(match, today):
+    word = match.group('day').lower()
+    offset = {'today': 0, 'tonight': 0, 'tomorrow': 1}.get(word, 2)
+    return 'due_date', today + datetime.timedelta(days=offset)
+
+
+def _weekday(match, today):
+    weekday = WEEKDAYS.index(match.group('dayname').lower())
+    # Always the next occurrence, never today.
+    days_ahead = (weekday - today.weekday() - 1) % 7 + 1
+    return 'due_date', today + datetime.timedelta(days=days_ahead)
+
+
+def _in_days(match, today):
+    amount = match.group('amount').lower()
+    amount = int(amount) if amount.isdigit() else NUMBER_WORDS[amount]
+    unit = match.group('unit').lower()
+    days = amount * 7 if unit.startswith('week') else amount
+    return 'due_date', today + datetime.timedelta(days=days)
+
+
+def _next_week(match, today):
+    # The Monday of next week.
+    return 'due_date', today + datetime.timedelta(days=7 - today.weekday())
+
+
+def _iso_date(match, today):
+    try:
+        return 'due_date', datetime.date.fromisoformat(match.group('iso'))
+    except ValueError:
+        return None
+
+
+def _priority(match, today):
+    if match.group('urgent'):
+        return 'priority', 'high'
+    word = (match.group('level') or match.group('bang') or match.group('flag')).lower()
+    return 'priority', {'p1': 'high', 'p2': 'medium', 'p3': 'low'}.get(word, word)
+
+
+def _status(match, today):
+    return 'status', STATUS_WORDS[(match.group('state') or match.group('box')).lower()]
+
+
+def _project(match, today):
+    return 'project_tag', match.group('tag')
+
+
+DEFAULT_RULES = [
+    Rule('relative_day', DUE + r'\b(?P<day>today|tonight|tomorrow|day after tomorrow)\b', _relative_day),
+    Rule('next_week', DUE + r'\bnext week\b', _next_week),
+    Rule('weekday', DUE + r'\b(?:next\s+)?(?P<dayname>(?:mon|tues|wednes|thurs|fri|satur|sun)day)\b', _weekday),
+    Rule(
+        'in_days',
+        r'\bin\s+(?P<amount>\d{1,3}|an?|one|two|three|four|five|six|seven|eight|nine|ten)\s+(?P<unit>days?|weeks?)\b',
+        _in_days,
+    ),
+    Rule('iso_date', DUE + r'\b(?P<iso>\d{4}-\d{2}-\d{2})\b', _iso_date),
+    Rule(
+        'priority',
+        r'\b(?:(?P<level>high|medium|low)\s+priority|(?P<urgent>urgent|asap)|(?P<flag>p[123]))\b'
+        r'|!(?P<bang>high|medium|low)\b',
+        _priority,
+    ),
+    Rule('status', r'\bstatus:(?P<state>todo|doing|in[-_]progress|done)\b|(?P<box>\[[ x~-]\])', _status),
+    Rule('project', r'(?<![\w#])#(?P<tag>\w[\w-]*)', _project),
+]
+
+SPACES_RE = re.compile(r'\s{2,}')
+
+
+class TaskTextParser:
+    """
+    Deterministic parser that compiles every rule into a single alternation,
+    so one ``finditer`` scan of the text extracts all fields. Add a phrase
+    by passing extra ``Rule`` objects; patterns should be written in lower
+    case.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        # Phrases only start at a word boundary, so the lookbehind rejects
+        # most positions before any alternative is tried.
+        pattern = r'(?<!\w)(?:' + '|'.join(f'(?P<{rule.name}>{rule.pattern})' for rule in self.rules) + ')'
+        self.regex = re.compile(pattern)
+        self.regex_ignorecase = re.compile(pattern, re.IGNORECASE)
+        self.handlers = {rule.name: rule.handler for rule in self.rules}
+
+    def parse(self, text, today=None):
+        today = today or datetime.date.today()
+        fields = {}
+        title_parts = []
+        position = 0
+        # Matching the lowercased text is much cheaper than IGNORECASE, but
+        # only usable while lowercasing keeps every character offset.
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            matches = self.regex.finditer(lowered)
+        else:
+            matches = self.regex_ignorecase.finditer(text)
+        for match in matches:
+            result = self.handlers[match.lastgroup](match, today)
+            # The first mention of a field wins; later ones stay in the title.
+            if result is None or result[0] in fields:
+                continue
+            fields[result[0]] = result[1]
+            title_parts.append(text[position:match.start()])
+            position = match.end()
+        title_parts.append(text[position:])
+        title = SPACES_RE.sub(' ', ''.join(title_parts)).strip(' ,;:-')
+
+        due_date = fields.get('due_date')
+        return {
+            "title": title if title else "New Task",
+            "description": "",
+            "due_date": due_date.isoformat() if due_date else None,
+            "priority": fields.get('priority', "medium"),
+            "status": fields.get('status', "todo"),
+            "project_tag": fields.get('project_tag'),
+        }
+
+
+DEFAULT_PARSER = TaskTextParser()
+
+
+PARSED_FIELDS = ('title', 'description', 'due_date', 'priority', 'status', 'project_tag')
+EMPTY_RESULT = {
+    "title": "New Task",
+    "description": "",
+    "due_date": None,
+    "priority": "medium",
+    "status": "todo",
+    "project_tag": None,
+}
+
+
+def normalize_text(text):
+    """Collapses whitespace; case is kept since it ends up in the title."""
+    return ' '.join(text.split())
+
+
+class ParseCache:
+    """
+    Parsed fields keyed by today's date and the normalized text: an
+    in-process LRU in front of an optional persistent Django cache. The date
+    is part of the key because "tomorrow" means something else each day.
+    """
+
+    def __init__(self, max_size=1024, persistent=None, timeout=2 * 24 * 60 * 60):
+        self.max_size = max_size
+        self.persistent = persistent
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def key(self, text, today):
+        return f'{today.isoformat()}:{normalize_text(text)}'
+
+    def persistent_key(self, key):
+        # Memcached-style backends reject long keys and spaces.
+        return 'tasks:parse:' + hashlib.sha1(key.encode()).hexdigest()
+
+    def get_many(self, texts, today):
+        """Returns one copy of the cached fields per text, or None on a miss."""
+        keys = [self.key(text, today) for text in texts]
+        found = {}
+        with self.lock:
+            for key in keys:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    found[key] = self.entries[key]
+        missing = [key for key in keys if key not in found]
+        if missing and self.persistent is not None:
+            stored = self.persistent.get_many([self.persistent_key(key) for key in missing])
+            for key in missing:
+                if self.persistent_key(key) in stored:
+                    found[key] = stored[self.persistent_key(key)]
+            self.remember({key: found[key] for key in missing if key in found})
+        # Callers add fields to the result, so never hand out the cached dict.
+        return [dict(found[key]) if key in found else None for key in keys]
+
+    def set_many(self, texts, results, today):
+        entries = {self.key(text, today): dict(result) for text, result in zip(texts, results)}
+        self.remember(entries)
+        if self.persistent is not None:
+            self.persistent.set_many(
+                {self.persistent_key(key): result for key, result in entries.items()}, self.timeout
+            )
+
+    def remember(self, entries):
+        with self.lock:
+            for key, result in entries.items():
+                self.entries[key] = result
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+
+class ParserBackend:
+    """Interface shared by the quick-add parser backends."""
+
+    def parse_many(self, texts, today=None, timeout=None):
+        """
+        Returns one dict per text, in the shape of parse_task_text(), waiting
+        at most about ``timeout`` seconds (None means the backend's own limit).
+        """
+        raise NotImplementedError
+
+    async def aparse_many(self, texts, today=None, timeout=None):
+        """parse_many() for async callers; runs in a thread so the event loop never blocks."""
+        return await asyncio.to_thread(self.parse_many, list(texts), today, timeout)
+
+
+class RuleBackend(ParserBackend):
+    """The deterministic TaskTextParser; fast enough to need neither cache nor timeout."""
+
+    def __init__(self, parser=None):
+        self.parser = parser or DEFAULT_PARSER
+
+    def parse_many(self, texts, today=None, timeout=None):
+        today = today or datetime.date.today()
+        return [self.parser.parse(text, today) for text in texts]
+
+    async def aparse_many(self, texts, today=None, timeout=None):
+        # A few regular expressions per text cost less than a thread hop.
+        return self.parse_many(texts, today, timeout)
+
+
+class LLMBackend(ParserBackend):
+    """
+    Client for a model server that parses a batch of texts per request::
+
+        POST <url>  {"today": "2025-01-31", "texts": ["...", ...]}
+        200         {"results": [{"title": ..., "due_date": ..., ...}, ...]}
+
+    Callers from every thread share one background event loop, where texts
+    submitted within ``batch_window`` seconds of each other are merged into
+    POSTs of up to ``max_batch_size`` texts. Texts still unanswered when the
+    caller's timeout runs out, or whose request failed, are parsed by the
+    rule-based ``fallback``; answers that arrive late still fill the cache.
+    """
+
+    def __init__(self, url, timeout=5.0, max_batch_size=32, batch_window=0.01, max_concurrency=4,
+                 headers=None, cache_size=1024, cache_alias=None, fallback=None):
+        self.url = url
+        self.timeout = timeout
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.max_concurrency = max_concurrency
+        self.headers = headers or {}
+        persistent = None
+        if cache_alias:
+            from django.core.cache import caches
+            persistent = caches[cache_alias]
+        self.cache = ParseCache(cache_size, persistent)
+        self.fallback = fallback or RuleBackend()
+        self.loop = None
+        self.lock = threading.Lock()
+
+    def parse_many(self, texts, today=None, timeout=None):
+        texts = list(texts)
+        today = today or datetime.date.today()
+        results = self.cache.get_many(texts, today)
+        pending = {}
+        for text, result in zip(texts, results):
+            if result is None and text not in pending:
+                pending[text] = asyncio.run_coroutine_threadsafe(self.submit(text, today), self.get_loop())
+        if pending:
+            timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+            concurrent.futures.wait(pending.values(), timeout=timeout)
+            answers = {text: self.answer(future) for text, future in pending.items()}
+            missing = [text for text, answer in answers.items() if answer is None]
+            answers.update(zip(missing, self.fallback.parse_many(missing, today)))
+            results = [result or dict(answers[text]) for text, result in zip(texts, results)]
+        return results
+
+    def answer(self, future):
+        if future.done() and not future.cancelled() and future.exception() is None:
+            return future.result()
+        return None
+
+    def get_loop(self):
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                self.queue = asyncio.Queue()
+                self.semaphore = asyncio.Semaphore(self.max_concurrency)
+                self.flushes = set()
+                threading.Thread(target=self.run_loop, args=(self.loop,), name='task-parser', daemon=True).start()
+            return self.loop
+
+    def run_loop(self, loop):
+        asyncio.set_event_loop(loop)
+        dispatcher = loop.create_task(self.dispatch())
+        loop.run_forever()
+        dispatcher.cancel()
+        loop.run_until_complete(asyncio.gather(dispatcher, *self.flushes, return_exceptions=True))
+        loop.close()
+
+    def close(self):
+        """Stops the background loop; requests still in flight are abandoned."""
+        with self.lock:
+            if self.loop is not None:
+                self.loop.call_soon_threadsafe(self.loop.stop)
+                self.loop = None
+
+    async def submit(self, text, today):
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((text, today, future))
+        return await future
+
+    async def dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                try:
+                    if remaining > 0:
+                        batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                    else:
+                        batch.append(self.queue.get_nowait())
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    break
+            flush = loop.create_task(self.flush(batch))
+            self.flushes.add(flush)
+            flush.add_done_callback(self.flushes.discard)
+
+    async def flush(self, batch):
+        by_day = {}
+        for text, today, future in batch:
+            by_day.setdefault(today, []).append((text, future))
+        for today, items in by_day.items():
+            texts = [text for text, future in items]
+            try:
+                async with self.semaphore:
+                    results = await asyncio.to_thread(self.request, texts, today)
+            except Exception as exc:
+                logger.warning("Task parser request for %d texts failed: %s", len(texts), exc)
+                results = [exc] * len(items)
+            for (text, future), result in zip(items, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def request(self, texts, today):
+        """Sends one batch to the model server and caches the answers; runs in a worker thread."""
+        body = json.dumps({'today': today.isoformat(), 'texts': texts}).encode()
+        request = urllib.request.Request(
+            self.url, data=body, headers={'Content-Type': 'application/json', **self.headers}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            results = json.load(response)['results']
+        if not isinstance(results, list) or len(results) != len(texts):
+            raise ValueError(f"Expected {len(texts)} results from the model server.")
+        results = [self.clean(result) for result in results]
+        self.cache.set_many(texts, results, today)
+        return results
+
+    def clean(self, result):
+        if not isinstance(result, dict):
+            raise ValueError("Expected a JSON object per result.")
+        parsed = dict(EMPTY_RESULT)
+        parsed.update({
+            field: result[field] for field in PARSED_FIELDS if isinstance(result.get(field), str) and result[field]
+        })
+        if parsed['due_date']:
+            try:
+                datetime.date.fromisoformat(parsed['due_date'])
+            except ValueError:
+                parsed['due_date'] = None
+        return parsed
+
+
+DEFAULT_BUDGET = 2.0  # Seconds a quick-add request may wait for the parser
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_parser_backend():
+    """
+    The backend configured by ``settings.TASKS_PARSER``, e.g.::
+
+        TASKS_PARSER = {
+            'BACKEND': 'apps.tasks.ai_parser.LLMBackend',
+            'OPTIONS': {'url': 'http://127.0.0.1:8765/parse', 'cache_alias': 'default'},
+            'BUDGET': 1.5,
+        }
+
+    One instance is kept per configuration, so its loop and cache are shared.
+    """
+    from django.conf import settings
+    from django.utils.module_loading import import_string
+
+    config = getattr(settings, 'TASKS_PARSER', None) or {}
+    key = json.dumps(config, sort_keys=True, default=str)
+    with _backends_lock:
+        if key not in _backends:
+            backend_class = import_string(config.get('BACKEND', 'apps.tasks.ai_parser.RuleBackend'))
+            _backends[key] = backend_class(**config.get('OPTIONS', {}))
+        return _backends[key]
+
+
+def get_parser_budget():
+    from django.conf import settings
+
+    return (getattr(settings, 'TASKS_PARSER', None) or {}).get('BUDGET', DEFAULT_BUDGET)
+
 
 def parse_task_text(text: str) -> dict:
     """
-    Abstracted adapter to parse task text into structured fields.
-    This function will be replaced by an LLM call in the future.
+    Abstracted adapter to parse task text into structured fields, with the
+    backend configured in ``settings.TASKS_PARSER``. Waits at most the
+    configured budget; whatever the backend has not answered by then is
+    parsed by the rule-based parser.
 
     Args:
         text (str): The raw text input from the user.
 
     Returns:
         dict: A dictionary containing parsed task fields like 'title', 'description',
-              'due_date' (ISO format string), and 'priority'.
-              Returns an empty dictionary or default values if parsing fails or fields are not found.
-    """
-    # This is a stub implementation. In a real scenario, this would involve an LLM.
-    # For now, we'll implement a very basic parsing logic or return dummy data.
-
-    title = text
-    description = ""
-    due_date = None  # ISO format string, e.g., "2023-12-31T23:59:59"
-    priority = "medium"
-
-    # Basic keyword-based parsing for demonstration
-    if "tomorrow" in text.lower():
-        due_date = (datetime.date.today() + datetime.timedelta(days=1)).isoformat() + "T17:00:00"
-        title = title.replace("tomorrow", "").strip()
-    if "high priority" in text.lower():
-        priority = "high"
-        title = title.replace("high priority", "").strip()
-    elif "low priority" in text.lower():
-        priority = "low"
-        title = title.replace("low priority", "").strip()
-
-    return {
-        "title": title.strip() if title.strip() else "New Task",
-        "description": description,
-        "due_date": due_date,
-        "priority": priority,
-    }
\ No newline at end of file
+              'due_date' (ISO format date string), 'priority', 'status' and
+              'project_tag' (the ``#tag`` text, or None).
+              Returns default values for fields that are not found.
+    """
+    return parse_task_texts([text])[0]
+
+
+def parse_task_texts(texts) -> list:
+    """
+    Parses many task texts, e.g. for a batch quick-add, within one budget.
+
+    Args:
+        texts (iterable of str): The raw text inputs.
+
+    Returns:
+        list: One dictionary per input, in the same shape as parse_task_text().
+    """
+    return get_parser_backend().parse_many(list(texts), timeout=get_parser_budget())
+
+
+async def aparse_task_text(text: str) -> dict:
+    """parse_task_text() for async views; the event loop keeps running while the backend works."""
+    return (await get_parser_backend().aparse_many([text], timeout=get_parser_budget()))[0]
@@ -0,0 +1,404 @@
+"""
+JSON API over the signed-in user's tasks and projects::
+
+    GET     api/tasks/?fields=id,title&status=todo&priority=high&project=<id>&limit=100&cursor=<cursor>
+    POST    api/tasks/                  {"title": "...", "project": "<id>", ...}
+    GET     api/tasks/<id>/?fields=...
+    PATCH   api/tasks/<id>/             {"status": "done"}
+    DELETE  api/tasks/<id>/
+    PATCH   api/tasks/bulk/             {"ids": ["<id>", ...], "status": "done"}
+    GET     api/tasks/<id>/subtasks/    every subtask below the task, at any depth
+    GET     api/tasks/<id>/blocked/     every task it blocks, directly or not
+    GET     api/tasks/<id>/blockers/    every task blocking it, directly or not
+    POST    api/tasks/<id>/blockers/    {"blocker": "<id>"}
+    DELETE  api/tasks/<id>/blockers/<blocker id>/
+    GET     api/projects/               and the same for one project
+    GET     api/projects/<id>/critical-path/   the longest chain of open blockers, first to do first
+    GET     api/jobs/<id>/?fields=...   a queued job's status, for polling
+    GET     api/sync/?token=<token>     rows changed and ids deleted since the token
+
+Reads select only the requested ``fields`` with ``values()`` and encode the
+rows as they come, with no model instances, forms or templates; orjson is
+used when it is installed. Lists are cursor-paginated newest first and read
+through the owner cache. PATCH validates only the fields it sends.
+Authentication is the session, so writes need the CSRF token like any form.
+Tasks take a ``parent`` task; subtasks and blockers that would make a loop
+are refused with 400 (see graph.py).
+"""
+import datetime
+import json
+import uuid
+from functools import lru_cache, wraps
+
+from django.forms import modelform_factory
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_http_methods
+
+from . import graph
+from .bulk import update_tasks
+from .cache import read_through
+from .forms import TaskRowForm
+from .models import Job, Project, Task
+from .pagination import CursorPaginator
+from .search import get_search_backend
+from .sync import Delta, InvalidToken
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+TASK_FIELDS = (
+    'id', 'title', 'description', 'due_date', 'priority', 'status', 'project', 'parent', 'created_at', 'updated_at',
+)
+PROJECT_FIELDS = ('id', 'title', 'description', 'created_at', 'updated_at')
+JOB_FIELDS = ('id', 'name', 'status', 'attempts', 'max_attempts', 'run_after', 'created_at', 'finished_at', 'result', 'error')
+TASK_WRITABLE = ('title', 'description', 'due_date', 'priority', 'status')
+PROJECT_WRITABLE = ('title', 'description')
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+BULK_LIMIT = 1000  # Tasks changed by one bulk PATCH
+
+
+class APIError(Exception):
+    def __init__(self, payload, status=400):
+        super().__init__(payload)
+        self.payload = payload
+        self.status = status
+
+
+def encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat().replace('+00:00', 'Z')
+    if isinstance(value, (datetime.date, uuid.UUID)):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_UTC_Z)
+    return json.dumps(data, default=encode_value, separators=(',', ':')).encode()
+
+
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
+
+
+def error(message, status=400):
+    return APIError({'error': message}, status)
+
+
+def api_view(*methods):
+    """Allows ``methods``, answers anonymous users with 401, and turns APIError into its response."""
+    def decorator(view):
+        @require_http_methods(methods)
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return json_response({'error': "Authentication required."}, status=401)
+            try:
+                return view(request, *args, **kwargs)
+            except APIError as exc:
+                return json_response(exc.payload, status=exc.status)
+        return wrapper
+    return decorator
+
+
+def read_body(request):
+    try:
+        body = json.loads(request.body)
+    except ValueError:
+        body = None
+    if not isinstance(body, dict):
+        raise error("Expected a JSON object.")
+    return body
+
+
+def get_fields(request, available):
+    """The ``?fields=`` selection, in the order given, or every field."""
+    fields = [field for field in request.GET.get('fields', '').split(',') if field]
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise error(f"Unknown fields: {', '.join(unknown)}")
+    return fields or list(available)
+
+
+def get_limit(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise error("limit must be an integer.")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def parse_uuid(value, name):
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        raise error(f"{name} must be a UUID.")
+
+
+def list_response(request, namespace, queryset, available, **params):
+    fields = get_fields(request, available)
+    # The cursor needs each row's position even when the client did not ask for it.
+    extra = [field for field in ('created_at', 'id') if field not in fields]
+    paginator = CursorPaginator(queryset.values(*fields, *extra), get_limit(request))
+    params = {'query': sorted(request.GET.lists()), **params}
+
+    def load():
+        page = paginator.page(request.GET.get('cursor'))
+        rows = page.object_list
+        if extra:
+            rows = [{field: row[field] for field in fields} for row in rows]
+        return {'results': rows, 'next_cursor': page.next_cursor}
+
+    return json_response(read_through(request.user, namespace, load, params))
+
+
+def object_row(instance, fields):
+    opts = instance._meta
+    return {field: getattr(instance, opts.get_field(field).attname) for field in fields}
+
+
+def get_instance(queryset, pk):
+    instance = queryset.filter(pk=pk).first()
+    if instance is None:
+        raise error("Not found.", status=404)
+    return instance
+
+
+def get_row(queryset, pk, fields):
+    row = queryset.filter(pk=pk).values(*fields).first()
+    if row is None:
+        raise error("Not found.", status=404)
+    return row
+
+
+@lru_cache(maxsize=None)
+def task_form(fields):
+    return modelform_factory(Task, form=TaskRowForm, fields=fields)
+
+
+@lru_cache(maxsize=None)
+def project_form(fields):
+    return modelform_factory(Project, fields=fields)
+
+
+def validate(form_class, body, writable, instance=None):
+    """
+    Returns an unsaved instance with the writable keys of ``body`` applied,
+    validating only those keys, so a PATCH need not resend the rest. A new
+    instance always validates its title, so it cannot be created without one.
+    """
+    fields = tuple(field for field in writable if field in body or (instance is None and field == 'title'))
+    form = form_class(fields)({field: body.get(field) for field in fields}, instance=instance)
+    if not form.is_valid():
+        raise APIError({'errors': form.errors.get_json_data()})
+    return form.save(commit=False)
+
+
+def resolve_project(user, value):
+    if value is None:
+        return None
+    project = Project.objects.filter(owner=user, pk=parse_uuid(value, 'project')).first()
+    if project is None:
+        raise APIError({'errors': {'project': [{'message': "Unknown project.", 'code': 'unknown_project'}]}})
+    return project
+
+
+def resolve_parent(user, value):
+    if value is None:
+        return None
+    parent = Task.objects.filter(owner=user, pk=parse_uuid(value, 'parent')).first()
+    if parent is None:
+        raise APIError({'errors': {'parent': [{'message': "Unknown task.", 'code': 'unknown_task'}]}})
+    return parent
+
+
+def save_task(task):
+    try:
+        task.save()
+    except graph.GraphError as exc:
+        raise APIError({'errors': {'parent': [{'message': str(exc), 'code': 'cycle'}]}})
+
+
+def filter_tasks(request, queryset):
+    for name in ('status', 'priority'):
+        if request.GET.get(name):
+            queryset = queryset.filter(**{name: request.GET[name]})
+    project = request.GET.get('project')
+    if project == 'none':
+        queryset = queryset.filter(project__isnull=True)
+    elif project:
+        queryset = queryset.filter(project_id=parse_uuid(project, 'project'))
+    if request.GET.get('q'):
+        queryset = get_search_backend().search(queryset, request.GET['q'])
+    return queryset
+
+
+@api_view('GET', 'POST')
+def tasks(request):
+    """Lists the user's tasks, or creates one."""
+    if request.method == 'GET':
+        queryset = filter_tasks(request, Task.objects.filter(owner=request.user))
+        return list_response(request, 'api.tasks', queryset, TASK_FIELDS)
+    body = read_body(request)
+    task = validate(task_form, body, TASK_WRITABLE)
+    task.owner = request.user
+    task.project = resolve_project(request.user, body.get('project'))
+    task.parent = resolve_parent(request.user, body.get('parent'))
+    save_task(task)
+    return json_response(object_row(task, TASK_FIELDS), status=201)
+
+
+@api_view('GET', 'PATCH', 'DELETE')
+def task(request, pk):
+    queryset = Task.objects.filter(owner=request.user)
+    if request.method == 'GET':
+        return json_response(get_row(queryset, pk, get_fields(request, TASK_FIELDS)))
+    instance = get_instance(queryset, pk)
+    if request.method == 'DELETE':
+        instance.delete()
+        return HttpResponse(status=204)
+    body = read_body(request)
+    instance = validate(task_form, body, TASK_WRITABLE, instance)
+    if 'project' in body:
+        instance.project = resolve_project(request.user, body['project'])
+    if 'parent' in body:
+        instance.parent = resolve_parent(request.user, body['parent'])
+    save_task(instance)
+    return json_response(object_row(instance, TASK_FIELDS))
+
+
+@api_view('PATCH')
+def tasks_bulk(request):
+    """Sets status, priority and/or project on up to BULK_LIMIT tasks with one UPDATE."""
+    body = read_body(request)
+    ids = body.get('ids')
+    if not isinstance(ids, list) or not ids:
+        raise error("ids must be a non-empty list.")
+    if len(ids) > BULK_LIMIT:
+        raise error(f"At most {BULK_LIMIT} tasks can be changed at once.")
+    ids = [parse_uuid(pk, 'ids') for pk in ids]
+    changes = {}
+    for name, choices in (('status', Task.STATUS_CHOICES), ('priority', Task.PRIORITY_CHOICES)):
+        if name in body:
+            if body[name] not in dict(choices):
+                raise APIError({'errors': {name: [{'message': f"Invalid {name}.", 'code': 'invalid_choice'}]}})
+            changes[name] = body[name]
+    if 'project' in body:
+        changes['project'] = resolve_project(request.user, body['project'])
+    if not changes:
+        raise error("Nothing to change: send status, priority or project.")
+    updated = update_tasks(Task.objects.filter(owner=request.user, pk__in=ids), **changes)
+    return json_response({'updated': updated})
+
+
+@api_view('GET')
+def subtasks(request, pk):
+    task = get_instance(Task.objects.filter(owner=request.user), pk)
+    return list_response(request, 'api.subtasks', graph.descendants(task), TASK_FIELDS, task=str(pk))
+
+
+@api_view('GET')
+def blocked(request, pk):
+    task = get_instance(Task.objects.filter(owner=request.user), pk)
+    return list_response(request, 'api.blocked', graph.blocked_by(task), TASK_FIELDS, task=str(pk))
+
+
+@api_view('GET', 'POST')
+def blockers(request, pk):
+    """Lists the tasks blocking the task, or adds a blocker."""
+    queryset = Task.objects.filter(owner=request.user)
+    task = get_instance(queryset, pk)
+    if request.method == 'GET':
+        return list_response(request, 'api.blockers', graph.blockers(task), TASK_FIELDS, task=str(pk))
+    blocker = get_instance(queryset, parse_uuid(read_body(request).get('blocker'), 'blocker'))
+    try:
+        graph.add_blocker(blocker, task)
+    except graph.GraphError as exc:
+        raise error(str(exc))
+    return json_response({'blocker': blocker.pk, 'blocked': task.pk}, status=201)
+
+
+@api_view('DELETE')
+def blocker(request, pk, blocker_pk):
+    queryset = Task.objects.filter(owner=request.user)
+    if not graph.remove_blocker(get_instance(queryset, blocker_pk), get_instance(queryset, pk)):
+        raise error("Not found.", status=404)
+    return HttpResponse(status=204)
+
+
+@api_view('GET', 'POST')
+def projects(request):
+    """Lists the user's projects, or creates one."""
+    if request.method == 'GET':
+        return list_response(request, 'api.projects', Project.objects.filter(owner=request.user), PROJECT_FIELDS)
+    project = validate(project_form, read_body(request), PROJECT_WRITABLE)
+    project.owner = request.user
+    project.save()
+    return json_response(object_row(project, PROJECT_FIELDS), status=201)
+
+
+@api_view('GET', 'PATCH', 'DELETE')
+def project(request, pk):
+    queryset = Project.objects.filter(owner=request.user)
+    if request.method == 'GET':
+        return json_response(get_row(queryset, pk, get_fields(request, PROJECT_FIELDS)))
+    instance = get_instance(queryset, pk)
+    if request.method == 'DELETE':
+        instance.delete()
+        return HttpResponse(status=204)
+    instance = validate(project_form, read_body(request), PROJECT_WRITABLE, instance)
+    instance.save()
+    return json_response(object_row(instance, PROJECT_FIELDS))
+
+
+@api_view('GET')
+def critical_path(request, pk):
+    project = get_instance(Project.objects.filter(owner=request.user), pk)
+    fields = get_fields(request, TASK_FIELDS)
+
+    def load():
+        path = graph.critical_path(project)
+        rows = {row['id']: row for row in Task.objects.filter(pk__in=path).values(*fields, 'id')}
+        return {'results': [{field: rows[pk][field] for field in fields} for pk in path]}
+
+    return json_response(read_through(request.user, 'api.critical_path', load, {'project': str(pk), 'fields': fields}))
+
+
+@api_view('GET')
+def job(request, pk):
+    return json_response(get_row(Job.objects.filter(owner=request.user), pk, get_fields(request, JOB_FIELDS)))
+
+
+@gzip_page
+@api_view('GET')
+def sync(request):
+    """
+    The user's projects and tasks written since ``?token=``, and the ids of
+    those deleted since, or everything with ``"reset": true`` without a
+    token; see sync.py. Streamed a batch at a time, gzipped for clients
+    that accept it, and ending with the next token.
+    """
+    try:
+        delta = Delta(request.user, request.GET.get('token'))
+    except InvalidToken as exc:
+        raise error(str(exc))
+    return StreamingHttpResponse(stream_delta(delta), content_type='application/json')
+
+
+def stream_delta(delta):
+    yield b'{"reset":' + dumps(delta.reset)
+    # Projects first, so the tasks that point at new ones come after them.
+    for model, fields in (('project', PROJECT_FIELDS), ('task', TASK_FIELDS)):
+        yield f',"{model}s":['.encode()
+        separator = b''
+        for rows in delta.batches(model, fields):
+            yield separator + b','.join(dumps(row) for row in rows)
+            separator = b','
+        yield b']'
+    deleted = {f'{model}s': ids for model, ids in delta.deleted.items()}
+    yield b',"deleted":' + dumps(deleted) + b',"token":' + dumps(delta.token) + b'}'
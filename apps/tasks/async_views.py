@@ -0,0 +1,212 @@
+"""
+Native async versions of the task list, project detail and quick-add views,
+and the change stream, which only makes sense under ASGI.
+
+Under ASGI every sync view runs in a worker thread; these run on the event
+loop and leave it only for the queries, through the async ORM. They share
+filters, caches, validators and templates with their counterparts in
+``views.py`` and are served next to them under ``async/`` URLs. Django's
+async ORM still runs each query in a thread, so what they save is the
+per-request thread and its hops, not query time.
+
+``request.user`` loads lazily through sync code, so every view resolves it
+with ``request.auser()`` first; that also loads the session, which makes
+the message storage safe to use from the event loop.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.views import redirect_to_login
+from django.core.handlers.asgi import ASGIRequest
+from django.core.paginator import InvalidPage
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.views import View
+
+from .ai_parser import aparse_task_text
+from .changes import stream as change_events
+from .conditional import AsyncConditionalGetMixin
+from .forms import TaskForm
+from .fragments import arender_fragments
+from .jobs import enqueue, get_config as get_job_config
+from .models import Project, Task
+from .pagination import CachedPaginator, CursorPaginator, aapproximate_count, alist
+from .project_index import aget_project_index
+from .views import (
+    OwnerCacheMixin, TaskFilterMixin, TaskListView as SyncTaskListView, match_project_tags, project_tag_candidates,
+    project_tags,
+)
+
+
+async def authenticate(request):
+    """Resolves ``request.user`` on the event loop; returns a login redirect for anonymous users."""
+    request.user = await request.auser()
+    if not request.user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    return None
+
+
+def login_required(view):
+    """login_required for async function views, minus its thread hop for the user test."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await authenticate(request) or await view(request, *args, **kwargs)
+    return wrapper
+
+
+class AsyncLoginRequiredMixin:
+    async def dispatch(self, request, *args, **kwargs):
+        return await authenticate(request) or await super().dispatch(request, *args, **kwargs)
+
+
+async def aresolve_project_tags(user, parsed_entries):
+    tags = project_tags(parsed_entries)
+    if not tags:
+        return {}
+    return match_project_tags(tags, await alist(project_tag_candidates(user, tags)))
+
+
+class TaskListView(AsyncLoginRequiredMixin, AsyncConditionalGetMixin, OwnerCacheMixin, TaskFilterMixin, View):
+    template_name = SyncTaskListView.template_name
+    # Same namespace as the sync view: both cache the same rows.
+    cache_namespace = SyncTaskListView.cache_namespace
+    paginate_by = SyncTaskListView.paginate_by
+    count_limit = SyncTaskListView.count_limit
+    filter_by_project = SyncTaskListView.filter_by_project
+
+    def get_queryset(self):
+        return self.get_task_queryset()
+
+    async def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        if request.GET.get('paginate') == 'cursor':
+            context = await self.get_cursor_context(queryset)
+        else:
+            context = await self.get_page_context(queryset)
+        context.update(self.get_filter_context())
+        context['current_project'] = request.GET.get('project', '')
+        # Also replaces the context processor's lazy index, which would load synchronously.
+        context['projects'] = context['project_index'] = await aget_project_index(request.user)
+        context['filter_form'] = await self.aget_filter_form()
+        context['task_fragments'] = await arender_fragments('task_row', context['tasks'])
+        return TemplateResponse(request, self.template_name, context)
+
+    async def get_page_context(self, queryset):
+        paginator = CachedPaginator(self.get_task_rows(queryset), self.paginate_by, self.acached)
+        page_number = self.request.GET.get('page') or 1
+        try:
+            if page_number == 'last':
+                await paginator.acount()
+                page_number = paginator.num_pages
+            page = await paginator.apage(int(page_number))
+        except (ValueError, InvalidPage):
+            raise Http404("Invalid page.")
+        return {
+            'paginator': paginator,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
+            'object_list': page.object_list,
+            'tasks': page.object_list,
+        }
+
+    async def get_cursor_context(self, queryset):
+        paginator = CursorPaginator(self.get_task_rows(queryset), self.paginate_by)
+        page = await self.acached('cursor_page', lambda: paginator.apage(self.request.GET.get('cursor')))
+        context = {
+            'paginator': None,
+            'page_obj': page,
+            'is_paginated': False,
+            'object_list': page.object_list,
+            'tasks': page.object_list,
+            'cursor_mode': True,
+            'approximate_count': None,
+            'count_exact': None,
+        }
+        if page.has_next():
+            query = self.request.GET.copy()
+            query['cursor'] = page.next_cursor
+            context['next_page_query'] = query.urlencode()
+        if self.request.GET.get('count'):
+            context['approximate_count'], context['count_exact'] = await self.acached(
+                'approximate_count', lambda: aapproximate_count(self.get_queryset(), self.count_limit)
+            )
+        return context
+
+
+class ProjectDetailView(AsyncLoginRequiredMixin, AsyncConditionalGetMixin, OwnerCacheMixin, TaskFilterMixin, View):
+    template_name = 'tasks/project_detail.html'
+    cache_namespace = 'project_detail'
+
+    async def get_object(self):
+        try:
+            return await Project.objects.filter(owner=self.request.user).aget(pk=self.kwargs['pk'])
+        except Project.DoesNotExist:
+            raise Http404("No project found matching the query.")
+
+    def get_project_tasks(self, project):
+        tasks_queryset = Task.objects.filter(owner=self.request.user, project=project)
+        return self.get_task_rows(self.filter_tasks(tasks_queryset).order_by('-created_at'))
+
+    async def get(self, request, *args, **kwargs):
+        project = await self.acached('object', self.get_object)
+        context = {
+            'object': project,
+            'project': project,
+            'tasks': await self.acached('tasks', lambda: alist(self.get_project_tasks(project))),
+            'project_index': await aget_project_index(request.user),
+            **self.get_filter_context(),
+            'filter_form': await self.aget_filter_form(),
+        }
+        return TemplateResponse(request, self.template_name, context)
+
+
+@login_required
+async def parse_create_task(request):
+    if request.method == 'POST':
+        text = request.POST.get('text')
+        if text and get_job_config('DEFER_QUICK_ADD'):
+            await sync_to_async(enqueue)('tasks.quick_add', {'text': text}, owner=request.user, priority=10)
+            messages.info(request, "Task queued; it will appear in your list shortly.")
+        elif text:
+            parsed_data = await aparse_task_text(text)
+            tag = parsed_data.get('project_tag')
+            if tag:
+                project = (await aresolve_project_tags(request.user, [parsed_data]))[tag]
+                parsed_data['project'] = project.pk if project else None
+            form = TaskForm(parsed_data)
+            if tag and not parsed_data['project']:
+                messages.error(request, f"project: Unknown project: {tag}")
+            # The project field validates with a sync query.
+            elif await sync_to_async(form.is_valid)():
+                task = form.save(commit=False)
+                task.owner = request.user
+                await task.asave()
+                messages.success(request, "Task added successfully!")
+            else:
+                for field, errors in form.errors.items():
+                    for error in errors:
+                        messages.error(request, f"{field}: {error}")
+        else:
+            messages.error(request, "Task text cannot be empty.")
+    return redirect('tasks:task_list')
+
+
+@login_required
+async def change_stream(request):
+    """
+    The user's Task and Project changes as Server-Sent Events, resuming
+    after ``Last-Event-ID`` (or ``?last_event_id=`` for clients that cannot
+    set it); see changes.py.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    # Under WSGI an open stream would hold a worker, so send what is logged
+    # and let EventSource reconnect after its retry delay.
+    timeout = None if isinstance(request, ASGIRequest) else 0
+    response = StreamingHttpResponse(
+        change_events(request.user, last_event_id, timeout), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Or nginx holds the events back
+    return response
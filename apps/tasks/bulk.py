@@ -0,0 +1,112 @@
+"""
+Set-based task writes.
+
+Bulk queries skip the Task signals, so each helper here does the signal
+bookkeeping (counters, search index, change log, cache generation)
+itself, inside the same transaction.
+"""
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import cache, changes, counters, graph
+from .models import Change, Task, TaskDependency
+from .search import get_search_backend
+
+
+def create_tasks(tasks, batch_size=None):
+    """Inserts unsaved ``tasks`` with bulk_create and returns them."""
+    with transaction.atomic():
+        tasks = Task.objects.bulk_create(tasks, batch_size=batch_size)
+        counters.add_tasks(tasks)
+        get_search_backend().index_tasks(tasks)
+        changes.record_created(tasks)
+        for owner_id in {task.owner_id for task in tasks}:
+            cache.invalidate(owner_id)
+    return tasks
+
+
+def selected_rows(queryset):
+    """
+    ``(id, owner, project, status, priority)`` of every task in ``queryset``,
+    locked until the transaction ends, so the statement that follows changes
+    the rows as read and the counter moves match what it overwrites.
+    """
+    # Only the task rows: the search and project joins need no lock, and
+    # PostgreSQL refuses FOR UPDATE on the nullable side of an outer join.
+    rows = queryset.order_by().select_for_update(of=('self',))
+    return list(rows.values_list('pk', 'owner', 'project', 'status', 'priority'))
+
+
+def counter_totals(rows):
+    """Number of ``selected_rows()`` per counter key."""
+    return Counter(row[1:] for row in rows)
+
+
+def apply_moves(moves, rows, affected, action, data=None):
+    """
+    Adjusts the counters by ``moves``, logs ``action`` for the selected
+    ``rows`` and invalidates the owners' caches. If the statement touched
+    other than those rows, a concurrent write slipped in between the read
+    and the statement, so the owners are recounted and their clients told
+    to reload instead.
+    """
+    owners = {row[1] for row in rows}
+    if affected != len(rows):
+        for owner_id in owners:
+            counters.recount(get_user_model()(pk=owner_id))
+        changes.record_reset(owners)
+        return
+    for key, delta in moves.items():
+        if delta:
+            counters.adjust(key, delta)
+    changes.record_rows(rows, action, data)
+    for owner_id in owners:
+        cache.invalidate(owner_id)
+
+
+def update_tasks(queryset, **changed):
+    """
+    Sets ``changed`` (any of ``status``, ``priority`` and ``project``) on
+    every task in ``queryset`` with one UPDATE and returns how many were
+    updated. Titles and descriptions are not accepted: those would need
+    reindexing.
+    """
+    unknown = set(changed) - {'status', 'priority', 'project'}
+    if unknown:
+        raise ValueError(f"Cannot bulk update: {', '.join(sorted(unknown))}")
+    with transaction.atomic():
+        rows = selected_rows(queryset)
+        moves = Counter()
+        for key, total in counter_totals(rows).items():
+            owner_id, project_id, status, priority = key
+            if 'project' in changed:
+                project_id = changed['project'] and changed['project'].pk
+            moves[key] -= total
+            moves[owner_id, project_id, changed.get('status', status), changed.get('priority', priority)] += total
+        # update() skips auto_now, and the ETags need a moved updated_at.
+        data = {**changed, 'updated_at': timezone.now()}
+        updated = queryset.order_by().update(**data)
+        if 'project' in changed:
+            data['project'] = changed['project'] and changed['project'].pk
+        apply_moves(moves, rows, updated, Change.UPDATED, data)
+    return updated
+
+
+def delete_tasks(queryset):
+    """
+    Deletes every task in ``queryset`` and its subtasks with one DELETE,
+    through the search backend so it can drop the index rows too, and
+    returns how many were deleted. Their blocker edges go first.
+    """
+    with transaction.atomic():
+        queryset = graph.with_descendants(queryset)
+        rows = selected_rows(queryset)
+        TaskDependency.objects.filter(Q(blocker__in=queryset) | Q(blocked__in=queryset)).delete()
+        deleted = get_search_backend().delete_tasks(queryset.order_by())
+        moves = Counter({key: -total for key, total in counter_totals(rows).items()})
+        apply_moves(moves, rows, deleted, Change.DELETED)
+    return deleted
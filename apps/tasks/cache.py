@@ -0,0 +1,122 @@
+"""
+Versioned read-through cache for owner-scoped task and project reads.
+
+Keys look like ``tasks:<namespace>:<owner>:<generation>:<params hash>``.
+The generation is a per-owner counter that the Task and Project signals bump
+on every write, so invalidating everything an owner can see is a single
+INCR; entries of older generations are simply never read again and age out.
+
+Entries read with a ``scope`` hang off a generation of their own instead,
+bumped by ``invalidate(owner_id, scope)`` only, so writes that cannot
+change them leave them cached: the project index (``project_index.py``)
+survives task writes.
+
+Writes that skip the signals (``bulk_create``, ``update()``) must call
+``invalidate()`` themselves. A bump only reaches the processes that share
+the cache it ran against, so reads only go through a shared (file or Redis)
+cache; with a per-process one they compute every time unless
+``settings.TASKS_CACHE_SHARED`` says the server is a single process.
+
+``aread_through()`` is the same cache for the async views, with an async
+``compute``.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from .cache_backends import metrics
+
+TIMEOUT = 5 * 60
+MISSING = object()
+
+
+def get_cache():
+    return caches[getattr(settings, 'TASKS_CACHE_ALIAS', 'default')]
+
+
+def is_shared():
+    """Whether every process serving requests reads this cache; guessed from the backend unless TASKS_CACHE_SHARED is set."""
+    shared = getattr(settings, 'TASKS_CACHE_SHARED', None)
+    if shared is None:
+        return not isinstance(get_cache(), LocMemCache)
+    return shared
+
+
+def generation_key(owner_id, scope=None):
+    if scope:
+        return f'tasks:generation:{owner_id}:{scope}'
+    return f'tasks:generation:{owner_id}'
+
+
+def get_generation(owner_id, scope=None):
+    # Seeded from the clock rather than 1, so a generation that was evicted
+    # never comes back as a number some stale entry is still stored under.
+    return get_cache().get_or_set(generation_key(owner_id, scope), time.time_ns, None)
+
+
+async def aget_generation(owner_id, scope=None):
+    return await get_cache().aget_or_set(generation_key(owner_id, scope), time.time_ns, None)
+
+
+def bump(owner_id, scope=None):
+    try:
+        get_cache().incr(generation_key(owner_id, scope))
+    except ValueError:
+        # No generation yet, so nothing can have been cached under it.
+        pass
+
+
+def invalidate(owner_id, scope=None):
+    """
+    Bumps the owner's generation (or the ``scope`` one) now, for the rest of
+    this transaction, and again on commit, so a concurrent reader cannot
+    cache pre-commit rows under the new generation.
+    """
+    bump(owner_id, scope)
+    transaction.on_commit(lambda: bump(owner_id, scope))
+
+
+def make_key(owner_id, namespace, params=None, generation=None, scope=None):
+    if generation is None:
+        generation = get_generation(owner_id, scope)
+    digest = hashlib.sha1(json.dumps(params or {}, sort_keys=True, default=str).encode()).hexdigest()
+    return f'tasks:{namespace}:{owner_id}:{generation}:{digest}'
+
+
+def read_through(owner, namespace, compute, params=None, timeout=TIMEOUT, scope=None):
+    """Returns the cached value for ``(owner, namespace, params)``, calling ``compute()`` on a miss."""
+    if not is_shared():
+        metrics.record('bypass', namespace)
+        return compute()
+    cache = get_cache()
+    key = make_key(owner.pk, namespace, params, scope=scope)
+    value = cache.get(key, MISSING)
+    if value is MISSING:
+        metrics.record('miss', namespace)
+        value = compute()
+        cache.set(key, value, timeout)
+    else:
+        metrics.record('hit', namespace)
+    return value
+
+
+async def aread_through(owner, namespace, compute, params=None, timeout=TIMEOUT, scope=None):
+    """read_through() for async views; ``compute`` is awaited on a miss."""
+    if not is_shared():
+        metrics.record('bypass', namespace)
+        return await compute()
+    cache = get_cache()
+    key = make_key(owner.pk, namespace, params, await aget_generation(owner.pk, scope))
+    value = await cache.aget(key, MISSING)
+    if value is MISSING:
+        metrics.record('miss', namespace)
+        value = await compute()
+        await cache.aset(key, value, timeout)
+    else:
+        metrics.record('hit', namespace)
+    return value
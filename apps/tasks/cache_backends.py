@@ -0,0 +1,277 @@
+"""
+Cache backends for ``CACHES``, each reporting evictions to ``metrics``.
+
+``LRUMemoryCache`` and ``FileCache`` extend Django's local-memory and
+file-based caches. ``RedisCache`` speaks the Redis protocol directly, so it
+works with Redis, Valkey or KeyDB without the ``redis`` package; it only
+uses GET, MGET, SET, DEL, EXISTS, INCRBY, PEXPIRE, PERSIST and FLUSHDB.
+"""
+import pickle
+import socket
+import threading
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+class CacheMetrics:
+    """Thread-safe counters of cache events, e.g. ``('hit', 'dashboard')``."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, event, namespace='', amount=1):
+        with self.lock:
+            self.counts[event, namespace] += amount
+
+    def snapshot(self):
+        """Returns ``{event: {namespace: count}}`` plus an ``'all'`` total per event."""
+        with self.lock:
+            counts = dict(self.counts)
+        events = {}
+        for (event, namespace), count in counts.items():
+            totals = events.setdefault(event, {'all': 0})
+            totals['all'] += count
+            if namespace:
+                totals[namespace] = totals.get(namespace, 0) + count
+        return events
+
+    def reset(self):
+        with self.lock:
+            self.counts.clear()
+
+
+metrics = CacheMetrics()
+
+
+class LRUMemoryCache(LocMemCache):
+    """
+    LocMemCache, which already keeps its entries in LRU order, but evicting
+    only the least recently used entry when full instead of a whole
+    ``CULL_FREQUENCY`` slice.
+
+    A dictionary lookup never blocks, so the async methods run inline
+    instead of taking BaseCache's hop through ``sync_to_async``.
+    """
+
+    def _cull(self):
+        key, _ = self._cache.popitem()
+        del self._expire_info[key]
+        metrics.record('eviction')
+
+    async def aadd(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.add(key, value, timeout, version)
+
+    async def aget(self, key, default=None, version=None):
+        return self.get(key, default, version)
+
+    async def aset(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.set(key, value, timeout, version)
+
+    async def aget_many(self, keys, version=None):
+        return self.get_many(keys, version)
+
+    async def aset_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.set_many(data, timeout, version)
+
+    async def aincr(self, key, delta=1, version=None):
+        return self.incr(key, delta, version)
+
+
+class FileCache(FileBasedCache):
+    """FileBasedCache that counts the files removed when it culls."""
+
+    def _cull(self):
+        before = len(self._list_cache_files())
+        super()._cull()
+        evicted = before - len(self._list_cache_files())
+        if evicted > 0:
+            metrics.record('eviction', amount=evicted)
+
+
+class RedisProtocolError(Exception):
+    pass
+
+
+class RedisConnection:
+    def __init__(self, host, port, db, password=None, timeout=1.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.reader = self.sock.makefile('rb')
+        if password:
+            self.execute('AUTH', password)
+        if db:
+            self.execute('SELECT', db)
+
+    def execute(self, *args):
+        return self.pipeline([args])[0]
+
+    def pipeline(self, commands):
+        """Sends every command in one write and reads their replies in order."""
+        payload = bytearray()
+        for args in commands:
+            payload += b'*%d\r\n' % len(args)
+            for arg in args:
+                if not isinstance(arg, bytes):
+                    arg = str(arg).encode()
+                payload += b'$%d\r\n%s\r\n' % (len(arg), arg)
+        self.sock.sendall(payload)
+        replies = [self.read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RedisProtocolError):
+                raise reply
+        return replies
+
+    def read_reply(self):
+        line = self.reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError("Connection closed by the cache server.")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode()
+        if kind == b'-':
+            return RedisProtocolError(rest.decode())
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length < 0:
+                return None
+            return self.reader.read(length + 2)[:-2]
+        if kind == b'*':
+            length = int(rest)
+            return None if length < 0 else [self.read_reply() for _ in range(length)]
+        raise ConnectionError(f"Unexpected reply from the cache server: {line!r}")
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+class RedisCache(BaseCache):
+    """
+    Cache on a Redis-compatible server, configured with a URL such as
+    ``redis://:password@127.0.0.1:6379/0``. Integers are stored as plain
+    numbers so INCRBY works on them; everything else is pickled. Each
+    thread keeps one connection and reconnects once if it was dropped.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        url = urlsplit(server if '://' in server else f'redis://{server}')
+        self.host = url.hostname or '127.0.0.1'
+        self.port = url.port or 6379
+        self.db = int(url.path.strip('/') or 0)
+        self.password = url.password
+        self.socket_timeout = params.get('OPTIONS', {}).get('SOCKET_TIMEOUT', 1.0)
+        self.local = threading.local()
+
+    def call(self, *commands):
+        for attempt in range(2):
+            connection = getattr(self.local, 'connection', None)
+            try:
+                if connection is None:
+                    connection = self.local.connection = RedisConnection(
+                        self.host, self.port, self.db, self.password, self.socket_timeout
+                    )
+                return connection.pipeline(commands)
+            except (ConnectionError, OSError):
+                self.local.connection = None
+                if connection is not None:
+                    connection.close()
+                if attempt:
+                    raise
+
+    def encode(self, value):
+        if type(value) is int:
+            return str(value).encode()
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, value):
+        try:
+            return int(value)
+        except ValueError:
+            return pickle.loads(value)
+
+    def expiry(self, timeout):
+        """SET arguments for ``timeout``, or None when the entry must not be stored."""
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return []
+        milliseconds = int(timeout * 1000)
+        return ['PX', milliseconds] if milliseconds > 0 else None
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        expiry = self.expiry(timeout)
+        if expiry is None:
+            return False
+        return self.call(('SET', key, self.encode(value), 'NX', *expiry))[0] == 'OK'
+
+    def get(self, key, default=None, version=None):
+        value = self.call(('GET', self.make_and_validate_key(key, version=version)))[0]
+        return default if value is None else self.decode(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        expiry = self.expiry(timeout)
+        if expiry is None:
+            self.call(('DEL', key))
+        else:
+            self.call(('SET', key, self.encode(value), *expiry))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        expiry = self.expiry(timeout)
+        if expiry is None:
+            return bool(self.call(('DEL', key))[0])
+        if not expiry:
+            return bool(self.call(('PERSIST', key))[0]) or self.has_key(key, version=version)
+        return bool(self.call(('PEXPIRE', key, expiry[1]))[0])
+
+    def delete(self, key, version=None):
+        return bool(self.call(('DEL', self.make_and_validate_key(key, version=version)))[0])
+
+    def has_key(self, key, version=None):
+        return bool(self.call(('EXISTS', self.make_and_validate_key(key, version=version)))[0])
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        # INCRBY would create a missing key; Django's API must raise instead.
+        if not self.call(('EXISTS', key))[0]:
+            raise ValueError(f"Key '{key}' not found.")
+        return self.call(('INCRBY', key, delta))[0]
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        made = [self.make_and_validate_key(key, version=version) for key in keys]
+        values = self.call(('MGET', *made))[0]
+        return {key: self.decode(value) for key, value in zip(keys, values) if value is not None}
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expiry = self.expiry(timeout)
+        commands = []
+        for key, value in data.items():
+            key = self.make_and_validate_key(key, version=version)
+            commands.append(('DEL', key) if expiry is None else ('SET', key, self.encode(value), *expiry))
+        if commands:
+            self.call(*commands)
+        return []
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if keys:
+            self.call(('DEL', *keys))
+
+    def clear(self):
+        self.call(('FLUSHDB',))
+
+    def close(self, **kwargs):
+        # Connections are per thread and reused across requests.
+        pass
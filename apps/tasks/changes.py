@@ -0,0 +1,250 @@
+"""
+Append-only log of Task and Project writes, streamed to their owner as
+Server-Sent Events.
+
+Every save and delete, through the signals in ``signals.py`` or the bulk
+helpers in ``bulk.py``, adds a Change row in the writing transaction. Its
+id is the event id: ``stream()`` sends the owner's changes after the
+client's ``Last-Event-ID``, so a reconnecting EventSource resumes where it
+left off and the page applies the deltas instead of reloading its lists.
+Each event is named after the model and carries ``{"action", "id",
+"fields"}``; ``fields`` are all of them for ``created``, those written for
+``updated``, so clients merge them into what they hold either way.
+
+The stream waits on the owner's cache generation (see ``cache.py``), which
+every write bumps on commit, and reads the log only when it moves, or every
+``MAX_POLL_INTERVAL`` seconds in case the bump went to another process's
+memory cache. Ids are handed out on insert: with SQLite's single writer
+they commit in order, but concurrent PostgreSQL transactions can commit a
+lower id after a higher one was sent, and that change is only seen on the
+next reload.
+
+The ``compact_changes`` command collapses each object's old changes into
+its last one and deletes those past ``RETENTION``. A client resuming from
+before the oldest change left gets a ``reset`` event, as it does after
+bulk writes that could not be logged row by row, and reloads.
+
+Settings come from ``settings.TASKS_CHANGES``, over DEFAULTS.
+"""
+import asyncio
+import json
+from itertools import groupby
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Max
+
+from .cache import aget_generation
+from .models import Change, Project, Task
+from .pagination import alist
+
+DEFAULTS = {
+    'POLL_INTERVAL': 1.0,  # Seconds between checks of the owner's cache generation
+    'MAX_POLL_INTERVAL': 10.0,  # Seconds between reads of the log while the generation stands still
+    'HEARTBEAT': 15.0,  # Seconds of silence before a comment keeps proxies from closing the stream
+    'TIMEOUT': 300.0,  # Seconds a stream stays open; EventSource then reconnects with Last-Event-ID
+    'RETRY': 2000,  # Milliseconds EventSource waits before reconnecting
+    'BATCH_SIZE': 500,  # Changes read, or written by bulk helpers, per query
+    'COMPACT_AFTER': 24 * 3600,  # Seconds before an object's changes are collapsed into one
+    'RETENTION': 7 * 24 * 3600,  # Seconds before changes are deleted
+}
+
+TASK_FIELDS = (
+    'title', 'description', 'due_date', 'priority', 'status', 'project', 'parent', 'created_at', 'updated_at',
+)
+PROJECT_FIELDS = ('title', 'description', 'created_at', 'updated_at')
+MODELS = {Task: ('task', TASK_FIELDS), Project: ('project', PROJECT_FIELDS)}
+
+
+def get_config(name):
+    return {**DEFAULTS, **(getattr(settings, 'TASKS_CHANGES', None) or {})}[name]
+
+
+def field_values(instance, fields):
+    opts = instance._meta
+    return {field: getattr(instance, opts.get_field(field).attname) for field in fields}
+
+
+def make_change(instance, action, owner_id=None):
+    model, fields = MODELS[type(instance)]
+    return Change(
+        owner_id=owner_id or instance.owner_id,
+        model=model,
+        object_id=instance.pk,
+        action=action,
+        data=None if action == Change.DELETED else field_values(instance, fields),
+    )
+
+
+def record(instance, action, owner_id=None):
+    """Logs one saved or deleted Task or Project, from its signals."""
+    make_change(instance, action, owner_id).save()
+
+
+def record_created(tasks):
+    """Logs tasks written with bulk_create."""
+    Change.objects.bulk_create(
+        [make_change(task, Change.CREATED) for task in tasks], batch_size=get_config('BATCH_SIZE')
+    )
+
+
+def record_rows(rows, action, data=None):
+    """Logs ``action`` for tasks updated or deleted in bulk, given as ``(id, owner_id, ...)`` rows."""
+    Change.objects.bulk_create(
+        [Change(owner_id=row[1], model='task', object_id=row[0], action=action, data=data) for row in rows],
+        batch_size=get_config('BATCH_SIZE'),
+    )
+
+
+def record_reset(owner_ids):
+    """Tells the owners' clients to reload, after writes whose rows are not known."""
+    Change.objects.bulk_create([Change(owner_id=owner_id, action=Change.RESET) for owner_id in owner_ids])
+
+
+def format_event(change):
+    if change.action == Change.RESET:
+        return f"id: {change.id}\nevent: reset\ndata: {{}}\n\n"
+    data = json.dumps(
+        {'action': change.action, 'id': change.object_id, 'fields': change.data},
+        cls=DjangoJSONEncoder, separators=(',', ':'),
+    )
+    return f"id: {change.id}\nevent: {change.model}\ndata: {data}\n\n"
+
+
+def parse_event_id(value):
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_lost(last_id, oldest, latest):
+    """
+    Whether changes after ``last_id`` may have been pruned unseen, given the
+    ``oldest`` and ``latest`` ids left, or ``last_id`` is not from this log.
+    """
+    return last_id > latest or bool(last_id) and (oldest is None or last_id < oldest - 1)
+
+
+def log_bounds():
+    """``(oldest, latest)`` ids in the log, with 0 for no latest."""
+    # Two queries, since SQLite reads MIN() or MAX() off the index only alone.
+    ids = Change.objects.values_list('id', flat=True)
+    return ids.order_by('id').first(), ids.order_by('-id').first() or 0
+
+
+async def alog_bounds():
+    ids = Change.objects.values_list('id', flat=True)
+    return await ids.order_by('id').afirst(), await ids.order_by('-id').afirst() or 0
+
+
+async def start(owner, last_event_id):
+    """
+    Returns ``(last_id, event)``: the id to stream after and the event that
+    opens the stream, ``ready`` or, when ``last_event_id`` is older than
+    the log or unknown to it, ``reset``.
+    """
+    last_id = parse_event_id(last_event_id)
+    oldest, latest = await alog_bounds()
+    if last_id is None:
+        return latest, f"id: {latest}\nevent: ready\ndata: {{}}\n\n"
+    if is_lost(last_id, oldest, latest):
+        return latest, f"id: {latest}\nevent: reset\ndata: {{}}\n\n"
+    return last_id, None
+
+
+async def stream(owner, last_event_id=None, timeout=None):
+    """
+    Yields the Server-Sent Events of ``owner``'s changes after
+    ``last_event_id`` as they are logged, for ``timeout`` seconds (the
+    TIMEOUT setting by default). With a timeout of 0 it yields those
+    already logged and stops.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (get_config('TIMEOUT') if timeout is None else timeout)
+    batch_size = get_config('BATCH_SIZE')
+    last_id, opening = await start(owner, last_event_id)
+    yield f"retry: {get_config('RETRY')}\n\n" + (opening or '')
+    generation = None
+    next_read = loop.time()
+    quiet_since = loop.time()
+    while True:
+        current = await aget_generation(owner.pk)
+        if current != generation or loop.time() >= next_read:
+            generation = current
+            next_read = loop.time() + get_config('MAX_POLL_INTERVAL')
+            changes = await alist(Change.objects.filter(owner=owner, id__gt=last_id).order_by('id')[:batch_size])
+            if changes:
+                yield ''.join(format_event(change) for change in changes)
+                last_id = changes[-1].id
+                quiet_since = loop.time()
+                if len(changes) == batch_size:
+                    # More are waiting; read again without sleeping.
+                    generation = None
+                    continue
+        if loop.time() >= deadline:
+            return
+        if loop.time() - quiet_since >= get_config('HEARTBEAT'):
+            yield ": keep-alive\n\n"
+            quiet_since = loop.time()
+        await asyncio.sleep(min(get_config('POLL_INTERVAL'), max(deadline - loop.time(), 0)))
+
+
+def merge(changes):
+    """Collapses one object's changes, oldest first, into the last; returns the Change to keep."""
+    kept = changes[-1]
+    if kept.action != Change.DELETED:
+        data = {}
+        for change in changes:
+            data.update(change.data or {})
+        kept.data = data
+        kept.action = Change.CREATED if changes[0].action == Change.CREATED else Change.UPDATED
+    return kept
+
+
+def compact(before, batch_size=None):
+    """
+    Collapses every object's changes logged before ``before`` into its last
+    one, which takes the merged fields, so a client resuming from any of
+    them still ends up with the same rows. Works one owner at a time and
+    returns ``(deleted, owners)``, counting the owners with changes deleted.
+    """
+    batch_size = batch_size or get_config('BATCH_SIZE')
+    bound = Change.objects.filter(created_at__lt=before).aggregate(bound=Max('id'))['bound']
+    if bound is None:
+        return 0, 0
+    old = Change.objects.filter(id__lte=bound).exclude(object_id=None)
+    owner_ids = list(old.order_by().values_list('owner', flat=True).distinct())
+    deleted = owners = 0
+    for owner_id in owner_ids:
+        changes = sorted(old.filter(owner_id=owner_id), key=lambda change: (change.object_id, change.id))
+        kept, dropped = [], []
+        for object_id, group in groupby(changes, key=lambda change: change.object_id):
+            group = list(group)
+            if len(group) > 1:
+                kept.append(merge(group))
+                dropped.extend(change.id for change in group[:-1])
+        if not dropped:
+            continue
+        owners += 1
+        with transaction.atomic():
+            Change.objects.bulk_update(kept, ['action', 'data'], batch_size=batch_size)
+            for start in range(0, len(dropped), batch_size):
+                deleted += Change.objects.filter(id__in=dropped[start:start + batch_size]).delete()[0]
+    return deleted, owners
+
+
+def prune(before, batch_size=None):
+    """Deletes the changes logged before ``before``, oldest first, and returns how many."""
+    batch_size = batch_size or get_config('BATCH_SIZE')
+    # Everything up to the newest old id, so every id left is above every
+    # one deleted, which is what is_lost() relies on.
+    bound = Change.objects.filter(created_at__lt=before).aggregate(bound=Max('id'))['bound']
+    deleted = 0
+    while bound is not None:
+        ids = list(Change.objects.filter(id__lte=bound).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        deleted += Change.objects.filter(id__in=ids).delete()[0]
+    return deleted
@@ -0,0 +1,126 @@
+"""
+Conditional GET for the owner-scoped task and project pages.
+
+Everything those pages show is derived from the owner's tasks and projects,
+so one query for the newest ``updated_at`` and the row count of each tells
+whether anything changed: edits move the maximum, deletes change the count.
+A matching ``If-None-Match`` or ``If-Modified-Since`` is answered with 304
+before the view touches its own querysets or templates. Bulk ``update()``
+calls bypass ``auto_now``, so they must set ``updated_at`` themselves.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .cache import aread_through, read_through
+from .models import Project, Task
+
+
+def owner_stamp_queryset(owner):
+    def aggregate(model, function):
+        rows = model.objects.filter(owner=OuterRef('pk')).order_by().values('owner')
+        return Subquery(rows.annotate(value=function).values('value'))
+
+    return get_user_model().objects.filter(pk=owner.pk).values(
+        task_updated=aggregate(Task, Max('updated_at')),
+        task_count=aggregate(Task, Count('pk')),
+        project_updated=aggregate(Project, Max('updated_at')),
+        project_count=aggregate(Project, Count('pk')),
+    )
+
+
+def owner_stamp(owner):
+    """
+    Returns ``(last_modified, counts)`` for ``owner``'s tasks and projects in
+    a single query; the task half is answered from ``task_owner_updated_idx``.
+    """
+    return stamp_from_row(owner_stamp_queryset(owner).get())
+
+
+async def aowner_stamp(owner):
+    return stamp_from_row(await owner_stamp_queryset(owner).aget())
+
+
+def stamp_from_row(row):
+    updated = [value for value in (row['task_updated'], row['project_updated']) if value]
+    return max(updated, default=None), (row['task_count'] or 0, row['project_count'] or 0)
+
+
+def make_validators(request, stamp):
+    """
+    Returns ``(last_modified, etag)`` for ``request`` given the owner's
+    ``(last_modified, counts)`` stamp.
+    """
+    last_modified, counts = stamp
+    parts = [
+        request.user.pk,
+        request.get_full_path(),
+        last_modified.isoformat() if last_modified else '',
+        *counts,
+        # Overdue markers change at midnight without any row changing.
+        timezone.localdate().isoformat(),
+        # Forms embed a token derived from the CSRF cookie, which rotates on login.
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    ]
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+    # HTTP dates have whole-second precision, so compare at that precision.
+    return (int(last_modified.timestamp()) if last_modified else None), quote_etag(digest)
+
+
+def add_validators(response, last_modified, etag):
+    if response.status_code == 200:
+        response.headers.setdefault('ETag', etag)
+        if last_modified is not None:
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+    # Revalidate every time rather than trusting a heuristic freshness.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag and Last-Modified to GET and HEAD responses and short-circuits
+    matching requests with 304. Place it after LoginRequiredMixin.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        # A page with pending flash messages must be rendered to show them.
+        if request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+            return super().dispatch(request, *args, **kwargs)
+        last_modified, etag = self.get_validators()
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+        return add_validators(response, last_modified, etag)
+
+    def get_validators(self):
+        user = self.request.user
+        # Cached under the owner's generation, so a warm revalidation skips the query.
+        return make_validators(self.request, read_through(user, 'stamp', lambda: owner_stamp(user)))
+
+
+class AsyncConditionalGetMixin:
+    """
+    ConditionalGetMixin for views whose ``dispatch`` is async. The session
+    must already be loaded, e.g. by ``request.auser()``, so that checking
+    for flash messages does not query the database.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+            return await super().dispatch(request, *args, **kwargs)
+        last_modified, etag = await self.aget_validators()
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = await super().dispatch(request, *args, **kwargs)
+        return add_validators(response, last_modified, etag)
+
+    async def aget_validators(self):
+        user = self.request.user
+        return make_validators(self.request, await aread_through(user, 'stamp', lambda: aowner_stamp(user)))
@@ -0,0 +1,11 @@
+from django.utils.functional import SimpleLazyObject
+
+from .project_index import get_project_index
+
+
+def project_index(request):
+    """Adds the user's cached ``project_index``; only read if a template uses it."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'project_index': SimpleLazyObject(lambda: get_project_index(user))}
@@ -0,0 +1,122 @@
+"""
+Maintenance and reads of the TaskCounter table.
+
+Counters are adjusted from the Task signals in ``signals.py``; the
+``recount`` management command rebuilds them from scratch if they drift.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from . import cache
+from .models import OPEN_WITH_DUE_DATE, Task, TaskCounter
+
+
+def counter_key(task):
+    return task.owner_id, task.project_id, task.status, task.priority
+
+
+def adjust(key, delta):
+    owner_id, project_id, status, priority = key
+    counters = TaskCounter.objects.filter(
+        owner_id=owner_id, project_id=project_id, status=status, priority=priority
+    )
+    if counters.update(count=F('count') + delta) or delta < 0:
+        # A missing row on decrement means the owner or project is being
+        # deleted along with its counters; there is nothing left to fix.
+        return
+    try:
+        with transaction.atomic():
+            TaskCounter.objects.create(
+                owner_id=owner_id, project_id=project_id, status=status, priority=priority, count=delta
+            )
+    except IntegrityError:
+        # Another request created the row first.
+        counters.update(count=F('count') + delta)
+
+
+def add_tasks(tasks):
+    """Counts tasks written with bulk_create, which sends no signals."""
+    with transaction.atomic():
+        for key, total in Counter(counter_key(task) for task in tasks).items():
+            adjust(key, total)
+
+
+def move(old_key, new_key):
+    if old_key != new_key:
+        with transaction.atomic():
+            adjust(old_key, -1)
+            adjust(new_key, 1)
+
+
+def release_project(project):
+    """Moves a deleted project's counts to the no-project bucket, as SET_NULL does for its tasks."""
+    with transaction.atomic():
+        for counter in TaskCounter.objects.filter(project=project, count__gt=0):
+            adjust((counter.owner_id, None, counter.status, counter.priority), counter.count)
+
+
+def recount(owner=None):
+    """Rebuilds the counters from the Task table and returns the number of counter rows."""
+    tasks = Task.objects.order_by()
+    counters = TaskCounter.objects.all()
+    if owner is not None:
+        tasks = tasks.filter(owner=owner)
+        counters = counters.filter(owner=owner)
+    rows = tasks.values('owner', 'project', 'status', 'priority').annotate(total=Count('id'))
+    with transaction.atomic():
+        counters.delete()
+        TaskCounter.objects.bulk_create([
+            TaskCounter(
+                owner_id=row['owner'], project_id=row['project'],
+                status=row['status'], priority=row['priority'], count=row['total'],
+            )
+            for row in rows
+        ])
+        for owner_id in {row['owner'] for row in rows} | ({owner.pk} if owner is not None else set()):
+            cache.invalidate(owner_id)
+    return len(rows)
+
+
+def dashboard(owner):
+    """
+    Per-project and overall task counts for ``owner``.
+
+    Status and priority totals come from the counter rows, whose number is
+    bounded by projects x statuses x priorities. Overdue depends on today's
+    date, so it is one grouped query over the owner's open tasks instead.
+    """
+    statuses = [value for value, label in Task.STATUS_CHOICES]
+    priorities = [value for value, label in Task.PRIORITY_CHOICES]
+
+    def empty_row(project):
+        row = {'project': project, 'total': 0, 'overdue': 0}
+        row.update({key: 0 for key in statuses + priorities})
+        return row
+
+    totals = empty_row(None)
+    projects = {}
+    for counter in TaskCounter.objects.filter(owner=owner, count__gt=0).select_related('project'):
+        row = projects.setdefault(counter.project_id, empty_row(counter.project))
+        for target in (row, totals):
+            target[counter.status] += counter.count
+            target[counter.priority] += counter.count
+            target['total'] += counter.count
+
+    overdue = (
+        Task.objects.filter(OPEN_WITH_DUE_DATE, owner=owner, due_date__lt=timezone.now().date())
+        .order_by()
+        .values('project')
+        .annotate(total=Count('id'))
+    )
+    for row in overdue:
+        if row['project'] in projects:
+            projects[row['project']]['overdue'] = row['total']
+        totals['overdue'] += row['total']
+
+    project_rows = sorted(
+        projects.values(), key=lambda row: (row['project'] is None, row['project'] and row['project'].title)
+    )
+    return {'totals': totals, 'projects': project_rows}
@@ -1,3 +1,5 @@
+import uuid
+
 from django import forms
 from .models import Task, Project
 from crispy_forms.helper import FormHelper
@@ -21,7 +23,23 @@ class ProjectForm(forms.ModelForm):
         )
 
 
-class TaskForm(forms.ModelForm):
+class TaskValidationMixin:
+    """Field rules shared by every form that creates or edits tasks."""
+
+    def clean_due_date(self):
+        due_date = self.cleaned_data.get('due_date')
+        if due_date and due_date < timezone.now().date():
+            raise ValidationError("Due date cannot be in the past.")
+        return due_date
+
+    def clean_priority(self):
+        priority = self.cleaned_data.get('priority')
+        if priority:
+            return priority.lower()
+        return priority
+
+
+class TaskForm(TaskValidationMixin, forms.ModelForm):
     class Meta:
         model = Task
         fields = ['title', 'description', 'due_date', 'priority', 'status', 'project']
@@ -48,14 +66,73 @@ class TaskForm(forms.ModelForm):
             Submit('submit', 'Save Task', css_class='button white')
         )
 
-    def clean_due_date(self):
-        due_date = self.cleaned_data.get('due_date')
-        if due_date and due_date < timezone.now().date():
-            raise ValidationError("Due date cannot be in the past.")
-        return due_date
 
-    def clean_priority(self):
-        priority = self.cleaned_data.get('priority')
-        if priority:
-            return priority.lower()
-        return priority
\ No newline at end of file
+class TaskRowForm(TaskValidationMixin, forms.ModelForm):
+    """
+    Validates one task of a batch with the TaskForm rules. The project is
+    resolved by the caller, so there is no per-row project lookup and no
+    crispy layout to build.
+    """
+
+    class Meta:
+        model = Task
+        fields = ['title', 'description', 'due_date', 'priority', 'status']
+
+
+class TaskIdsField(forms.Field):
+    """A list of task UUIDs, posted as repeated form values."""
+
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        try:
+            return [uuid.UUID(str(pk)) for pk in value or []]
+        except ValueError:
+            raise ValidationError("Select valid tasks.", code='invalid')
+
+
+class TaskBulkForm(forms.Form):
+    """
+    An action for TaskBulkView to apply to the selected ``tasks``, or to
+    every task matching the list filters when ``all_matching`` is set.
+    """
+
+    ACTION_CHOICES = [
+        ('done', 'Mark done'),
+        ('move', 'Move to project'),
+        ('priority', 'Change priority'),
+        ('delete', 'Delete'),
+    ]
+    MAX_SELECTED = 1000
+
+    action = forms.ChoiceField(choices=ACTION_CHOICES)
+    tasks = TaskIdsField(required=False)
+    all_matching = forms.BooleanField(required=False)
+    project = forms.ModelChoiceField(queryset=Project.objects.none(), required=False)
+    priority = forms.ChoiceField(choices=Task.PRIORITY_CHOICES, required=False)
+
+    def __init__(self, owner, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['project'].queryset = Project.objects.filter(owner=owner)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('all_matching'):
+            selected = cleaned_data.get('tasks')
+            if not selected and 'tasks' not in self.errors:
+                raise ValidationError("Select at least one task.")
+            if selected and len(selected) > self.MAX_SELECTED:
+                raise ValidationError(f"Select at most {self.MAX_SELECTED} tasks.")
+        if cleaned_data.get('action') == 'priority' and not cleaned_data.get('priority'):
+            self.add_error('priority', "Choose a priority.")
+        return cleaned_data
+
+    def get_changes(self):
+        """The fields the action sets, for ``bulk.update_tasks``."""
+        action = self.cleaned_data['action']
+        if action == 'done':
+            return {'status': 'done'}
+        if action == 'move':
+            # No project moves the tasks out of their projects.
+            return {'project': self.cleaned_data['project']}
+        return {'priority': self.cleaned_data['priority']}
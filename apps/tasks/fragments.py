@@ -0,0 +1,104 @@
+"""
+Cached HTML of the rows and cards on the list pages.
+
+Each fragment is keyed on the object's id and ``updated_at``, which every
+save and bulk write stamps, plus whatever else the template shows from
+outside the object (the project title on a task row, the tasks on a
+project card) and a digest of the template source. A change to any of them
+changes the key, so fragments are never invalidated; old ones age out.
+Unlike the owner cache (``cache.py``), they survive writes to the owner's
+other rows, so after an edit a page re-renders only the rows that changed.
+
+A page reads all its fragments with one ``get_many``, renders the misses
+and stores them with one ``set_many``. Settings come from
+``settings.TASKS_FRAGMENTS``, over DEFAULTS; with ``ENABLED`` off every
+fragment is rendered each time.
+"""
+import hashlib
+
+from django.conf import settings
+from django.template.loader import get_template
+
+from .cache import get_cache
+from .cache_backends import metrics
+
+DEFAULTS = {
+    'ENABLED': True,
+    'TIMEOUT': 24 * 3600,  # Seconds a fragment is kept after it was last rendered
+}
+
+
+def get_config(name):
+    return {**DEFAULTS, **(getattr(settings, 'TASKS_FRAGMENTS', None) or {})}[name]
+
+
+def task_row_key(task):
+    return task.pk, task.updated_at, task.project_title, task.excerpt
+
+
+def project_card_key(project):
+    return project.pk, project.updated_at, [(task.pk, task.updated_at) for task in project.filtered_tasks]
+
+
+FRAGMENTS = {
+    # name: (template, context name, key parts)
+    'task_row': ('tasks/task_row.html', 'task', task_row_key),
+    'project_card': ('tasks/project_card.html', 'project', project_card_key),
+}
+
+
+def make_key(name, source_digest, parts):
+    pk, updated_at, *extra = parts
+    digest = hashlib.sha1(repr(extra).encode()).hexdigest()[:16]
+    return f'tasks:fragment:{name}:{source_digest}:{pk}:{updated_at.timestamp()}:{digest}'
+
+
+class Fragments:
+    """The ``name`` fragments of ``objects``, in order, once ``load()`` or ``aload()`` has run."""
+
+    def __init__(self, name, objects):
+        template_name, self.context_name, key = FRAGMENTS[name]
+        self.name = name
+        self.objects = list(objects)
+        self.template = get_template(template_name)
+        source_digest = hashlib.sha1(self.template.template.source.encode()).hexdigest()[:8]
+        self.keys = [make_key(name, source_digest, key(obj)) for obj in self.objects]
+
+    def render(self, cached):
+        """Returns the fragments, rendering those missing from ``cached``, and the rendered ones by key."""
+        fragments, missed = [], {}
+        for key, obj in zip(self.keys, self.objects):
+            html = cached.get(key)
+            if html is None:
+                html = missed[key] = self.template.render({self.context_name: obj})
+            fragments.append(html)
+        metrics.record('hit', f'fragment.{self.name}', len(fragments) - len(missed))
+        metrics.record('miss', f'fragment.{self.name}', len(missed))
+        return fragments, missed
+
+    def load(self):
+        if not get_config('ENABLED'):
+            return self.render({})[0]
+        cache = get_cache()
+        fragments, missed = self.render(cache.get_many(self.keys) if self.keys else {})
+        if missed:
+            cache.set_many(missed, get_config('TIMEOUT'))
+        return fragments
+
+    async def aload(self):
+        if not get_config('ENABLED'):
+            return self.render({})[0]
+        cache = get_cache()
+        fragments, missed = self.render(await cache.aget_many(self.keys) if self.keys else {})
+        if missed:
+            await cache.aset_many(missed, get_config('TIMEOUT'))
+        return fragments
+
+
+def render_fragments(name, objects):
+    """The HTML of each of ``objects`` as the ``name`` fragment (see FRAGMENTS), through the cache."""
+    return Fragments(name, objects).load()
+
+
+async def arender_fragments(name, objects):
+    return await Fragments(name, objects).aload()
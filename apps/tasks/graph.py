@@ -0,0 +1,210 @@
+"""
+Subtasks and blockers, and the graph queries over them.
+
+A task's ``parent`` makes it a subtask, and deleting a task deletes its
+subtasks. TaskDependency edges say that a ``blocker`` task must be done
+before the ``blocked`` one. Both graphs stay acyclic and within one owner:
+every write that could close a loop first walks the graph from the far end
+of the new edge with a recursive CTE, holding a lock on the owner's row so
+that two concurrent writes cannot each close half of one. The parent check
+runs from the Task pre_save signal; blocker edges go through
+``add_blocker()`` and ``remove_blocker()``.
+
+Every read is one query. ``descendants()``, ``blocked_by()`` and
+``blockers()`` filter tasks by a recursive CTE, so they compose with the
+usual filters, ordering and pagination. ``ancestors()`` returns the chain
+up to the root, in order. ``critical_path()`` reads a project's open
+blocker edges and finds the longest chain in Python, in linear time. A CTE
+would have to enumerate every path, and the number of paths grows
+exponentially with diamonds in the graph.
+
+The walks use UNION, not UNION ALL, so each task is visited once and a loop
+written around these checks (raw SQL, fixtures) still ends.
+"""
+from collections import Counter, defaultdict, deque
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from . import cache
+from .models import Task, TaskDependency
+
+TASKS = Task._meta.db_table
+EDGES = TaskDependency._meta.db_table
+
+# Tasks below the tasks whose ids the seed selects.
+DESCENDANTS_SQL = (
+    'WITH RECURSIVE tree(id) AS ('
+    f'SELECT id FROM {TASKS} WHERE parent_id IN ({{seed}}) '
+    f'UNION SELECT t.id FROM {TASKS} t JOIN tree ON t.parent_id = tree.id'
+    ') SELECT id FROM tree'
+)
+
+# A task and every task above it.
+CHAIN_SQL = (
+    'WITH RECURSIVE chain(id, parent_id) AS ('
+    f'SELECT id, parent_id FROM {TASKS} WHERE id = %s '
+    f'UNION SELECT t.id, t.parent_id FROM {TASKS} t JOIN chain ON t.id = chain.parent_id'
+    ') SELECT id FROM chain'
+)
+
+# Tasks reached from a task by following edges from one column to the other.
+REACH_SQL = (
+    'WITH RECURSIVE reach(id) AS ('
+    f'SELECT {{to}} FROM {EDGES} WHERE {{start}} = %s '
+    f'UNION SELECT e.{{to}} FROM {EDGES} e JOIN reach ON e.{{start}} = reach.id'
+    ') SELECT id FROM reach'
+)
+
+
+class GraphError(Exception):
+    pass
+
+
+def prepare(pk):
+    return Task._meta.pk.get_db_prep_value(pk, connection)
+
+
+def descendants(task):
+    """Every subtask below ``task``, at any depth."""
+    return Task.objects.filter(pk__in=RawSQL(DESCENDANTS_SQL.format(seed='%s'), [prepare(task.pk)]))
+
+
+def with_descendants(queryset):
+    """The tasks in ``queryset`` and every subtask below them."""
+    seed, params = queryset.order_by().values('pk').query.sql_with_params()
+    below = RawSQL(DESCENDANTS_SQL.format(seed=seed), params)
+    return Task.objects.filter(Q(pk__in=queryset.order_by().values('pk')) | Q(pk__in=below))
+
+
+def chain(pk):
+    """The task ``pk`` and every task above it."""
+    return Task.objects.filter(pk__in=RawSQL(CHAIN_SQL, [prepare(pk)]))
+
+
+def ancestors(task):
+    """The tasks above ``task``, its root first and its parent last."""
+    if task.parent_id is None:
+        return []
+    by_pk = {ancestor.pk: ancestor for ancestor in chain(task.parent_id)}
+    path = []
+    pk = task.parent_id
+    while pk in by_pk and len(path) < len(by_pk):
+        path.append(by_pk[pk])
+        pk = by_pk[pk].parent_id
+    return path[::-1]
+
+
+def reach(task, start, to):
+    return Task.objects.filter(pk__in=RawSQL(REACH_SQL.format(start=start, to=to), [prepare(task.pk)]))
+
+
+def blocked_by(task):
+    """Every task that ``task`` blocks, directly or through others."""
+    return reach(task, 'blocker_id', 'blocked_id')
+
+
+def blockers(task):
+    """Every task that blocks ``task``, directly or through others."""
+    return reach(task, 'blocked_id', 'blocker_id')
+
+
+def lock_owner(owner_id):
+    # Serializes an owner's graph writes where the database locks rows;
+    # SQLite already lets one writer in at a time.
+    list(get_user_model().objects.select_for_update().filter(pk=owner_id).values_list('pk'))
+
+
+def check_parent(task):
+    """Raises GraphError unless ``task.parent`` is a task of the same owner outside ``task``'s subtree."""
+    if task.parent_id == task.pk:
+        raise GraphError("A task cannot be its own subtask.")
+    lock_owner(task.owner_id)
+    rows = list(chain(task.parent_id).values_list('pk', 'owner'))
+    parent = next((row for row in rows if row[0] == task.parent_id), None)
+    if parent is None or parent[1] != task.owner_id:
+        raise GraphError("The parent task does not exist.")
+    if any(row[0] == task.pk for row in rows):
+        raise GraphError("A task cannot be a subtask of its own subtask.")
+
+
+def add_blocker(blocker, blocked):
+    """Records that ``blocker`` blocks ``blocked`` and returns the edge; raises GraphError if that closes a loop."""
+    if blocker.owner_id != blocked.owner_id:
+        raise GraphError("Tasks can only be blocked by tasks of the same user.")
+    if blocker.pk == blocked.pk:
+        raise GraphError("A task cannot block itself.")
+    with transaction.atomic():
+        lock_owner(blocked.owner_id)
+        if blocked_by(blocked).filter(pk=blocker.pk).exists():
+            raise GraphError(f"{blocked} already blocks {blocker}.")
+        edge, created = TaskDependency.objects.get_or_create(blocker=blocker, blocked=blocked)
+        if created:
+            cache.invalidate(blocked.owner_id)
+    return edge
+
+
+def remove_blocker(blocker, blocked):
+    """Drops the edge from ``blocker`` to ``blocked``; returns whether there was one."""
+    with transaction.atomic():
+        deleted, _ = TaskDependency.objects.filter(blocker=blocker, blocked=blocked).delete()
+        if deleted:
+            cache.invalidate(blocked.owner_id)
+    return bool(deleted)
+
+
+def longest_chain(edges, rank):
+    """
+    The longest path through the acyclic ``(blocker, blocked)`` ``edges``,
+    as a list of ids, first to do first. ``rank`` maps each id to a sort
+    key: of equally long chains, the one whose last task ranks first wins,
+    and so on back along the chain.
+    """
+    successors = defaultdict(list)
+    waiting = Counter()
+    for blocker, blocked in edges:
+        successors[blocker].append(blocked)
+        waiting[blocked] += 1
+    nodes = set(successors) | set(waiting)
+    length = dict.fromkeys(nodes, 1)
+    previous = {}
+    ready = deque(node for node in nodes if not waiting[node])
+    while ready:
+        node = ready.popleft()
+        for successor in successors[node]:
+            if length[node] + 1 > length[successor] or (
+                length[node] + 1 == length[successor] and rank[node] < rank[previous[successor]]
+            ):
+                length[successor] = length[node] + 1
+                previous[successor] = node
+            waiting[successor] -= 1
+            if not waiting[successor]:
+                ready.append(successor)
+    if not nodes:
+        return []
+    node = min(nodes, key=lambda node: (-length[node], rank[node]))
+    path = [node]
+    while node in previous:
+        node = previous[node]
+        path.append(node)
+    return path[::-1]
+
+
+def critical_path(project):
+    """
+    Ids of the longest chain of blockers among ``project``'s open tasks,
+    first to do first; empty when none of them blocks another. Of equally
+    long chains, the one with the earliest created tasks wins.
+    """
+    edges = TaskDependency.objects.filter(blocker__project=project, blocked__project=project).exclude(
+        Q(blocker__status='done') | Q(blocked__status='done')
+    )
+    pairs, rank = [], {}
+    rows = edges.values_list('blocker', 'blocked', 'blocker__created_at', 'blocked__created_at')
+    for blocker, blocked, blocker_created, blocked_created in rows:
+        pairs.append((blocker, blocked))
+        rank[blocker] = blocker_created, blocker
+        rank[blocked] = blocked_created, blocked
+    return longest_chain(pairs, rank)
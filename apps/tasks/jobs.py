@@ -0,0 +1,290 @@
+"""
+Database-backed queue for work that should not run in the request.
+
+``enqueue()`` stores a Job row in the caller's transaction, so a job only
+becomes visible once the work that asked for it has committed. The
+``run_jobs`` worker claims due jobs with ``SELECT ... FOR UPDATE SKIP
+LOCKED``, so several workers never take the same job; SQLite has no row
+locks, and its immediate write transactions serialize the claims instead.
+A job that raises is retried with exponential backoff until it has had
+``max_attempts``. While a job runs, its worker refreshes its heartbeat
+every ``HEARTBEAT`` seconds, however long the handler takes; one whose
+worker died is requeued once ``STALE_AFTER`` seconds pass without one.
+
+Handlers are registered by name with ``@register(name)`` and called with
+the Job; what they return, which must be JSON-serializable, is stored as
+its result. Raise JobFailed to fail a job without retrying it. Settings
+come from ``settings.TASKS_JOBS``, over DEFAULTS.
+"""
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.mail import send_mail
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .ai_parser import parse_task_text
+from .counters import recount
+from .forms import TaskForm
+from .models import Job
+from .transfer import TaskImporter, read_rows
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF': 5,  # Seconds before the first retry; doubled for each one after
+    'MAX_BACKOFF': 3600,
+    'STALE_AFTER': 600,  # Seconds without a heartbeat before a job's worker is presumed dead
+    'HEARTBEAT': 60,  # Seconds between a worker's heartbeats for its running jobs
+    'DEFER_QUICK_ADD': False,  # Parse quick-add text in the worker instead of the request
+}
+
+handlers = {}
+
+
+class JobFailed(Exception):
+    """Raised by a handler to fail its job for good, e.g. on invalid input."""
+
+
+def get_config(name):
+    return {**DEFAULTS, **(getattr(settings, 'TASKS_JOBS', None) or {})}[name]
+
+
+def register(name):
+    def decorator(handler):
+        handlers[name] = handler
+        return handler
+    return decorator
+
+
+def enqueue(name, payload=None, owner=None, priority=0, delay=0, max_attempts=None):
+    """Queues the ``name`` handler to run with ``payload`` and returns the Job."""
+    if name not in handlers:
+        raise ValueError(f"Unknown job: {name}")
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        owner=owner,
+        priority=priority,
+        run_after=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or get_config('MAX_ATTEMPTS'),
+    )
+
+
+def claim(worker, limit=1):
+    """Marks up to ``limit`` due jobs as running for ``worker`` and returns them, highest priority first."""
+    now = timezone.now()
+    with transaction.atomic():
+        due = Job.objects.select_for_update(skip_locked=True).filter(status=Job.QUEUED, run_after__lte=now)
+        ids = list(due.order_by('-priority', 'run_after').values_list('pk', flat=True)[:limit])
+        if not ids:
+            return []
+        Job.objects.filter(pk__in=ids, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_by=worker, locked_at=now, heartbeat_at=now, attempts=F('attempts') + 1
+        )
+        claimed = Job.objects.filter(pk__in=ids, status=Job.RUNNING, locked_by=worker, locked_at=now)
+        return list(claimed.select_related('owner').order_by('-priority', 'run_after'))
+
+
+def backoff(attempts):
+    """Seconds to wait before retrying after ``attempts`` failures, jittered so failures spread out."""
+    delay = min(get_config('BACKOFF') * 2 ** (attempts - 1), get_config('MAX_BACKOFF'))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def finish(job, status, **fields):
+    """Records the outcome of a claimed job, unless it was requeued and claimed again meanwhile."""
+    if status != Job.QUEUED:
+        fields['finished_at'] = timezone.now()
+    updated = Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by, locked_at=job.locked_at).update(
+        status=status, locked_by='', locked_at=None, heartbeat_at=None, **fields
+    )
+    if updated:
+        job.status = status
+        for name, value in fields.items():
+            setattr(job, name, value)
+    return job
+
+
+def run(job):
+    """Runs a claimed job, records the outcome and returns the job."""
+    handler = handlers.get(job.name)
+    try:
+        if handler is None:
+            raise JobFailed(f"No handler is registered for {job.name}.")
+        result = handler(job)
+    except JobFailed as exc:
+        return finish(job, Job.FAILED, error=str(exc))
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s (%s) failed on attempt %d", job.pk, job.name, job.attempts)
+        if job.attempts < job.max_attempts:
+            return finish(job, Job.QUEUED, error=error, run_after=timezone.now() + timedelta(seconds=backoff(job.attempts)))
+        return finish(job, Job.FAILED, error=error)
+    return finish(job, Job.DONE, result=result, error='')
+
+
+def execute(job):
+    """run() in a pool worker, which holds its database connections across jobs like a request thread."""
+    close_old_connections()
+    try:
+        return run(job).status
+    finally:
+        close_old_connections()
+
+
+def heartbeat(worker, ids):
+    """Marks the jobs ``ids`` that ``worker`` is running as alive; returns how many it still holds."""
+    return Job.objects.filter(pk__in=ids, status=Job.RUNNING, locked_by=worker).update(heartbeat_at=timezone.now())
+
+
+def requeue_stale():
+    """Requeues running jobs whose worker stopped responding, or fails those out of attempts; returns how many."""
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=now - timedelta(seconds=get_config('STALE_AFTER')))
+    released = {'locked_by': '', 'locked_at': None, 'heartbeat_at': None}
+    changed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, finished_at=now, error="The worker stopped responding.", **released
+    )
+    return changed + stale.update(status=Job.QUEUED, run_after=now, **released)
+
+
+class Worker:
+    """
+    Claims due jobs whenever a slot in its thread or process pool is free.
+    Processes suit CPU-bound handlers; the default threads suit handlers
+    that mostly wait on the database or a parser backend.
+    """
+
+    def __init__(self, concurrency=4, pool='thread', poll_interval=1.0, name=None):
+        if pool not in ('thread', 'process'):
+            raise ValueError(f"Unknown pool: {pool}")
+        self.concurrency = concurrency
+        self.pool = pool
+        self.poll_interval = poll_interval
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.stop_event = threading.Event()
+        self.counts = {status: 0 for status, label in Job.STATUS_CHOICES}
+        self.last_beat = time.monotonic()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def get_executor(self):
+        if self.pool == 'process':
+            # Children are forked on the first submit and must not share the parent's connections.
+            connections.close_all()
+            return ProcessPoolExecutor(self.concurrency, mp_context=multiprocessing.get_context('fork'))
+        return ThreadPoolExecutor(self.concurrency, thread_name_prefix='job')
+
+    def run(self, once=False):
+        """Works until stop() or, with ``once``, until no job is due; returns the outcome counts."""
+        running = {}  # Future: the pk of the job it runs
+        executor = None
+        try:
+            while not self.stop_event.is_set():
+                requeue_stale()
+                free = self.concurrency - len(running)
+                jobs = claim(self.name, free) if free else []
+                if jobs and executor is None:
+                    executor = self.get_executor()
+                for job in jobs:
+                    running[executor.submit(execute, job)] = job.pk
+                if once and not jobs and not running:
+                    break
+                if running and (not free or not jobs):
+                    done = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED).done
+                    self.collect(done, running)
+                elif not jobs:
+                    self.stop_event.wait(self.poll_interval)
+                self.beat(running)
+            while running:
+                done = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED).done
+                self.collect(done, running)
+                self.beat(running)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return self.counts
+
+    def beat(self, running):
+        """Heartbeats the ``running`` jobs, at most every HEARTBEAT seconds."""
+        if running and time.monotonic() - self.last_beat >= get_config('HEARTBEAT'):
+            heartbeat(self.name, list(running.values()))
+            self.last_beat = time.monotonic()
+
+    def collect(self, futures, running):
+        for future in futures:
+            del running[future]
+            try:
+                self.counts[future.result()] += 1
+            except Exception:
+                # The job stays running, without heartbeats, until
+                # requeue_stale() picks it up.
+                logger.exception("A job worker crashed")
+
+
+@register('tasks.quick_add')
+def quick_add(job):
+    """parse_create_task() off the request path: parses ``text`` and creates the owner's task."""
+    from .views import resolve_project_tags
+
+    parsed_data = parse_task_text(job.payload['text'])
+    tag = parsed_data.get('project_tag')
+    if tag:
+        project = resolve_project_tags(job.owner, [parsed_data])[tag]
+        if project is None:
+            raise JobFailed(f"Unknown project: {tag}")
+        parsed_data['project'] = project.pk
+    form = TaskForm(parsed_data)
+    if not form.is_valid():
+        raise JobFailed('; '.join(f"{field}: {error}" for field, errors in form.errors.items() for error in errors))
+    task = form.save(commit=False)
+    task.owner = job.owner
+    task.save()
+    return {'task': str(task.pk), 'title': task.title}
+
+
+@register('tasks.import')
+def import_tasks(job):
+    """
+    TaskImporter over the upload stored at ``path``, which is deleted
+    afterwards; enqueue with max_attempts=1, since batches commit as they go.
+    """
+    path = job.payload['path']
+    importer = TaskImporter(job.owner, create_projects=job.payload.get('create_projects', False))
+    try:
+        with default_storage.open(path, 'rb') as upload:
+            return importer.run(read_rows(upload, job.payload['format']))
+    finally:
+        default_storage.delete(path)
+
+
+@register('tasks.recount')
+def recount_tasks(job):
+    """Rebuilds the job owner's counters, or everyone's for a job without an owner."""
+    return {'counters': recount(job.owner)}
+
+
+@register('tasks.remind')
+def remind(job):
+    """Emails the owner a digest of ``payload['tasks']``, as queued by ``scan_agenda --remind``."""
+    if not job.owner.email:
+        raise JobFailed("The owner has no email address.")
+    tasks = job.payload['tasks']
+    lines = [f"- {task['title']} (due {task['due_date']})" for task in tasks]
+    subject = f"{len(tasks)} task{'s' if len(tasks) != 1 else ''} due soon"
+    send_mail(subject, '\n'.join(lines), None, [job.owner.email])
+    return {'sent_to': job.owner.email, 'tasks': len(tasks)}
@@ -0,0 +1,35 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.tasks.changes import compact, get_config, prune
+
+
+class Command(BaseCommand):
+    help = (
+        "Collapses each object's old entries of the change log into one and deletes those past "
+        "retention; meant to run from cron, e.g. daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--compact-after', type=float, help="Hours before an object's changes are collapsed (TASKS_CHANGES)."
+        )
+        parser.add_argument('--retention', type=float, help="Days before changes are deleted (TASKS_CHANGES).")
+        parser.add_argument('--batch-size', type=int, default=None, help="Changes written or deleted per query.")
+
+    def handle(self, *args, **options):
+        compact_after = options['compact_after']
+        compact_after = get_config('COMPACT_AFTER') if compact_after is None else compact_after * 3600
+        retention = options['retention']
+        retention = get_config('RETENTION') if retention is None else retention * 86400
+        if compact_after < 0 or retention < compact_after:
+            raise CommandError("--compact-after must be at least 0 and --retention at least as long.")
+        now = timezone.now()
+        pruned = prune(now - datetime.timedelta(seconds=retention), options['batch_size'])
+        compacted, owners = compact(now - datetime.timedelta(seconds=compact_after), options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {pruned} changes older than {retention / 86400:g} days; "
+            f"collapsed {compacted} changes of {owners} users older than {compact_after / 3600:g} hours."
+        ))
@@ -0,0 +1,121 @@
+import re
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import prefetch_related_objects
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.tasks.conditional import owner_stamp_queryset
+from apps.tasks.models import Project, Task
+from apps.tasks.pagination import CursorPaginator, encode_cursor
+from apps.tasks.views import TaskListView, ProjectListView, ProjectDetailView
+
+TABLES = '|'.join(re.escape(model._meta.db_table) for model in (Task, Project))
+
+# Plan fragments that mean the database had to read every row of a table.
+SCAN_PATTERNS = {
+    'sqlite': re.compile(rf'\bSCAN "?({TABLES})\b'),
+    'postgresql': re.compile(r'Seq Scan'),
+}
+
+# Plan fragments that mean the result had to be sorted outside an index.
+SORT_PATTERNS = {
+    'sqlite': re.compile(r'USE TEMP B-TREE'),
+    'postgresql': re.compile(r'(^|->\s*)Sort\b', re.MULTILINE),
+}
+
+TASK_FILTERS = [
+    {},
+    {'status': 'todo'},
+    {'priority': 'high'},
+    {'project': str(uuid.UUID(int=0))},
+    {'q': 'report'},
+]
+
+
+class Command(BaseCommand):
+    help = "Runs EXPLAIN on the SQL generated by the task views and fails on full scans or temp-table sorts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, default=0, help="Owner id to scope the queries to.")
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SCAN_PATTERNS:
+            raise CommandError(f"EXPLAIN checks are not supported on {connection.vendor}.")
+
+        user = get_user_model()(pk=options['user'])
+        project = Project(pk=uuid.UUID(int=0), owner=user)
+        failures = []
+
+        for name, sql, params, bounded in self.view_queries(user, project):
+            plan = self.explain(sql, params)
+            patterns = [SCAN_PATTERNS[connection.vendor]]
+            if not bounded:
+                patterns.append(SORT_PATTERNS[connection.vendor])
+            if any(pattern.search(plan) for pattern in patterns):
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"FAIL {name}"))
+                self.stdout.write(plan)
+            else:
+                self.stdout.write(self.style.SUCCESS(f"OK   {name}"))
+
+        if failures:
+            raise CommandError(f"{len(failures)} view queries fall back to a full scan or sort: {', '.join(failures)}")
+
+    def view_queries(self, user, project):
+        """
+        Yields (name, sql, params, bounded) for every query the task views issue.
+        ``bounded`` marks queries whose final sort only sees a capped row count.
+        """
+        yield ('conditional_get.stamp', *owner_stamp_queryset(user).query.sql_with_params(), False)
+
+        for params in TASK_FILTERS:
+            view = self.make_view(TaskListView, user, params)
+            yield (f"task_list{self.describe(params)}", *view.get_queryset().query.sql_with_params(), False)
+
+        cursor = encode_cursor(timezone.now(), uuid.UUID(int=0))
+        for params in TASK_FILTERS:
+            view = self.make_view(TaskListView, user, params)
+            queryset = CursorPaginator(view.get_queryset(), view.paginate_by).get_page_queryset(cursor)
+            yield (f"task_list.cursor{self.describe(params)}", *queryset.query.sql_with_params(), False)
+
+        view = self.make_view(ProjectListView, user, {})
+        yield ('project_list', *view.get_queryset().query.sql_with_params(), False)
+
+        for params in TASK_FILTERS:
+            if 'project' in params:
+                continue
+            view = self.make_view(ProjectListView, user, params)
+            # Prefetch SQL is only built while prefetching, so capture it.
+            with CaptureQueriesContext(connection) as queries:
+                prefetch_related_objects([Project(pk=project.pk)], view.get_tasks_prefetch())
+            yield (f"project_list.tasks{self.describe(params)}", queries[-1]['sql'], None, True)
+
+            view = self.make_view(ProjectDetailView, user, params)
+            queryset = view.get_project_tasks(project)
+            yield (f"project_detail.tasks{self.describe(params)}", *queryset.query.sql_with_params(), False)
+
+    def make_view(self, view_class, user, params):
+        request = RequestFactory().get('/', params)
+        request.user = user
+        view = view_class()
+        view.setup(request)
+        return view
+
+    def describe(self, params):
+        if not params:
+            return ''
+        return '[' + ','.join(f"{key}={value}" for key, value in params.items()) + ']'
+
+    def explain(self, sql, params):
+        with transaction.atomic(), connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Small tables always favour a sequential scan on Postgres, so
+                # ask the planner whether an index path exists at all.
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
@@ -0,0 +1,52 @@
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tasks.transfer import FORMATS, TaskImporter, guess_format, read_rows
+
+
+class Command(BaseCommand):
+    help = "Imports tasks for one user from a CSV or JSONL file, streaming it in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or - for stdin.")
+        parser.add_argument('--user', required=True, help="Email or id of the owner.")
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to the file extension, then csv.")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--create-projects', action='store_true', help="Create projects that do not exist yet.")
+        parser.add_argument('--report', help="Write the per-row error report to this JSON file.")
+
+    def handle(self, *args, **options):
+        owner = self.get_owner(options['user'])
+        fmt = options['format'] or guess_format(options['path'])
+        importer = TaskImporter(
+            owner, batch_size=options['batch_size'], create_projects=options['create_projects']
+        )
+
+        if options['path'] == '-':
+            report = importer.run(read_rows(sys.stdin.buffer, fmt))
+        else:
+            try:
+                with open(options['path'], 'rb') as stream:
+                    report = importer.run(read_rows(stream, fmt))
+            except OSError as exc:
+                raise CommandError(str(exc))
+
+        if options['report']:
+            with open(options['report'], 'w') as report_file:
+                json.dump(report, report_file, indent=2)
+        for error in report['errors']:
+            self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} tasks, {report['error_count']} rows rejected."
+        ))
+
+    def get_owner(self, value):
+        User = get_user_model()
+        lookup = {'pk': value} if value.isdigit() else {'email': value}
+        try:
+            return User.objects.get(**lookup)
+        except User.DoesNotExist:
+            raise CommandError(f"User {value} does not exist.")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.tasks.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search index over task titles and descriptions."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        with transaction.atomic():
+            count = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} tasks with {type(backend).__name__}."))
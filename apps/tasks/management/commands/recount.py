@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tasks.counters import recount
+from apps.tasks.jobs import enqueue
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the per-owner task counters from the Task table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help="Only recount the tasks of this user id.")
+        parser.add_argument('--defer', action='store_true', help="Queue the recount for the run_jobs worker.")
+
+    def handle(self, *args, **options):
+        owner = None
+        if options['user'] is not None:
+            try:
+                owner = get_user_model().objects.get(pk=options['user'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist.")
+        if options['defer']:
+            job = enqueue('tasks.recount', owner=owner)
+            self.stdout.write(self.style.SUCCESS(f"Queued job {job.pk}."))
+            return
+        rows = recount(owner)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} task counters."))
@@ -0,0 +1,31 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from apps.tasks.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = "Runs queued background jobs (see apps/tasks/jobs.py) until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help="Jobs run at once.")
+        parser.add_argument('--pool', choices=('thread', 'process'), default='thread')
+        parser.add_argument('--poll', type=float, default=1.0, help="Seconds between polls when idle.")
+        parser.add_argument('--once', action='store_true', help="Exit once no job is due.")
+
+    def handle(self, *args, **options):
+        worker = Worker(options['concurrency'], options['pool'], options['poll'])
+
+        def stop(signum, frame):
+            # Finish the running jobs before exiting; a second signal kills.
+            worker.stop()
+            signal.signal(signum, signal.SIG_DFL)
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+        if not options['once']:
+            self.stdout.write(f"Worker {worker.name} running {options['concurrency']} jobs at once in a {options['pool']} pool.")
+        counts = worker.run(once=options['once'])
+        summary = ', '.join(f'{count} {status}' for status, count in counts.items() if count) or "no jobs"
+        self.stdout.write(self.style.SUCCESS(f"Ran {summary}."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.tasks.parser_stub import StubModelServer
+
+
+class Command(BaseCommand):
+    help = "Serves the rule-based parser over HTTP as a stand-in model server for LLMBackend."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--delay', type=float, default=0, help="Seconds to wait before each answer.")
+
+    def handle(self, *args, **options):
+        server = StubModelServer((options['host'], options['port']), delay=options['delay'])
+        self.stdout.write(f"Stub model server listening on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
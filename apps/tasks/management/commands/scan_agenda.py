@@ -0,0 +1,45 @@
+import datetime
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.tasks.agenda import scan
+from apps.tasks.jobs import enqueue
+
+
+class Command(BaseCommand):
+    help = (
+        "Finds every user's open tasks due in a date window and optionally queues a reminder "
+        "for each of them; meant to run from cron, e.g. daily with --remind."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=1, help="Days ahead of today to include; 1 is today only.")
+        parser.add_argument('--overdue', type=int, default=0, help="Days before today to include.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Tasks loaded per query.")
+        parser.add_argument('--remind', action='store_true', help="Queue a tasks.remind job per user.")
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['overdue'] < 0:
+            raise CommandError("--days must be at least 1 and --overdue at least 0.")
+        today = timezone.localdate()
+        start = today - datetime.timedelta(days=options['overdue'])
+        end = today + datetime.timedelta(days=options['days'] - 1)
+        User = get_user_model()
+        owners = tasks = 0
+        started = time.perf_counter()
+        for owner_id, rows in scan(start, end, options['batch_size'], fields=('id', 'title', 'due_date')):
+            owners += 1
+            tasks += len(rows)
+            if options['remind']:
+                payload = {'tasks': [{'id': row['id'], 'title': row['title'], 'due_date': row['due_date']} for row in rows]}
+                with transaction.atomic():
+                    enqueue('tasks.remind', payload, owner=User(pk=owner_id))
+        elapsed = time.perf_counter() - started
+        queued = f"; queued {owners} reminders" if options['remind'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"Found {tasks} open tasks of {owners} users due {start} to {end} in {elapsed:.2f}s{queued}."
+        ))
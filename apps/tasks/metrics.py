@@ -0,0 +1,157 @@
+"""
+In-process request metrics, rendered in the Prometheus text format.
+
+``InstrumentationMiddleware`` feeds one ``ViewStats`` per resolved URL name:
+cumulative histograms for Prometheus plus a rolling window of recent wall
+times for quick percentiles. Every worker process keeps its own registry,
+so scrape each process separately.
+"""
+import bisect
+import threading
+import time
+from collections import deque
+
+from .cache_backends import metrics as cache_metrics
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Histogram:
+    """Cumulative bucket counts, plus the samples of the last ``window`` seconds."""
+
+    def __init__(self, buckets=TIME_BUCKETS, window=300, max_samples=1000):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0
+        self.window = window
+        self.recent = deque(maxlen=max_samples)
+
+    def observe(self, value, now=None):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append((time.monotonic() if now is None else now, value))
+
+    def cumulative(self):
+        """Yields ``(upper_bound, count)`` pairs ending with ``+Inf``."""
+        total = 0
+        for bound, count in zip((*self.buckets, float('inf')), self.bucket_counts):
+            total += count
+            yield bound, total
+
+    def quantiles(self, quantiles=QUANTILES, now=None):
+        """Nearest-rank quantiles over the rolling window, or {} if it is empty."""
+        cutoff = (time.monotonic() if now is None else now) - self.window
+        values = sorted(value for timestamp, value in self.recent if timestamp >= cutoff)
+        if not values:
+            return {}
+        return {q: values[min(len(values) - 1, int(q * len(values)))] for q in quantiles}
+
+
+class ViewStats:
+    def __init__(self):
+        self.responses = {}
+        self.wall = Histogram()
+        self.sampled = 0
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_time = Histogram()
+        self.template_time = Histogram()
+        self.n_plus_one = 0
+        self.slowest_sql = ('', 0.0)
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+    def observe(self, view, status, wall, profile=None):
+        """Records one response; ``profile`` is the QueryProfile of a sampled request."""
+        with self.lock:
+            stats = self.views.setdefault(view, ViewStats())
+            stats.responses[status] = stats.responses.get(status, 0) + 1
+            stats.wall.observe(wall)
+            if profile is None:
+                return
+            stats.sampled += 1
+            stats.queries.observe(profile.count)
+            stats.db_time.observe(profile.time)
+            stats.template_time.observe(profile.template_time)
+            stats.n_plus_one += len(profile.repeated_shapes())
+            if profile.slowest[1] > stats.slowest_sql[1]:
+                stats.slowest_sql = profile.slowest
+
+    def get(self, view):
+        with self.lock:
+            return self.views.get(view)
+
+    def render(self):
+        """Returns every metric in the Prometheus text exposition format."""
+        with self.lock:
+            views = sorted(self.views.items())
+            lines = []
+            family(lines, 'tasks_requests_total', 'counter', "Responses by view and status code.")
+            for view, stats in views:
+                for status, count in sorted(stats.responses.items()):
+                    lines.append(f'tasks_requests_total{labels(view=view, status=status)} {count}')
+            histograms = [
+                ('tasks_request_duration_seconds', "Wall time per request.", 'wall'),
+                ('tasks_db_queries', "Database queries per sampled request.", 'queries'),
+                ('tasks_db_duration_seconds', "Database time per sampled request.", 'db_time'),
+                ('tasks_template_render_seconds', "Template render time per sampled request.", 'template_time'),
+            ]
+            for name, help_text, attribute in histograms:
+                family(lines, name, 'histogram', help_text)
+                for view, stats in views:
+                    histogram(lines, name, view, getattr(stats, attribute))
+            family(lines, 'tasks_request_duration_recent_seconds', 'summary', "Wall time over the rolling window.")
+            for view, stats in views:
+                for quantile, value in stats.wall.quantiles().items():
+                    lines.append(
+                        f'tasks_request_duration_recent_seconds{labels(view=view, quantile=quantile)} {value:.6f}'
+                    )
+            family(lines, 'tasks_n_plus_one_total', 'counter', "Sampled requests' repeated SQL shapes.")
+            for view, stats in views:
+                lines.append(f'tasks_n_plus_one_total{labels(view=view)} {stats.n_plus_one}')
+            family(lines, 'tasks_slowest_query_seconds', 'gauge', "Slowest sampled SQL statement per view.")
+            for view, stats in views:
+                sql, seconds = stats.slowest_sql
+                if sql:
+                    lines.append(f'tasks_slowest_query_seconds{labels(view=view, sql=sql[:200])} {seconds:.6f}')
+        family(lines, 'tasks_cache_events_total', 'counter', "Owner cache hits, misses and evictions.")
+        for event, namespaces in sorted(cache_metrics.snapshot().items()):
+            # Backend events such as evictions have no namespace of their own.
+            namespaces[''] = namespaces.pop('all') - sum(namespaces.values())
+            for namespace, count in sorted(namespaces.items()):
+                if count:
+                    lines.append(f'tasks_cache_events_total{labels(event=event, namespace=namespace)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def family(lines, name, kind, help_text):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {kind}')
+
+
+def histogram(lines, name, view, histogram):
+    for bound, count in histogram.cumulative():
+        le = '+Inf' if bound == float('inf') else f'{bound:g}'
+        lines.append(f'{name}_bucket{labels(view=view, le=le)} {count}')
+    lines.append(f'{name}_sum{labels(view=view)} {histogram.sum:.6f}')
+    lines.append(f'{name}_count{labels(view=view)} {histogram.count}')
+
+
+def labels(**values):
+    def escape(value):
+        return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in values.items()) + '}'
+
+
+registry = Registry()
@@ -0,0 +1,147 @@
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+IN_LIST_RE = re.compile(r'\bIN \((?:%s, )*%s\)')
+SPACES_RE = re.compile(r'\s+')
+
+
+def sql_shape(sql):
+    """The statement with IN lists folded, so queries differing only in their parameters compare equal."""
+    return SPACES_RE.sub(' ', IN_LIST_RE.sub('IN (...)', sql)).strip()
+
+
+class QueryProfile:
+    """Database execute wrapper that times every statement of one request."""
+
+    def __init__(self, n_plus_one_threshold=5):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.count = 0
+        self.time = 0.0
+        self.template_time = 0.0
+        self.slowest = ('', 0.0)
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.time += elapsed
+            if elapsed > self.slowest[1]:
+                self.slowest = (sql, elapsed)
+            # Repeated writes are usually batches; N+1 is about reads.
+            if sql.lstrip()[:6].upper() == 'SELECT':
+                self.shapes[sql_shape(sql)] += 1
+
+    def repeated_shapes(self):
+        return [(shape, count) for shape, count in self.shapes.items() if count >= self.n_plus_one_threshold]
+
+
+class InstrumentationMiddleware:
+    """
+    Records wall time and status for every request under its URL name. A
+    ``SAMPLE_RATE`` share of requests is also profiled: query count and
+    time, template render time, the slowest SQL, and a warning for any SQL
+    shape repeated ``N_PLUS_ONE_THRESHOLD`` times. Configured through
+    ``settings.TASKS_METRICS``; put it first in ``MIDDLEWARE``.
+
+    Streaming responses are timed until the response object is returned,
+    not until the last chunk is sent.
+
+    Under ASGI it stays async, so it does not force async views back into
+    a thread. Database connections belong to the thread that runs the
+    queries, so for a sampled async request the wrapper is installed from
+    ``sync_to_async``, which runs in the request's thread-sensitive
+    thread, as the async ORM does.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = getattr(settings, 'TASKS_METRICS', {})
+        self.sample_rate = config.get('SAMPLE_RATE', 0.1)
+        self.n_plus_one_threshold = config.get('N_PLUS_ONE_THRESHOLD', 5)
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        profile = self.start_profile(request)
+        if profile is not None:
+            with self.install(profile):
+                response = self.get_response(request)
+        else:
+            response = self.get_response(request)
+        return self.finish(request, response, start, profile)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        profile = self.start_profile(request)
+        if profile is not None:
+            stack = await sync_to_async(self.install)(profile)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        else:
+            response = await self.get_response(request)
+        return self.finish(request, response, start, profile)
+
+    def start_profile(self, request):
+        if self.sample_rate and random.random() < self.sample_rate:
+            request.tasks_profile = QueryProfile(self.n_plus_one_threshold)
+            return request.tasks_profile
+        return None
+
+    def install(self, profile):
+        """Wraps every database connection of the current thread; close the returned stack to unwrap."""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(profile))
+        return stack
+
+    def finish(self, request, response, start, profile):
+        view = self.view_name(request)
+        registry.observe(view, response.status_code, time.perf_counter() - start, profile)
+        if profile is not None:
+            for shape, count in profile.repeated_shapes():
+                logger.warning("Possible N+1 in %s: %d queries shaped %s", view, count, shape)
+        return response
+
+    def process_template_response(self, request, response):
+        profile = getattr(request, 'tasks_profile', None)
+        if profile is not None:
+            render = response.render
+
+            def timed_render():
+                start = time.perf_counter()
+                try:
+                    return render()
+                finally:
+                    profile.template_time += time.perf_counter() - start
+
+            response.render = timed_render
+        return response
+
+    def view_name(self, request):
+        match = getattr(request, 'resolver_match', None)
+        return match.view_name if match else '<unresolved>'
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE tasks_task_fts USING fts5(title, description, tokenize='unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO tasks_task_fts (rowid, title, description) "
+            "SELECT rowid, title, COALESCE(description, '') FROM tasks_task"
+        )
+    elif schema_editor.connection.vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+
+        Task = apps.get_model('tasks', 'Task')
+        schema_editor.add_index(Task, GinIndex(
+            SearchVector('title', 'description', config='english'), name='task_search_idx'
+        ))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE tasks_task_fts')
+    elif schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS task_search_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_task_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_owner_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_owner_status_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_owner_priority_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_owner_project_idx',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', '-created_at', '-id'], name='task_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'status', '-created_at', '-id'], name='task_owner_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'priority', '-created_at', '-id'], name='task_owner_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'project', '-created_at', '-id'], name='task_owner_project_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('todo', 'To Do'), ('in_progress', 'In Progress'), ('done', 'Done')], max_length=15)),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], max_length=10)),
+                ('count', models.IntegerField(default=0)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_counters', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='task_counters', to='tasks.project')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('project__isnull', False)), fields=('owner', 'project', 'status', 'priority'), name='task_counter_project_key'), models.UniqueConstraint(condition=models.Q(('project__isnull', True)), fields=('owner', 'status', 'priority'), name='task_counter_no_project_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:36
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def start_heartbeats(apps, schema_editor):
+    # Jobs running across the upgrade count as last seen when claimed.
+    Job = apps.get_model('tasks', 'Job')
+    Job.objects.filter(status='running').update(heartbeat_at=F('locked_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_task_graph'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='job',
+            name='job_running_idx',
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(start_heartbeats, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'running')), fields=['heartbeat_at'], name='job_heartbeat_idx'),
+        ),
+    ]
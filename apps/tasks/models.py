@@ -1,5 +1,6 @@
 import uuid
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
 from django.conf import settings
 
 
@@ -31,11 +32,21 @@ class Project(models.Model):
 
     class Meta:
         ordering = ['title']
+        indexes = [
+            models.Index(fields=['owner', 'title'], name='project_owner_title_idx'),
+            # Delta sync's keyset over what changed (see sync.py).
+            models.Index(fields=['owner', 'updated_at', 'id'], name='project_owner_updated_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
 
+# Tasks that can still be overdue: the rows of the partial due-date indexes.
+# Queries must repeat this condition to use them.
+OPEN_WITH_DUE_DATE = models.Q(due_date__isnull=False) & ~models.Q(status='done')
+
+
 class Task(models.Model):
     """Represents a single task within a project or standalone."""
 
@@ -64,6 +75,14 @@ class Task(models.Model):
         blank=True,
         related_name='tasks'
     )
+    # Deleting a task deletes its subtasks. graph.py keeps the tree acyclic.
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='subtasks'
+    )
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True, null=True)
     due_date = models.DateField(null=True, blank=True)
@@ -82,6 +101,195 @@ class Task(models.Model):
 
     class Meta:
         ordering = ['due_date', 'priority']
+        # Every task view is owner-scoped and sorted newest first, optionally
+        # narrowed by one of status, priority or project. The trailing id
+        # makes the order total, which keyset pagination relies on.
+        indexes = [
+            models.Index(fields=['owner', '-created_at', '-id'], name='task_owner_created_idx'),
+            models.Index(fields=['owner', 'status', '-created_at', '-id'], name='task_owner_status_idx'),
+            models.Index(fields=['owner', 'priority', '-created_at', '-id'], name='task_owner_priority_idx'),
+            models.Index(fields=['owner', 'project', '-created_at', '-id'], name='task_owner_project_idx'),
+            # Covers the owner's MAX(updated_at) and COUNT(*) used for ETags,
+            # and delta sync's keyset over what changed (see sync.py).
+            models.Index(fields=['owner', 'updated_at', 'id'], name='task_owner_updated_idx'),
+            # Open tasks with a due date, by date across owners for the
+            # agenda scanner and per owner for the agenda and overdue counts.
+            # Done and undated tasks, usually the bulk, are left out.
+            models.Index(fields=['due_date', 'owner'], condition=OPEN_WITH_DUE_DATE, name='task_open_due_idx'),
+            models.Index(fields=['owner', 'due_date'], condition=OPEN_WITH_DUE_DATE, name='task_owner_open_due_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    def save(self, *args, **kwargs):
+        # Keeps the row and the post_save bookkeeping (counters, search
+        # index) in one transaction.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+class TaskDependency(models.Model):
+    """
+    An edge of the blocker graph: ``blocker`` must be done before
+    ``blocked``. Add and remove them with graph.py, which keeps the graph
+    acyclic and within one owner.
+    """
+
+    blocker = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='blocking', db_index=False)
+    blocked = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='blocked_by', db_index=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # The unique constraint walks the graph forwards, the index
+        # backwards; both also cover their leading foreign key.
+        constraints = [
+            models.UniqueConstraint(fields=['blocker', 'blocked'], name='task_dependency_unique'),
+            models.CheckConstraint(condition=~models.Q(blocker=models.F('blocked')), name='task_dependency_not_self'),
+        ]
+        indexes = [
+            models.Index(fields=['blocked', 'blocker'], name='task_dependency_blocked_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.blocker} blocks {self.blocked}'
+
+
+class TaskCounter(models.Model):
+    """Denormalized number of tasks per owner, project, status and priority."""
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='task_counters'
+    )
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='task_counters'
+    )
+    status = models.CharField(max_length=15, choices=Task.STATUS_CHOICES)
+    priority = models.CharField(max_length=10, choices=Task.PRIORITY_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        # NULL never equals NULL in a unique index, so tasks without a
+        # project need their own constraint.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['owner', 'project', 'status', 'priority'],
+                condition=models.Q(project__isnull=False),
+                name='task_counter_project_key',
+            ),
+            models.UniqueConstraint(
+                fields=['owner', 'status', 'priority'],
+                condition=models.Q(project__isnull=True),
+                name='task_counter_no_project_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.owner_id}/{self.project_id}/{self.status}/{self.priority}: {self.count}"
+
+
+class Job(models.Model):
+    """A unit of deferred work, run by the ``run_jobs`` worker (see ``jobs.py``)."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='jobs'
+    )
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    priority = models.SmallIntegerField(default=0)  # Higher runs first
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField()
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed by the worker while the job runs; see jobs.requeue_stale().
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The worker's poll: due queued jobs, highest priority first. Only
+            # queued rows are indexed, so finished jobs do not slow it down.
+            models.Index(
+                fields=['-priority', 'run_after'], condition=models.Q(status='queued'), name='job_queue_idx'
+            ),
+            # Jobs whose worker may have died, found by their last heartbeat.
+            models.Index(fields=['heartbeat_at'], condition=models.Q(status='running'), name='job_heartbeat_idx'),
+            models.Index(fields=['owner', '-created_at'], name='job_owner_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class Change(models.Model):
+    """One write to a Task or Project, as streamed to clients by ``changes.py``."""
+
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    RESET = 'reset'
+    ACTION_CHOICES = [
+        (CREATED, 'Created'),
+        (UPDATED, 'Updated'),
+        (DELETED, 'Deleted'),
+        (RESET, 'Reset'),  # The owner's rows changed in ways not logged; clients reload
+    ]
+    MODEL_CHOICES = [
+        ('task', 'Task'),
+        ('project', 'Project'),
+    ]
+
+    # The stream's event id: increasing, so clients resume after the last one they saw.
+    id = models.BigAutoField(primary_key=True)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='changes'
+    )
+    model = models.CharField(max_length=10, choices=MODEL_CHOICES, blank=True)
+    object_id = models.UUIDField(null=True, blank=True)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # The fields written: all of them when created, those changed when
+    # updated, none when deleted.
+    data = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # The stream's read: an owner's changes after the last event id.
+            models.Index(fields=['owner', 'id'], name='change_owner_idx'),
+            # Retention and compaction cut-offs.
+            models.Index(fields=['created_at'], name='change_created_idx'),
+        ]
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f"{self.action} {self.model} {self.object_id}"
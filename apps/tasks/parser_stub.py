@@ -0,0 +1,55 @@
+"""
+A local stand-in for the model server behind ``LLMBackend``. It answers with
+the rule-based parser, optionally after a delay, and records every batch it
+receives. Used by the tests, and by ``run_parser_stub`` for trying the LLM
+backend without a model.
+"""
+import datetime
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .ai_parser import DEFAULT_PARSER
+
+
+class StubModelHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.batches.append(payload['texts'])
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        today = datetime.date.fromisoformat(payload['today'])
+        results = [self.server.transform(DEFAULT_PARSER.parse(text, today)) for text in payload['texts']]
+        body = json.dumps({'results': results}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubModelServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), delay=0, transform=None):
+        super().__init__(address, StubModelHandler)
+        self.delay = delay
+        self.transform = transform or (lambda result: result)
+        self.batches = []
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/parse'
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
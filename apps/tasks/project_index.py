@@ -0,0 +1,45 @@
+"""
+Per-user cached list of project ids and titles, shared by the sidebar in
+``base.html`` and the project filter on the task list. It is read through
+``cache.py`` under a generation of its own, which only the Project signals
+bump, so task writes leave it cached.
+"""
+import uuid
+from typing import NamedTuple
+
+from .cache import aread_through, invalidate, read_through
+from .models import Project
+
+SCOPE = 'projects'
+
+
+class ProjectEntry(NamedTuple):
+    id: uuid.UUID
+    title: str
+
+    @property
+    def pk(self):
+        return self.id
+
+
+def project_rows(owner):
+    return Project.objects.filter(owner=owner).order_by('title', 'id').values_list('id', 'title')
+
+
+def get_project_index(owner):
+    """The owner's projects as ``ProjectEntry`` tuples, ordered by title."""
+    def load():
+        return [ProjectEntry(*row) for row in project_rows(owner)]
+
+    return read_through(owner, 'project_index', load, scope=SCOPE)
+
+
+async def aget_project_index(owner):
+    async def load():
+        return [ProjectEntry(*row) async for row in project_rows(owner)]
+
+    return await aread_through(owner, 'project_index', load, scope=SCOPE)
+
+
+def invalidate_project_index(owner_id):
+    invalidate(owner_id, SCOPE)
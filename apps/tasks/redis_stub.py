@@ -0,0 +1,140 @@
+"""
+An in-process stand-in for a Redis server, implementing just the commands
+``cache_backends.RedisCache`` sends. Used by the tests, and handy for trying
+the Redis cache backend locally without installing Redis.
+"""
+import socketserver
+import threading
+import time
+
+
+class StubRedisHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                command = self.read_command()
+            except (ConnectionError, ValueError):
+                return
+            if command is None:
+                return
+            name, *args = command
+            handler = getattr(self.server, 'cmd_' + name.decode().lower(), None)
+            if handler is None:
+                reply = ValueError(f"ERR unknown command '{name.decode()}'")
+            else:
+                with self.server.lock:
+                    self.server.commands += 1
+                    try:
+                        reply = handler(*args)
+                    except ValueError as exc:
+                        reply = exc
+            self.wfile.write(self.encode(reply))
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            raise ValueError("Only array commands are supported.")
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def encode(self, reply):
+        if reply is None:
+            return b'$-1\r\n'
+        if isinstance(reply, Exception):
+            return b'-%s\r\n' % str(reply).encode()
+        if isinstance(reply, str):
+            return b'+%s\r\n' % reply.encode()
+        if isinstance(reply, int):
+            return b':%d\r\n' % reply
+        if isinstance(reply, list):
+            return b'*%d\r\n' % len(reply) + b''.join(self.encode(item) for item in reply)
+        return b'$%d\r\n%s\r\n' % (len(reply), reply)
+
+
+class StubRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=('127.0.0.1', 0)):
+        super().__init__(address, StubRedisHandler)
+        self.lock = threading.Lock()
+        self.data = {}
+        self.expires = {}
+        self.commands = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'redis://{host}:{port}/0'
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def live(self, key):
+        if key in self.expires and self.expires[key] <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def cmd_select(self, db):
+        return 'OK'
+
+    def cmd_get(self, key):
+        return self.data[key] if self.live(key) else None
+
+    def cmd_mget(self, *keys):
+        return [self.cmd_get(key) for key in keys]
+
+    def cmd_set(self, key, value, *options):
+        options = [option.upper() for option in options]
+        if b'NX' in options and self.live(key):
+            return None
+        self.data[key] = value
+        self.expires.pop(key, None)
+        if b'PX' in options:
+            self.expires[key] = time.monotonic() + int(options[options.index(b'PX') + 1]) / 1000
+        return 'OK'
+
+    def cmd_del(self, *keys):
+        deleted = 0
+        for key in keys:
+            if self.live(key):
+                del self.data[key]
+                self.expires.pop(key, None)
+                deleted += 1
+        return deleted
+
+    def cmd_exists(self, *keys):
+        return sum(1 for key in keys if self.live(key))
+
+    def cmd_incrby(self, key, delta):
+        try:
+            value = int(self.data[key]) if self.live(key) else 0
+        except ValueError:
+            raise ValueError("ERR value is not an integer or out of range")
+        self.data[key] = str(value + int(delta)).encode()
+        return value + int(delta)
+
+    def cmd_pexpire(self, key, milliseconds):
+        if not self.live(key):
+            return 0
+        self.expires[key] = time.monotonic() + int(milliseconds) / 1000
+        return 1
+
+    def cmd_persist(self, key):
+        return 1 if self.live(key) and self.expires.pop(key, None) is not None else 0
+
+    def cmd_flushdb(self):
+        self.data.clear()
+        self.expires.clear()
+        return 'OK'
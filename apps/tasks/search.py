@@ -0,0 +1,205 @@
+"""
+Full-text search over task titles and descriptions.
+
+Each backend narrows a Task queryset to the rows matching a free-text query
+and can annotate a ``search_rank`` (higher is more relevant). Every term is
+matched as a prefix, so "rep" finds "report". The backend is picked from
+``settings.TASKS_SEARCH_BACKEND`` or, by default, from the database vendor.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+TERM_RE = re.compile(r'\w+')
+
+
+def search_terms(query):
+    return TERM_RE.findall(query.lower())
+
+
+class SearchBackend:
+    """Interface shared by the search backends."""
+
+    def search(self, queryset, query, ranked=False):
+        """Filters ``queryset`` to tasks matching ``query``, best match first if ``ranked``."""
+        raise NotImplementedError
+
+    def index_task(self, task):
+        """Adds or refreshes ``task`` in the index."""
+
+    def index_tasks(self, tasks):
+        """Adds or refreshes many tasks, e.g. after a bulk_create."""
+        for task in tasks:
+            self.index_task(task)
+
+    def remove_task(self, task):
+        """Drops ``task`` from the index."""
+
+    def delete_tasks(self, queryset):
+        """
+        Deletes every task in ``queryset`` with one DELETE, dropping them
+        from the index, and returns how many were deleted. Nothing is
+        collected or cascaded: ``queryset`` must hold the tasks' subtasks
+        and have their blocker edges deleted, as ``bulk.delete_tasks`` does.
+        """
+        for task in queryset.only('pk'):
+            self.remove_task(task)
+        return queryset._raw_delete(queryset.db)
+
+    def rebuild(self):
+        """Re-indexes every task and returns the number of rows indexed."""
+        return Task.objects.count()
+
+
+class ContainsSearchBackend(SearchBackend):
+    """Unindexed fallback for databases without a full-text engine."""
+
+    def search(self, queryset, query, ranked=False):
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+        for term in terms:
+            queryset = queryset.filter(Q(title__icontains=term) | Q(description__icontains=term))
+        return queryset
+
+    def delete_tasks(self, queryset):
+        # There is no index to remove them from.
+        return queryset._raw_delete(queryset.db)
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """
+    FTS5 index in ``tasks_task_fts`` whose rowid mirrors ``tasks_task.rowid``.
+    Kept in sync by the Task signals; run ``rebuild_search_index`` after any
+    migration that rebuilds the tasks_task table, since that renumbers rowids.
+    """
+
+    table = 'tasks_task_fts'
+
+    def match_expression(self, query):
+        return ' '.join(f'"{term}"*' for term in search_terms(query))
+
+    def search(self, queryset, query, ranked=False):
+        expression = self.match_expression(query)
+        if not expression:
+            return queryset.none()
+        queryset = queryset.filter(pk__in=RawSQL(
+            f'SELECT id FROM tasks_task WHERE rowid IN '
+            f'(SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s)',
+            [expression],
+        ))
+        if ranked:
+            # FTS5's rank is bm25(), where more negative means more relevant.
+            queryset = queryset.annotate(search_rank=RawSQL(
+                f'SELECT -rank FROM {self.table} WHERE {self.table} MATCH %s AND rowid = "tasks_task".rowid',
+                [expression],
+                output_field=FloatField(),
+            )).order_by('-search_rank')
+        return queryset
+
+    def index_task(self, task):
+        pk = Task._meta.pk.get_db_prep_value(task.pk, connection)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = (SELECT rowid FROM tasks_task WHERE id = %s)', [pk]
+            )
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, description) '
+                f"SELECT rowid, title, COALESCE(description, '') FROM tasks_task WHERE id = %s", [pk]
+            )
+
+    def index_tasks(self, tasks):
+        pks = [Task._meta.pk.get_db_prep_value(task.pk, connection) for task in tasks]
+        # Stay well below SQLite's bound-parameter limit.
+        for start in range(0, len(pks), 500):
+            chunk = pks[start:start + 500]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {self.table} WHERE rowid IN '
+                    f'(SELECT rowid FROM tasks_task WHERE id IN ({placeholders}))', chunk
+                )
+                cursor.execute(
+                    f'INSERT INTO {self.table} (rowid, title, description) '
+                    f"SELECT rowid, title, COALESCE(description, '') FROM tasks_task WHERE id IN ({placeholders})",
+                    chunk,
+                )
+
+    def remove_task(self, task):
+        pk = Task._meta.pk.get_db_prep_value(task.pk, connection)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = (SELECT rowid FROM tasks_task WHERE id = %s)', [pk]
+            )
+
+    def delete_tasks(self, queryset):
+        # A search filter in ``queryset`` reads this index, so the index rows
+        # go after the tasks, found by the rowids read before.
+        sql, params = queryset.values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT rowid FROM tasks_task WHERE id IN ({sql})', params)
+            rowids = [row[0] for row in cursor.fetchall()]
+            deleted = queryset._raw_delete(queryset.db)
+            for start in range(0, len(rowids), 500):
+                chunk = rowids[start:start + 500]
+                cursor.execute(f"DELETE FROM {self.table} WHERE rowid IN ({', '.join(['%s'] * len(chunk))})", chunk)
+        return deleted
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, description) '
+                f"SELECT rowid, title, COALESCE(description, '') FROM tasks_task"
+            )
+            count = cursor.rowcount
+            cursor.execute(f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')")
+        return count
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    ``tsvector`` search backed by the ``task_search_idx`` GIN expression index.
+    The index is maintained by Postgres itself, so there is nothing to sync.
+    """
+
+    config = 'english'
+
+    def search(self, queryset, query, ranked=False):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+        # Must match the expression the GIN index was built on.
+        vector = SearchVector('title', 'description', config=self.config)
+        search_query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms), search_type='raw', config=self.config
+        )
+        queryset = queryset.annotate(search_vector=vector).filter(search_vector=search_query)
+        if ranked:
+            queryset = queryset.annotate(search_rank=SearchRank(vector, search_query)).order_by('-search_rank')
+        return queryset
+
+    def delete_tasks(self, queryset):
+        # The GIN index drops the rows with them.
+        return queryset._raw_delete(queryset.db)
+
+
+BACKENDS = {
+    'sqlite': 'apps.tasks.search.SQLiteFTSBackend',
+    'postgresql': 'apps.tasks.search.PostgresSearchBackend',
+}
+
+
+def get_search_backend():
+    path = getattr(settings, 'TASKS_SEARCH_BACKEND', None)
+    if path is None:
+        path = BACKENDS.get(connection.vendor, 'apps.tasks.search.ContainsSearchBackend')
+    return import_string(path)()
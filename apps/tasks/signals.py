@@ -0,0 +1,125 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import cache, changes, counters, graph
+from .models import Change, Project, Task
+from .project_index import invalidate_project_index
+from .search import get_search_backend
+
+
+@receiver(pre_save, sender=Task)
+def remember_counter_key(sender, instance, raw=False, **kwargs):
+    instance._previous_counter_key = instance._previous_parent_id = None
+    if not raw and not instance._state.adding:
+        previous = Task.objects.filter(pk=instance.pk).values_list('owner', 'project', 'status', 'priority', 'parent')
+        previous = previous.first()
+        if previous:
+            instance._previous_counter_key, instance._previous_parent_id = previous[:4], previous[4]
+
+
+@receiver(pre_save, sender=Task)
+def check_parent(sender, instance, raw=False, **kwargs):
+    # After remember_counter_key, which reads the parent the row had.
+    if not raw and instance.parent_id and instance.parent_id != instance._previous_parent_id:
+        graph.check_parent(instance)
+
+
+@receiver(post_save, sender=Task)
+def update_counters(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_counter_key', None)
+    if created or previous is None:
+        counters.adjust(counters.counter_key(instance), 1)
+    else:
+        counters.move(previous, counters.counter_key(instance))
+
+
+@receiver(post_delete, sender=Task)
+def release_counters(sender, instance, **kwargs):
+    counters.adjust(counters.counter_key(instance), -1)
+
+
+@receiver(pre_delete, sender=Project)
+def release_project_counters(sender, instance, origin=None, **kwargs):
+    # Only when the project itself is deleted; when its owner goes, the
+    # counters go with them.
+    if isinstance(origin, Project) or getattr(origin, 'model', None) is Project:
+        counters.release_project(instance)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_owner_cache(sender, instance, **kwargs):
+    cache.invalidate(instance.owner_id)
+    previous = getattr(instance, '_previous_counter_key', None)
+    if previous and previous[0] != instance.owner_id:
+        cache.invalidate(previous[0])
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_project_index_cache(sender, instance, **kwargs):
+    invalidate_project_index(instance.owner_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reset_owner_cache(sender, instance, created, raw=False, **kwargs):
+    # SQLite can hand a deleted user's id to a new user; never let the new
+    # account read entries cached for the old one.
+    if created and not raw:
+        cache.invalidate(instance.pk)
+        invalidate_project_index(instance.pk)
+
+
+@receiver(post_save, sender=Task)
+def index_task(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_search_backend().index_task(instance)
+
+
+@receiver(pre_delete, sender=Task)
+def unindex_task(sender, instance, **kwargs):
+    # pre_delete: the SQLite index is keyed by the row that is about to go.
+    get_search_backend().remove_task(instance)
+
+
+def deleted_for_itself(origin):
+    """Whether a delete started from a Task or Project, rather than from their owner."""
+    return isinstance(origin, (Task, Project)) or getattr(origin, 'model', None) in (Task, Project)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Project)
+def log_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_counter_key', None)
+    if previous and previous[0] != instance.owner_id:
+        # Moved to another owner: gone for the old one, new to the other.
+        changes.record(instance, Change.DELETED, owner_id=previous[0])
+        created = True
+    changes.record(instance, Change.CREATED if created else Change.UPDATED)
+
+
+@receiver(pre_delete, sender=Project)
+def release_project_tasks(sender, instance, origin=None, **kwargs):
+    # SET_NULL clears the project of its tasks with one UPDATE and no
+    # signals or updated_at, which delta sync and the ETags go by.
+    if deleted_for_itself(origin):
+        tasks = instance.tasks.order_by()
+        now = timezone.now()
+        changes.record_rows(tasks.values_list('pk', 'owner'), Change.UPDATED, {'project': None, 'updated_at': now})
+        tasks.update(updated_at=now)
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Project)
+def log_delete(sender, instance, origin=None, **kwargs):
+    # When the owner goes, so does their log.
+    if deleted_for_itself(origin):
+        changes.record(instance, Change.DELETED)
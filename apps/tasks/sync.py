@@ -0,0 +1,137 @@
+"""
+Delta sync for clients that keep an owner's tasks and projects offline.
+
+A Delta holds what changed since a sync token: the rows created or updated
+since, read by keyset over the ``(owner, updated_at, id)`` indexes in
+batches, and the ids deleted since, from the change log (``changes.py``).
+So a sync costs what changed, not what the owner has. Without a token, or
+when the log no longer covers it, the Delta is a ``reset``: every row, for
+the client to replace its copy with.
+
+Rows written in the last ``SETTLE`` seconds are sent but left after the
+new token's position, so they are sent again next time: a transaction that
+stamped ``updated_at`` (or took a change id) before the sync read but had
+not committed yet is picked up then instead of skipped. Clients apply rows
+as upserts, so the repeats are harmless.
+
+Tokens are signed and name their owner. Settings come from
+``settings.TASKS_SYNC``, over DEFAULTS.
+"""
+import datetime
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+from .changes import is_lost, log_bounds
+from .models import Change, Project, Task
+
+DEFAULTS = {
+    'BATCH_SIZE': 1000,  # Rows read per query
+    'SETTLE': 5,  # Seconds a write may take to commit after stamping its row
+}
+
+SALT = 'tasks.sync'
+MODELS = {'task': Task, 'project': Project}
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def get_config(name):
+    return {**DEFAULTS, **(getattr(settings, 'TASKS_SYNC', None) or {})}[name]
+
+
+def encode_position(position):
+    return position and [position[0].isoformat(), position[1].hex]
+
+
+def decode_position(position):
+    return position and (datetime.datetime.fromisoformat(position[0]), uuid.UUID(position[1]))
+
+
+def make_token(owner, positions, change_id):
+    state = {'o': owner.pk, 'c': change_id, **{model: encode_position(positions[model]) for model in MODELS}}
+    return signing.dumps(state, salt=SALT, compress=True)
+
+
+def read_token(owner, token):
+    """Returns ``(positions, change_id)`` from one of ``owner``'s tokens."""
+    try:
+        state = signing.loads(token, salt=SALT)
+        if state['o'] != owner.pk:
+            raise InvalidToken("The token belongs to another user.")
+        return {model: decode_position(state[model]) for model in MODELS}, int(state['c'])
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise InvalidToken("Invalid sync token.")
+
+
+class Delta:
+    """
+    The owner's changes since ``token``. Iterate ``batches()`` for each
+    model, then read ``token`` for the next sync.
+    """
+
+    def __init__(self, owner, token=None):
+        self.owner = owner
+        self.cutoff = timezone.now() - datetime.timedelta(seconds=get_config('SETTLE'))
+        self.positions = {model: None for model in MODELS}
+        self.deleted = {model: [] for model in MODELS}
+        change_id = 0
+        if token:
+            self.positions, change_id = read_token(owner, token)
+        self.reset = not token or is_lost(change_id, *log_bounds())
+        if not self.reset:
+            self.read_deletions(change_id)
+        if self.reset:
+            self.positions = {model: None for model in MODELS}
+            self.deleted = {model: [] for model in MODELS}
+            change_id = 0
+        self.change_id = self.settled_change_id(change_id)
+
+    def read_deletions(self, after):
+        """Collects the ids deleted after change ``after``."""
+        log = Change.objects.filter(owner=self.owner, id__gt=after, action__in=[Change.DELETED, Change.RESET])
+        for model, object_id, action in log.order_by('id').values_list('model', 'object_id', 'action'):
+            if action == Change.RESET:
+                # Rows went without a tombstone, so the client must start over.
+                self.reset = True
+            else:
+                self.deleted[model].append(object_id)
+
+    def settled_change_id(self, after):
+        """The owner's last change old enough to have settled, where the next sync resumes."""
+        settled = Change.objects.filter(owner=self.owner, id__gt=after, created_at__lt=self.cutoff).order_by('-id')
+        return settled.values_list('id', flat=True).first() or after
+
+    def batches(self, model, fields):
+        """
+        Yields lists of ``values(*fields)`` rows of ``model`` ('task' or
+        'project') written since the token, by ``(updated_at, id)``;
+        ``fields`` must include both.
+        """
+        queryset = MODELS[model].objects.filter(owner=self.owner).order_by('updated_at', 'id').values(*fields)
+        position = self.positions[model]
+        batch_size = get_config('BATCH_SIZE')
+        while True:
+            page = queryset
+            if position:
+                updated_at, pk = position
+                # Resumes after the last row read; ids order rows stamped alike.
+                page = page.filter(updated_at__gte=updated_at).exclude(updated_at=updated_at, id__lte=pk)
+            rows = list(page[:batch_size])
+            if not rows:
+                return
+            for row in rows:
+                if row['updated_at'] < self.cutoff:
+                    self.positions[model] = (row['updated_at'], row['id'])
+            yield rows
+            if len(rows) < batch_size:
+                return
+            position = (rows[-1]['updated_at'], rows[-1]['id'])
+
+    @property
+    def token(self):
+        return make_token(self.owner, self.positions, self.change_id)
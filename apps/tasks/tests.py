@@ -1,11 +1,45 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import json
+import tempfile
+import threading
+import time
+import uuid
+from io import StringIO
+from django.test import TestCase, SimpleTestCase, RequestFactory, override_settings
+from django.http import HttpResponse
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
+from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
 from unittest.mock import patch
+from asgiref.sync import async_to_sync, sync_to_async
 from django.urls import reverse
-from .models import Project, Task
+from django.conf import settings
+from .models import Change, Job, Project, Task, TaskCounter, TaskDependency
 from .forms import TaskForm
+from .views import ProjectListView
+from .counters import dashboard
+from .search import get_search_backend
+from .ai_parser import LLMBackend, Rule, TaskTextParser
+from .cache import get_cache, get_generation, invalidate, is_shared, read_through
+from .cache_backends import FileCache, LRUMemoryCache, RedisCache, metrics
+from .metrics import Histogram, registry
+from .middleware import InstrumentationMiddleware, sql_shape
+from .redis_stub import StubRedisServer
+from .parser_stub import StubModelServer
+from . import agenda, graph, jobs
+from .bulk import create_tasks, delete_tasks, update_tasks
+from .rows import EXCERPT_LENGTH, TaskRow, task_rows
 
 
 class TaskFormTest(TestCase):
@@ -120,4 +154,1741 @@ class ParseCreateTaskTest(TestCase):
         self.assertEqual(Task.objects.count(), 0)
         messages = list(response.wsgi_request._messages)
         self.assertEqual(len(messages), 1)
-        self.assertEqual(str(messages[0]), "Task text cannot be empty.")
\ No newline at end of file
+        self.assertEqual(str(messages[0]), "Task text cannot be empty.")
+
+
+class ExplainViewsCommandTest(TestCase):
+    def test_view_queries_use_indexes(self):
+        out = StringIO()
+        call_command('explain_views', stdout=out)
+        self.assertNotIn('FAIL', out.getvalue())
+
+
+class ProjectListViewQueryTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='owner', email='owner@example.com', password='password123',
+            first_name='Project', last_name='Owner',
+        )
+        self.client.force_login(self.user)
+        cache.clear()
+
+    def create_projects(self, count, tasks_per_project=3):
+        for i in range(count):
+            project = Project.objects.create(owner=self.user, title=f'Project {i}')
+            Task.objects.bulk_create([
+                Task(owner=self.user, project=project, title=f'Task {i}-{j}')
+                for j in range(tasks_per_project)
+            ])
+
+    def test_query_count_is_constant_in_number_of_projects(self):
+        self.create_projects(2)
+        # session, user, ETag stamp, count, projects, prefetch, sidebar
+        with self.assertNumQueries(7):
+            self.client.get(reverse('tasks:project_list'))
+        self.create_projects(8)
+        with self.assertNumQueries(7):
+            response = self.client.get(reverse('tasks:project_list'), {'status': 'todo', 'q': 'Task'})
+        self.assertEqual(len(response.context['projects']), 10)
+
+    def test_embedded_tasks_are_capped_per_project(self):
+        self.create_projects(1, tasks_per_project=12)
+        response = self.client.get(reverse('tasks:project_list'))
+        project = response.context['projects'][0]
+        self.assertEqual(len(project.filtered_tasks), ProjectListView.tasks_per_project)
+
+    def test_embedded_tasks_respect_filters(self):
+        self.create_projects(1)
+        Task.objects.filter(title='Task 0-0').update(status='done')
+        response = self.client.get(reverse('tasks:project_list'), {'status': 'done'})
+        project = response.context['projects'][0]
+        self.assertEqual([task.title for task in project.filtered_tasks], ['Task 0-0'])
+
+
+# One test process: its memory cache is every process's cache.
+@override_settings(TASKS_CACHE_SHARED=True)
+class ProjectIndexTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='indexer', email='indexer@example.com', password='password123',
+            first_name='Index', last_name='User',
+        )
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(owner=self.user, title='Garden')
+
+    def project_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        # The index's own read, not the project titles joined into task rows.
+        return response, [query['sql'] for query in queries if 'FROM "tasks_project" WHERE' in query['sql']]
+
+    def test_warm_cache_renders_without_project_queries(self):
+        url = reverse('tasks:task_list')
+        response, queries = self.project_queries(url)
+        self.assertEqual(len(queries), 1)
+        response, queries = self.project_queries(url)
+        self.assertEqual(queries, [])
+        self.assertContains(response, 'Garden', count=2)  # sidebar and project filter
+
+    def test_project_changes_bump_the_version(self):
+        url = reverse('tasks:task_list')
+        self.client.get(url)
+        self.project.title = 'Orchard'
+        self.project.save()
+        Project.objects.create(owner=self.user, title='Attic')
+        response = self.client.get(url)
+        self.assertEqual([project.title for project in response.context['projects']], ['Attic', 'Orchard'])
+        self.project.delete()
+        response = self.client.get(url)
+        self.assertEqual([project.title for project in response.context['projects']], ['Attic'])
+
+    def test_task_writes_keep_the_index(self):
+        url = reverse('tasks:task_list')
+        self.client.get(url)
+        task = Task.objects.create(owner=self.user, project=self.project, title='Weed beds')
+        task.status = 'done'
+        task.save()
+        response, queries = self.project_queries(url)
+        self.assertEqual(queries, [])
+        self.assertContains(response, 'Weed beds')
+        task.delete()
+        self.assertEqual(self.project_queries(url)[1], [])
+
+    def test_index_is_per_user(self):
+        other = get_user_model().objects.create_user(
+            username='other', email='other@example.com', password='password123',
+            first_name='Other', last_name='User',
+        )
+        Project.objects.create(owner=other, title='Secret')
+        self.client.get(reverse('tasks:task_list'))
+        self.client.force_login(other)
+        response = self.client.get(reverse('tasks:task_list'))
+        self.assertNotContains(response, 'Garden')
+        self.assertContains(response, 'Secret')
+
+
+@override_settings(TASKS_CACHE_SHARED=True)
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='poller', email='poller@example.com', password='password123',
+            first_name='Poll', last_name='User',
+        )
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(owner=self.user, title='Garden')
+        self.task = Task.objects.create(owner=self.user, project=self.project, title='Water plants')
+
+    def revalidate(self, url, **headers):
+        # The first page sets the CSRF cookie, which is part of the ETag.
+        self.client.get(reverse('tasks:task_list'))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, {'HTTP_IF_NONE_MATCH': response['ETag'], **headers}
+
+    @override_settings(TASKS_CACHE_SHARED=None)
+    def test_per_process_cache_is_bypassed(self):
+        self.assertFalse(is_shared())
+        url = reverse('tasks:task_list')
+        response, headers = self.revalidate(url)
+        self.assertEqual(self.client.get(url, **headers).status_code, 304)
+        # Another worker's write bumps the generation in its own memory only.
+        Task.objects.filter(pk=self.task.pk).update(title='Water roses', updated_at=timezone.now())
+        response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Water roses')
+
+    def test_unchanged_pages_return_304_without_rendering(self):
+        urls = [
+            reverse('tasks:task_list'),
+            reverse('tasks:task_detail', args=[self.task.pk]),
+            reverse('tasks:project_list'),
+            reverse('tasks:project_detail', args=[self.project.pk]),
+            reverse('tasks:dashboard'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response, headers = self.revalidate(url)
+                self.assertIn('Last-Modified', response)
+                # session, user; the stamp itself comes from the owner cache
+                with self.assertNumQueries(2):
+                    response = self.client.get(url, **headers)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_if_modified_since(self):
+        response, headers = self.revalidate(reverse('tasks:task_list'))
+        response = self.client.get(reverse('tasks:task_list'), HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate_the_etag(self):
+        url = reverse('tasks:task_list')
+        changes = [
+            lambda: Task.objects.create(owner=self.user, title='Prune roses'),
+            lambda: Task.objects.filter(title='Prune roses').delete(),
+            lambda: self.project.save(),
+            lambda: Project.objects.create(owner=self.user, title='Attic'),
+            lambda: Project.objects.filter(title='Attic').delete(),
+        ]
+        for number, change in enumerate(changes):
+            with self.subTest(change=number):
+                response, headers = self.revalidate(url)
+                change()
+                self.assertEqual(self.client.get(url, **headers).status_code, 200)
+
+    def test_etag_is_scoped_to_user_and_url(self):
+        response, headers = self.revalidate(reverse('tasks:task_list'))
+        self.assertEqual(self.client.get(reverse('tasks:project_list'), **headers).status_code, 200)
+        other = get_user_model().objects.create_user(
+            username='other', email='other@example.com', password='password123',
+            first_name='Other', last_name='User',
+        )
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse('tasks:task_list'), **headers).status_code, 200)
+
+    def test_pending_messages_force_a_render(self):
+        response, headers = self.revalidate(reverse('tasks:task_list'))
+        self.client.post(reverse('tasks:parse_create_task'), {'text': ''})
+        response = self.client.get(reverse('tasks:task_list'), **headers)
+        self.assertContains(response, "Task text cannot be empty.")
+
+
+@override_settings(TASKS_CACHE_SHARED=True)
+class OwnerCacheTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='cached', email='cached@example.com', password='password123',
+            first_name='Cache', last_name='User',
+        )
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(owner=self.user, title='Garden')
+        metrics.reset()
+
+    def test_dashboard_refresh_skips_the_database(self):
+        self.client.get(reverse('tasks:dashboard'))
+        # session, user
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('tasks:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(metrics.snapshot()['hit']['dashboard.counts'], 0)
+
+    def test_writes_bump_the_generation(self):
+        url = reverse('tasks:task_list')
+        self.assertNotContains(self.client.get(url), 'Water plants')
+        generation = get_generation(self.user.pk)
+        task = Task.objects.create(owner=self.user, title='Water plants')
+        self.assertNotEqual(get_generation(self.user.pk), generation)
+        self.assertContains(self.client.get(url), 'Water plants')
+        task.delete()
+        self.assertNotContains(self.client.get(url), 'Water plants')
+
+    def test_pages_and_filters_are_cached_separately(self):
+        Task.objects.create(owner=self.user, title='Water plants', status='done')
+        url = reverse('tasks:task_list')
+        self.assertContains(self.client.get(url, {'status': 'done'}), 'Water plants')
+        self.assertNotContains(self.client.get(url, {'status': 'todo'}), 'Water plants')
+
+    def test_other_owners_are_unaffected(self):
+        other = get_user_model().objects.create_user(
+            username='other', email='other@example.com', password='password123',
+            first_name='Other', last_name='User',
+        )
+        generation = get_generation(other.pk)
+        Task.objects.create(owner=self.user, title='Water plants')
+        self.assertEqual(get_generation(other.pk), generation)
+
+    def test_bulk_writes_invalidate(self):
+        self.client.get(reverse('tasks:task_list'))
+        self.client.post(
+            reverse('tasks:parse_create_tasks'), json.dumps(['Prune roses']), content_type='application/json'
+        )
+        self.assertContains(self.client.get(reverse('tasks:task_list')), 'Prune roses')
+
+    def test_metrics_count_hits_and_misses(self):
+        compute = lambda: 42  # noqa: E731
+        self.assertEqual(read_through(self.user, 'answer', compute), 42)
+        read_through(self.user, 'answer', compute)
+        invalidate(self.user.pk)
+        read_through(self.user, 'answer', compute)
+        counts = metrics.snapshot()
+        self.assertEqual((counts['hit']['answer'], counts['miss']['answer']), (1, 2))
+
+    def test_stats_are_staff_only(self):
+        self.assertEqual(self.client.get(reverse('tasks:cache_stats')).status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        self.client.get(reverse('tasks:dashboard'))
+        self.assertIn('dashboard.counts', self.client.get(reverse('tasks:cache_stats')).json()['miss'])
+
+
+class CacheBackendTest(SimpleTestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def test_memory_cache_evicts_least_recently_used(self):
+        cache = LRUMemoryCache('lru-test', {'OPTIONS': {'MAX_ENTRIES': 2}})
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+        self.assertEqual(metrics.snapshot()['eviction']['all'], 1)
+
+    def test_file_cache_counts_evictions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = FileCache(directory, {'OPTIONS': {'MAX_ENTRIES': 3, 'CULL_FREQUENCY': 3}})
+            for i in range(5):
+                cache.set(f'key{i}', i)
+            self.assertGreater(metrics.snapshot()['eviction']['all'], 0)
+
+    def test_redis_cache_against_stub_server(self):
+        server = StubRedisServer().start()
+        self.addCleanup(server.stop)
+        cache = RedisCache(server.url, {})
+        cache.set('task', {'title': 'Water plants'})
+        self.assertEqual(cache.get('task'), {'title': 'Water plants'})
+        self.assertFalse(cache.add('task', 'other'))
+        self.assertTrue(cache.add('counter', 1))
+        self.assertEqual(cache.incr('counter', 5), 6)
+        self.assertEqual(cache.get('counter'), 6)
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+        cache.set_many({'a': 1, 'b': [2]})
+        self.assertEqual(cache.get_many(['a', 'b', 'c']), {'a': 1, 'b': [2]})
+        self.assertTrue(cache.delete('a'))
+        self.assertFalse(cache.has_key('a'))
+        self.assertEqual(cache.get_or_set('lazy', lambda: 'computed'), 'computed')
+        cache.set('short', 'value', 0.05)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get('short'))
+        cache.clear()
+        self.assertIsNone(cache.get('task'))
+
+    def test_redis_cache_reconnects(self):
+        server = StubRedisServer().start()
+        self.addCleanup(server.stop)
+        cache = RedisCache(server.url, {})
+        cache.set('key', 'value')
+        cache.local.connection.sock.close()
+        self.assertEqual(cache.get('key'), 'value')
+
+    def test_read_through_on_redis(self):
+        server = StubRedisServer().start()
+        self.addCleanup(server.stop)
+        caches = {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'shared': {'BACKEND': 'apps.tasks.cache_backends.RedisCache', 'LOCATION': server.url},
+        }
+        owner = get_user_model()(pk=123)
+        with override_settings(CACHES=caches, TASKS_CACHE_ALIAS='shared'):
+            self.assertEqual(read_through(owner, 'answer', lambda: 1), 1)
+            self.assertEqual(read_through(owner, 'answer', lambda: 2), 1)
+            invalidate(owner.pk)
+            self.assertEqual(read_through(owner, 'answer', lambda: 3), 3)
+
+
+@override_settings(TASKS_METRICS={'SAMPLE_RATE': 1.0, 'N_PLUS_ONE_THRESHOLD': 3, 'TOKEN': 'scrape-me'})
+class InstrumentationTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='measured', email='measured@example.com', password='password123',
+            first_name='Measured', last_name='User',
+        )
+        self.client.force_login(self.user)
+        registry.reset()
+
+    def test_records_per_view_timings(self):
+        Task.objects.create(owner=self.user, title='Water plants')
+        self.client.get(reverse('tasks:task_list'))
+        stats = registry.get('tasks:task_list')
+        self.assertEqual(stats.responses, {200: 1})
+        self.assertEqual(stats.sampled, 1)
+        self.assertGreater(stats.queries.sum, 0)
+        self.assertGreater(stats.template_time.sum, 0)
+        self.assertTrue(stats.slowest_sql[0].startswith('SELECT'))
+
+    def test_unsampled_requests_are_only_counted(self):
+        with override_settings(TASKS_METRICS={'SAMPLE_RATE': 0}):
+            self.client.get(reverse('tasks:task_list'))
+        stats = registry.get('tasks:task_list')
+        self.assertEqual((stats.wall.count, stats.sampled), (1, 0))
+
+    def test_logs_repeated_query_shapes(self):
+        users = get_user_model().objects
+
+        def view(request):
+            for pk in range(4):
+                list(users.filter(pk=pk))
+            list(users.filter(pk__in=[1, 2]))
+            return HttpResponse()
+
+        request = RequestFactory().get('/')
+        with self.assertLogs('apps.tasks.middleware', 'WARNING') as logs:
+            InstrumentationMiddleware(view)(request)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('4 queries', logs.output[0])
+        self.assertEqual(registry.get('<unresolved>').n_plus_one, 1)
+
+    def test_prometheus_endpoint(self):
+        self.client.get(reverse('tasks:task_list'))
+        self.assertEqual(self.client.get(reverse('tasks:metrics')).status_code, 403)
+        response = self.client.get(reverse('tasks:metrics'), HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        text = response.content.decode()
+        self.assertIn('tasks_requests_total{view="tasks:task_list",status="200"} 1', text)
+        self.assertIn('tasks_request_duration_seconds_bucket{view="tasks:task_list",le="+Inf"} 1', text)
+        self.assertIn('tasks_db_queries_count{view="tasks:task_list"} 1', text)
+        self.assertIn('tasks_request_duration_recent_seconds{view="tasks:task_list",quantile="0.99"}', text)
+
+
+class MetricsTest(SimpleTestCase):
+    def test_histogram_buckets_and_rolling_quantiles(self):
+        histogram = Histogram(buckets=(1, 5), window=10)
+        for value, now in [(0.5, 0), (3, 0), (7, 20), (2, 21)]:
+            histogram.observe(value, now)
+        self.assertEqual(list(histogram.cumulative()), [(1, 1), (5, 3), (float('inf'), 4)])
+        self.assertEqual(histogram.quantiles((0.5, 0.99), now=25), {0.5: 7, 0.99: 7})
+        self.assertEqual(histogram.quantiles(now=100), {})
+
+    def test_sql_shape_folds_in_lists(self):
+        self.assertEqual(
+            sql_shape('SELECT 1 FROM t WHERE id IN (%s, %s, %s)'), sql_shape('SELECT 1 FROM t WHERE id IN (%s)')
+        )
+
+
+class SearchBackendTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='searcher', email='searcher@example.com', password='password123',
+            first_name='Search', last_name='User',
+        )
+        self.project = Project.objects.create(owner=self.user, title='Reports')
+        self.report = Task.objects.create(
+            owner=self.user, project=self.project, title='Quarterly report',
+            description='Collect revenue numbers for the report',
+        )
+        self.groceries = Task.objects.create(owner=self.user, title='Buy groceries', description='Milk and bread')
+        self.backend = get_search_backend()
+
+    def search(self, query, **kwargs):
+        return list(self.backend.search(Task.objects.filter(owner=self.user), query, **kwargs))
+
+    def test_prefix_matching(self):
+        self.assertEqual(self.search('rep'), [self.report])
+        self.assertEqual(self.search('milk bre'), [self.groceries])
+        self.assertEqual(self.search('milk report'), [])
+
+    def test_ranked_results_order_by_relevance(self):
+        other = Task.objects.create(
+            owner=self.user, title='Weekly sync', description='Discuss ' + 'planning ' * 20 + 'and the report',
+        )
+        results = self.search('report', ranked=True)
+        self.assertEqual(results, [self.report, other])
+        self.assertTrue(hasattr(results[0], 'search_rank'))
+
+    def test_index_follows_updates_and_deletes(self):
+        self.groceries.title = 'Buy vegetables'
+        self.groceries.description = ''
+        self.groceries.save()
+        self.assertEqual(self.search('groceries'), [])
+        self.assertEqual(self.search('vegetables'), [self.groceries])
+        self.report.delete()
+        self.assertEqual(self.search('report'), [])
+
+    def test_punctuation_only_query_matches_nothing(self):
+        self.assertEqual(self.search('"*'), [])
+
+    def test_rebuild_command(self):
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('quarter'), [self.report])
+
+    def test_project_detail_uses_search(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('tasks:project_detail', args=[self.project.pk]), {'q': 'revenue'})
+        self.assertEqual([task.pk for task in response.context['tasks']], [self.report.pk])
+
+
+class CursorPaginationTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='pager', email='pager@example.com', password='password123',
+            first_name='Page', last_name='User',
+        )
+        self.client.force_login(self.user)
+        Task.objects.bulk_create([Task(owner=self.user, title=f'Task {i}') for i in range(25)])
+        # Identical timestamps force the id tie-breaker to do the work.
+        Task.objects.update(created_at=timezone.now())
+
+    def read_feed(self, params):
+        response = self.client.get(reverse('tasks:task_feed'), params)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_feed_walks_every_task_once(self):
+        seen = []
+        params = {'limit': 10}
+        while True:
+            data = self.read_feed(params)
+            seen.extend(row['id'] for row in data['results'])
+            if not data['next_cursor']:
+                break
+            params['cursor'] = data['next_cursor']
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(set(seen), {str(pk) for pk in Task.objects.values_list('pk', flat=True)})
+
+    def test_feed_applies_filters_and_counts(self):
+        Task.objects.filter(title__in=['Task 1', 'Task 2']).update(status='done')
+        data = self.read_feed({'status': 'done', 'count': '1'})
+        self.assertEqual(sorted(row['title'] for row in data['results']), ['Task 1', 'Task 2'])
+        self.assertEqual((data['count'], data['count_exact']), (2, True))
+        self.assertIsNone(data['next_cursor'])
+
+    def test_html_cursor_mode(self):
+        response = self.client.get(reverse('tasks:task_list'), {'paginate': 'cursor'})
+        self.assertEqual(len(response.context['tasks']), 20)
+        next_page = self.client.get(reverse('tasks:task_list') + '?' + response.context['next_page_query'])
+        self.assertEqual(len(next_page.context['tasks']), 5)
+        self.assertNotIn('next_page_query', next_page.context)
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get(reverse('tasks:task_feed'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class TaskCounterTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='counter', email='counter@example.com', password='password123',
+            first_name='Count', last_name='User',
+        )
+        self.project = Project.objects.create(owner=self.user, title='Alpha')
+
+    def counts(self):
+        return {
+            (c.project_id, c.status, c.priority): c.count
+            for c in TaskCounter.objects.filter(owner=self.user, count__gt=0)
+        }
+
+    def test_create_transition_and_delete(self):
+        task = Task.objects.create(owner=self.user, project=self.project, title='One', priority='high')
+        self.assertEqual(self.counts(), {(self.project.pk, 'todo', 'high'): 1})
+
+        task.status = 'done'
+        task.project = None
+        task.save()
+        self.assertEqual(self.counts(), {(None, 'done', 'high'): 1})
+
+        task.delete()
+        self.assertEqual(self.counts(), {})
+
+    def test_deleting_project_moves_counts_to_no_project(self):
+        Task.objects.create(owner=self.user, project=self.project, title='One')
+        self.project.delete()
+        self.assertEqual(self.counts(), {(None, 'todo', 'medium'): 1})
+
+    def test_deleting_owner_cleans_up(self):
+        Task.objects.create(owner=self.user, project=self.project, title='One')
+        self.user.delete()
+        self.assertFalse(TaskCounter.objects.exists())
+
+    def test_recount_repairs_drift(self):
+        Task.objects.create(owner=self.user, project=self.project, title='One')
+        Task.objects.bulk_create([Task(owner=self.user, title='Bulk', status='in_progress')])
+        TaskCounter.objects.update(count=42)
+        call_command('recount', stdout=StringIO())
+        self.assertEqual(self.counts(), {(self.project.pk, 'todo', 'medium'): 1, (None, 'in_progress', 'medium'): 1})
+
+    def test_dashboard_query_count_is_constant(self):
+        yesterday = timezone.now().date() - timedelta(days=1)
+        for i in range(20):
+            Task.objects.create(owner=self.user, project=self.project, title=f'Task {i}', due_date=yesterday)
+        self.client.force_login(self.user)
+        # session, user, ETag stamp, counters, overdue, sidebar project index (cold)
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('tasks:dashboard'))
+        self.assertEqual(response.context['totals']['todo'], 20)
+        self.assertEqual(response.context['totals']['overdue'], 20)
+        self.assertEqual(response.context['projects'][0]['project'], self.project)
+
+
+class TaskImportExportTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='importer', email='importer@example.com', password='password123',
+            first_name='Import', last_name='User',
+        )
+        self.project = Project.objects.create(owner=self.user, title='Backlog')
+        self.client.force_login(self.user)
+
+    def test_csv_upload_reports_row_errors(self):
+        future = (timezone.now().date() + timedelta(days=3)).isoformat()
+        past = (timezone.now().date() - timedelta(days=3)).isoformat()
+        content = (
+            'title,description,due_date,priority,status,project\n'
+            f'Write spec,First draft,{future},HIGH,todo,Backlog\n'
+            f'Old task,,{past},low,todo,\n'
+            ',No title,,,,\n'
+            'Unknown project,,,,,Nowhere\n'
+            'Plain task,,,,,\n'
+        )
+        upload = SimpleUploadedFile('tasks.csv', content.encode(), content_type='text/csv')
+        response = self.client.post(reverse('tasks:task_import'), {'file': upload})
+        report = response.json()
+        self.assertEqual(report['created'], 2)
+        self.assertEqual([error['row'] for error in report['errors']], [3, 4, 5])
+        self.assertIn('due_date', report['errors'][0]['errors'])
+        self.assertIn('project', report['errors'][2]['errors'])
+
+        task = Task.objects.get(title='Write spec')
+        self.assertEqual((task.owner, task.project, task.priority), (self.user, self.project, 'high'))
+        self.assertEqual(TaskCounter.objects.get(project=self.project).count, 1)
+        self.assertEqual(list(get_search_backend().search(Task.objects.all(), 'draft')), [task])
+
+    def test_undecodable_lines_are_row_errors(self):
+        content = 'title,description\nCafé,Latin-1\nPlain,ASCII\nRésumé,again\n'.encode('latin-1')
+        upload = SimpleUploadedFile('tasks.csv', content, content_type='text/csv')
+        response = self.client.post(reverse('tasks:task_import'), {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual((report['created'], [error['row'] for error in report['errors']]), (1, [2, 4]))
+        self.assertEqual(report['errors'][0]['errors'], {'__all__': ["The line is not UTF-8 text."]})
+
+        content = b'{"title": "First"}\n{"title": "Caf\xe9"}\n{"title": "Third"}\n'
+        upload = SimpleUploadedFile('tasks.jsonl', content)
+        report = self.client.post(reverse('tasks:task_import'), {'file': upload}).json()
+        self.assertEqual((report['created'], [error['row'] for error in report['errors']]), (2, [2]))
+
+        upload = SimpleUploadedFile('tasks.csv', b'title\n"' + b'x' * (csv.field_size_limit() + 1) + b'"\n')
+        report = self.client.post(reverse('tasks:task_import'), {'file': upload}).json()
+        self.assertEqual((report['created'], report['error_count']), (0, 1))
+
+    def test_command_imports_jsonl_in_batches(self):
+        lines = [json.dumps({'title': f'Task {i}', 'project': 'New project'}) for i in range(7)]
+        lines.append('not json')
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl') as handle:
+            handle.write('\n'.join(lines))
+            handle.flush()
+            call_command(
+                'import_tasks', handle.name, '--user', self.user.email, '--batch-size', '3',
+                '--create-projects', stdout=StringIO(), stderr=StringIO(),
+            )
+        self.assertEqual(Task.objects.filter(project__title='New project').count(), 7)
+        self.assertEqual(Project.objects.filter(title='New project').count(), 1)
+
+    def test_export_round_trips_through_import(self):
+        Task.objects.create(owner=self.user, project=self.project, title='Exported', description='Line one')
+        Task.objects.create(owner=self.user, title='Done task', status='done')
+        response = self.client.get(reverse('tasks:task_export'), {'format': 'jsonl', 'status': 'todo'})
+        content = b''.join(response.streaming_content)
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(rows, [{
+            'title': 'Exported', 'description': 'Line one', 'due_date': None,
+            'priority': 'medium', 'status': 'todo', 'project': 'Backlog',
+        }])
+
+        response = self.client.get(reverse('tasks:task_export'))
+        upload = SimpleUploadedFile('tasks.csv', b''.join(response.streaming_content))
+        report = self.client.post(reverse('tasks:task_import'), {'file': upload}).json()
+        self.assertEqual((report['created'], report['error_count']), (2, 0))
+
+
+class BatchQuickAddTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='batcher', email='batcher@example.com', password='password123',
+            first_name='Batch', last_name='User',
+        )
+        self.client.force_login(self.user)
+
+    def test_json_array_reports_per_line_results(self):
+        texts = ['Buy milk tomorrow', 'x' * 300, 'Ship release high priority']
+        response = self.client.post(
+            reverse('tasks:parse_create_tasks'), json.dumps(texts), content_type='application/json'
+        )
+        data = response.json()
+        self.assertEqual(data['created'], 2)
+        self.assertEqual([('errors' in result) for result in data['results']], [False, True, False])
+        self.assertIn('title', data['results'][1]['errors'])
+        task = Task.objects.get(title='Ship release')
+        self.assertEqual((task.owner, task.priority, task.status), (self.user, 'high', 'todo'))
+        self.assertEqual(Task.objects.get(title='Buy milk').due_date, timezone.now().date() + timedelta(days=1))
+
+    def test_multi_line_paste_uses_a_handful_of_queries(self):
+        text = '\n'.join(f'Task {i} low priority' for i in range(500))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('tasks:parse_create_tasks'), {'text': text})
+        # bulk_create splits on the database's parameter limit, so allow a
+        # few insert batches, but nothing that grows per line.
+        self.assertLess(len(queries), 30)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Task.objects.filter(owner=self.user, priority='low').count(), 500)
+
+    def test_quick_add_resolves_project_tags(self):
+        project = Project.objects.create(owner=self.user, title='Home Ops')
+        data = self.client.post(
+            reverse('tasks:parse_create_tasks'),
+            json.dumps(['Fix sink #home-ops', 'Fix roof #nowhere']),
+            content_type='application/json',
+        ).json()
+        self.assertEqual(data['created'], 1)
+        self.assertEqual(Task.objects.get(title='Fix sink').project, project)
+        self.assertIn('project', data['results'][1]['errors'])
+
+    def test_rejects_non_string_json(self):
+        response = self.client.post(
+            reverse('tasks:parse_create_tasks'), json.dumps([1, 2]), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class TaskTextParserTest(SimpleTestCase):
+    today = datetime.date(2026, 10, 17)  # a Saturday
+
+    def parse(self, text, parser=None):
+        return (parser or TaskTextParser()).parse(text, self.today)
+
+    def test_relative_dates(self):
+        cases = {
+            'Pay rent today': '2026-10-17',
+            'Pay rent tomorrow': '2026-10-18',
+            'Pay rent by monday': '2026-10-19',
+            'Pay rent on Saturday': '2026-10-24',
+            'Pay rent in 3 days': '2026-10-20',
+            'Pay rent in two weeks': '2026-10-31',
+            'Pay rent next week': '2026-10-19',
+            'Pay rent due 2026-12-01': '2026-12-01',
+        }
+        for text, due_date in cases.items():
+            with self.subTest(text=text):
+                parsed = self.parse(text)
+                self.assertEqual(parsed['due_date'], due_date)
+                self.assertEqual(parsed['title'], 'Pay rent')
+
+    def test_priority_status_and_project_in_one_scan(self):
+        parsed = self.parse('[x] Ship release #Work-Ops High Priority')
+        self.assertEqual(parsed['title'], 'Ship release')
+        self.assertEqual(parsed['priority'], 'high')
+        self.assertEqual(parsed['status'], 'done')
+        self.assertEqual(parsed['project_tag'], 'work-ops')
+
+    def test_defaults_and_first_mention_wins(self):
+        parsed = self.parse('Meet tomorrow or friday')
+        self.assertEqual(parsed['title'], 'Meet or friday')
+        self.assertEqual((parsed['priority'], parsed['status']), ('medium', 'todo'))
+        self.assertEqual(self.parse('  tomorrow ')['title'], 'New Task')
+
+    def test_custom_rules_extend_the_parser(self):
+        rule = Rule('someday', r'\bsomeday\b', lambda match, today: ('priority', 'low'))
+        parser = TaskTextParser([*TaskTextParser().rules, rule])
+        self.assertEqual(self.parse('Learn piano someday', parser)['priority'], 'low')
+
+
+def shout(result):
+    return {**result, 'title': result['title'].upper()}
+
+
+class LLMBackendTest(TestCase):
+    today = datetime.date(2026, 10, 17)
+
+    def start_server(self, **kwargs):
+        server = StubModelServer(transform=shout, **kwargs).start()
+        self.addCleanup(server.stop)
+        return server
+
+    def make_backend(self, server, **kwargs):
+        backend = LLMBackend(server.url, **kwargs)
+        self.addCleanup(backend.close)
+        return backend
+
+    def test_batches_texts_into_few_requests(self):
+        server = self.start_server()
+        backend = self.make_backend(server, max_batch_size=2)
+        results = backend.parse_many(['Call mom tomorrow', 'Pay rent', 'Ship release p1'], self.today)
+        self.assertEqual([result['title'] for result in results], ['CALL MOM', 'PAY RENT', 'SHIP RELEASE'])
+        self.assertEqual(results[0]['due_date'], '2026-10-18')
+        self.assertEqual(sorted(len(batch) for batch in server.batches), [1, 2])
+
+    def test_merges_concurrent_callers(self):
+        server = self.start_server()
+        backend = self.make_backend(server, batch_window=0.2)
+        results = {}
+
+        def parse(text):
+            results[text] = backend.parse_many([text], self.today)[0]['title']
+
+        threads = [threading.Thread(target=parse, args=(f'Task {i}',)) for i in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, {f'Task {i}': f'TASK {i}' for i in range(5)})
+        self.assertEqual(len(server.batches), 1)
+
+    def test_timeout_falls_back_and_late_answers_fill_the_cache(self):
+        server = self.start_server(delay=0.5)
+        backend = self.make_backend(server)
+        started = time.monotonic()
+        result = backend.parse_many(['Pay rent tomorrow'], self.today, timeout=0.05)[0]
+        self.assertLess(time.monotonic() - started, 0.4)
+        self.assertEqual((result['title'], result['due_date']), ('Pay rent', '2026-10-18'))
+
+        time.sleep(0.8)
+        result = backend.parse_many(['Pay  rent tomorrow '], self.today, timeout=0.05)[0]
+        self.assertEqual(result['title'], 'PAY RENT')
+        self.assertEqual(len(server.batches), 1)
+
+    def test_unreachable_server_falls_back(self):
+        server = self.start_server()
+        backend = self.make_backend(server)
+        server.stop()
+        with self.assertLogs('apps.tasks.ai_parser', 'WARNING'):
+            result = backend.parse_many(['Pay rent'], self.today)[0]
+        self.assertEqual(result['title'], 'Pay rent')
+
+    def test_lru_and_persistent_cache(self):
+        server = self.start_server()
+        backend = self.make_backend(server, cache_size=1, cache_alias='default')
+        backend.parse_many(['Pay rent', 'Call mom'], self.today)
+        self.assertEqual(len(backend.cache.entries), 1)
+        # A fresh client finds the answers in the shared Django cache.
+        other = self.make_backend(server)
+        other.cache.persistent = backend.cache.persistent
+        self.assertEqual(other.parse_many(['Pay rent'], self.today)[0]['title'], 'PAY RENT')
+        self.assertEqual(len(server.batches), 1)
+        # Relative dates are resolved per day, so the next day misses.
+        other.parse_many(['Pay rent'], self.today + timedelta(days=1))
+        self.assertEqual(len(server.batches), 2)
+
+    def test_quick_add_stays_within_budget(self):
+        server = self.start_server(delay=1)
+        user = get_user_model().objects.create_user(
+            username='budget', email='budget@example.com', password='password123',
+            first_name='Budget', last_name='User',
+        )
+        self.client.force_login(user)
+        config = {'BACKEND': 'apps.tasks.ai_parser.LLMBackend', 'OPTIONS': {'url': server.url}, 'BUDGET': 0.1}
+        with override_settings(TASKS_PARSER=config):
+            started = time.monotonic()
+            self.client.post(reverse('tasks:parse_create_task'), {'text': 'Pay rent high priority'})
+            self.assertLess(time.monotonic() - started, 0.8)
+        task = Task.objects.get(owner=user)
+        self.assertEqual((task.title, task.priority), ('Pay rent', 'high'))
+
+
+class BenchmarkTest(TestCase):
+    def test_generate_creates_requested_rows(self):
+        from benchmarks.data import generate
+
+        users = generate(users=2, projects=3, tasks=4, prefix='gen')
+        self.assertEqual([user.username for user in users], ['gen0', 'gen1'])
+        self.assertEqual(Project.objects.filter(owner=users[1]).count(), 3)
+        self.assertEqual(Task.objects.filter(owner=users[1]).count(), 12)
+        counted = sum(TaskCounter.objects.filter(owner=users[1]).values_list('count', flat=True))
+        self.assertEqual(counted, 12)
+
+    def test_compare_flags_regressions(self):
+        from benchmarks.endpoints import compare
+
+        baseline = {'scenarios': {
+            'task_list': {'p95_ms': 10.0, 'max_queries': 2},
+            'dashboard': {'p95_ms': 10.0, 'max_queries': 2},
+        }}
+        results = {'scenarios': {
+            'task_list': {'p95_ms': 12.0, 'max_queries': 3},
+            'dashboard': {'p95_ms': 20.0, 'max_queries': 2},
+            'metrics': {'p95_ms': 50.0, 'max_queries': 9},
+        }}
+        self.assertEqual(compare(baseline, results, 1.5), [
+            'task_list: queries 2 -> 3',
+            'dashboard: p95 10.0ms -> 20.0ms',
+        ])
+
+
+class DatabaseConfigTest(SimpleTestCase):
+    def test_sqlite_defaults_to_wal_and_immediate_transactions(self):
+        from task_manager.database import database_config
+
+        config = database_config('', '/srv/tasks/db.sqlite3')
+        self.assertEqual(config['NAME'], '/srv/tasks/db.sqlite3')
+        self.assertEqual(config['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertIn('PRAGMA journal_mode=wal', config['OPTIONS']['init_command'])
+        self.assertEqual(config['CONN_MAX_AGE'], 600)
+
+    def test_query_parameters_override_defaults(self):
+        from task_manager.database import database_config
+
+        config = database_config('sqlite:///bench.db?journal_mode=delete&transaction_mode=deferred', '')
+        self.assertEqual(config['NAME'], 'bench.db')
+        self.assertIsNone(config['OPTIONS']['transaction_mode'])
+        self.assertIn('PRAGMA journal_mode=delete', config['OPTIONS']['init_command'])
+
+    def test_postgres_without_pool_checks_persistent_connections(self):
+        from task_manager.database import database_config
+
+        config = database_config('postgres://tasks:s%40cret@db:5433/tasks?pool=0&conn_max_age=60', '')
+        self.assertEqual(
+            (config['ENGINE'], config['NAME'], config['USER'], config['PASSWORD'], config['HOST'], config['PORT']),
+            ('django.db.backends.postgresql', 'tasks', 'tasks', 's@cret', 'db', '5433'),
+        )
+        self.assertEqual((config['CONN_MAX_AGE'], config['CONN_HEALTH_CHECKS']), (60, True))
+
+    def test_postgres_pool_needs_psycopg_pool(self):
+        from django.core.exceptions import ImproperlyConfigured
+
+        from task_manager.database import database_config
+
+        with patch.dict('sys.modules', {'psycopg_pool': None}):
+            with self.assertRaisesMessage(ImproperlyConfigured, 'requirements-postgres.txt'):
+                database_config('postgres://tasks@db/tasks', '')
+
+
+class AsyncViewsTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='async', email='async@example.com', password='password123',
+            first_name='Async', last_name='User',
+        )
+        self.project = Project.objects.create(owner=self.user, title='Garden')
+        for i in range(25):
+            Task.objects.create(owner=self.user, project=self.project if i % 2 else None, title=f'Task {i}')
+        self.async_client.force_login(self.user)
+
+    async def test_task_list_matches_sync_view(self):
+        for query in ({}, {'page': 2}, {'page': 'last'}, {'paginate': 'cursor', 'count': 1}, {'q': 'Task 1'}):
+            with self.subTest(query=query):
+                expected = await self.async_client.get(reverse('tasks:task_list'), query)
+                response = await self.async_client.get(reverse('tasks:async_task_list'), query)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    [task.pk for task in response.context['tasks']],
+                    [task.pk for task in expected.context['tasks']],
+                )
+        response = await self.async_client.get(reverse('tasks:async_task_list'), {'page': 9})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_task_list_revalidates_with_304(self):
+        url = reverse('tasks:async_task_list')
+        await self.async_client.get(url)
+        response = await self.async_client.get(url)
+        response = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_project_detail_is_owner_scoped(self):
+        response = await self.async_client.get(reverse('tasks:async_project_detail', args=[self.project.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['tasks']), 12)
+        other = await get_user_model().objects.acreate(username='other', email='other@example.com')
+        project = await Project.objects.acreate(owner=other, title='Secret')
+        response = await self.async_client.get(reverse('tasks:async_project_detail', args=[project.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_quick_add(self):
+        url = reverse('tasks:async_parse_create_task')
+        response = await self.async_client.post(url, {'text': 'Prune roses #garden high priority'})
+        self.assertRedirects(response, reverse('tasks:task_list'), fetch_redirect_response=False)
+        task = await Task.objects.select_related('project').aget(title='Prune roses')
+        self.assertEqual((task.project, task.priority), (self.project, 'high'))
+        response = await self.async_client.post(url, {'text': 'Weed #orchard'})
+        response = await self.async_client.get(reverse('tasks:async_task_list'))
+        self.assertContains(response, 'Unknown project: orchard')
+
+    async def test_sampled_async_requests_are_profiled(self):
+        registry.reset()
+        with override_settings(TASKS_METRICS={'SAMPLE_RATE': 1.0, 'N_PLUS_ONE_THRESHOLD': 5}):
+            await self.async_client.get(reverse('tasks:async_task_list'))
+        stats = registry.get('tasks:async_task_list')
+        self.assertEqual(stats.sampled, 1)
+        self.assertGreater(stats.queries.sum, 0)
+
+    async def test_anonymous_users_are_sent_to_login(self):
+        await self.async_client.alogout()
+        for url in (reverse('tasks:async_task_list'), reverse('tasks:async_parse_create_task')):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 302)
+            self.assertIn(settings.LOGIN_URL, response['Location'])
+
+
+class APITest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='client', email='client@example.com', password='password123',
+            first_name='API', last_name='Client',
+        )
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(owner=self.user, title='Garden')
+        self.tasks = [
+            Task.objects.create(owner=self.user, project=self.project if i % 2 else None, title=f'Task {i}')
+            for i in range(5)
+        ]
+
+    def patch(self, url, data):
+        return self.client.patch(url, json.dumps(data), content_type='application/json')
+
+    def test_sparse_list_uses_values_and_cursor(self):
+        url = reverse('tasks:api_tasks')
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url, {'fields': 'title,status', 'limit': 3})
+        body = response.json()
+        self.assertEqual(body['results'], [
+            {'title': 'Task 4', 'status': 'todo'}, {'title': 'Task 3', 'status': 'todo'}, {'title': 'Task 2', 'status': 'todo'},
+        ])
+        select = [query['sql'] for query in captured if 'FROM "tasks_task"' in query['sql']][0]
+        self.assertNotIn('"tasks_task"."description"', select)
+        response = self.client.get(url, {'fields': 'title,status', 'limit': 3, 'cursor': body['next_cursor']})
+        self.assertEqual([row['title'] for row in response.json()['results']], ['Task 1', 'Task 0'])
+        self.assertIsNone(response.json()['next_cursor'])
+
+    def test_filters(self):
+        url = reverse('tasks:api_tasks')
+        response = self.client.get(url, {'project': self.project.pk, 'fields': 'title'})
+        self.assertEqual([row['title'] for row in response.json()['results']], ['Task 3', 'Task 1'])
+        response = self.client.get(url, {'project': 'none', 'fields': 'id,project'})
+        self.assertEqual(len(response.json()['results']), 3)
+        self.assertEqual(self.client.get(url, {'fields': 'owner'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'project': 'nope'}).status_code, 400)
+
+    def test_create_update_and_delete(self):
+        response = self.client.post(
+            reverse('tasks:api_tasks'), json.dumps({'title': 'Prune roses', 'priority': 'high', 'project': str(self.project.pk)}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        created = response.json()
+        self.assertEqual((created['priority'], created['project']), ('high', str(self.project.pk)))
+        url = reverse('tasks:api_task', args=[created['id']])
+        # An overdue task can still change status without resending its due date.
+        Task.objects.filter(pk=created['id']).update(due_date=timezone.localdate() - timedelta(days=3))
+        response = self.patch(url, {'status': 'done'})
+        self.assertEqual(response.json()['status'], 'done')
+        self.assertEqual(self.patch(url, {'title': ''}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'fields': 'title'}).json(), {'title': 'Prune roses'})
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.post(reverse('tasks:api_tasks'), json.dumps({}), content_type='application/json')
+        self.assertIn('title', response.json()['errors'])
+
+    def test_bulk_status_change_keeps_counters_and_etags(self):
+        self.client.get(reverse('tasks:task_list'))
+        etag = self.client.get(reverse('tasks:task_list'))['ETag']
+        ids = [str(task.pk) for task in self.tasks[:3]]
+        response = self.patch(reverse('tasks:api_tasks_bulk'), {'ids': ids + [str(uuid.uuid4())], 'status': 'done'})
+        self.assertEqual(response.json(), {'updated': 3})
+        self.assertEqual(Task.objects.filter(status='done').count(), 3)
+        self.assertEqual(dashboard(self.user)['totals']['done'], 3)
+        response = self.client.get(reverse('tasks:task_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        response = self.patch(reverse('tasks:api_tasks_bulk'), {'ids': ids, 'status': 'finished'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_other_users_rows_are_invisible(self):
+        other = get_user_model().objects.create_user(username='other', email='other@example.com', password='x')
+        task = Task.objects.create(owner=other, title='Private')
+        self.assertEqual(self.client.get(reverse('tasks:api_task', args=[task.pk])).status_code, 404)
+        response = self.patch(reverse('tasks:api_tasks_bulk'), {'ids': [str(task.pk)], 'status': 'done'})
+        self.assertEqual(response.json(), {'updated': 0})
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('tasks:api_tasks')).status_code, 401)
+
+    def test_projects(self):
+        response = self.client.post(
+            reverse('tasks:api_projects'), json.dumps({'title': 'Kitchen'}), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        titles = [row['title'] for row in self.client.get(reverse('tasks:api_projects'), {'fields': 'title'}).json()['results']]
+        self.assertEqual(titles, ['Kitchen', 'Garden'])
+        url = reverse('tasks:api_project', args=[self.project.pk])
+        self.assertEqual(self.patch(url, {'description': 'Back yard'}).json()['description'], 'Back yard')
+
+
+class TaskBulkViewTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='sprinter', email='sprinter@example.com', password='password123',
+            first_name='Bulk', last_name='Editor',
+        )
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(owner=self.user, title='Sprint')
+        self.tasks = [
+            Task.objects.create(owner=self.user, title=f'Write report {i}' if i % 2 else f'Call supplier {i}')
+            for i in range(6)
+        ]
+
+    def bulk(self, data, query=''):
+        return self.client.post(reverse('tasks:task_bulk') + query, data, follow=True)
+
+    def test_mark_selected_done_with_one_update(self):
+        other = get_user_model().objects.create_user(username='other', email='other@example.com', password='x')
+        private = Task.objects.create(owner=other, title='Private')
+        before = Task.objects.get(pk=self.tasks[0].pk).updated_at
+        ids = [task.pk for task in self.tasks[:3]] + [private.pk]
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.post(reverse('tasks:task_bulk'), {'action': 'done', 'tasks': ids})
+        self.assertRedirects(response, reverse('tasks:task_list'), fetch_redirect_response=False)
+        updates = [query['sql'] for query in captured if query['sql'].startswith('UPDATE "tasks_task"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(Task.objects.filter(owner=self.user, status='done').count(), 3)
+        self.assertEqual(Task.objects.get(pk=private.pk).status, 'todo')
+        self.assertGreater(Task.objects.get(pk=self.tasks[0].pk).updated_at, before)
+        self.assertEqual(dashboard(self.user)['totals']['done'], 3)
+        messages = [str(message) for message in self.client.get(reverse('tasks:task_list')).context['messages']]
+        self.assertEqual(messages, ["3 tasks marked done."])
+
+    def test_delete_all_matching_filter(self):
+        response = self.bulk({'action': 'delete', 'all_matching': 'on'}, '?q=report')
+        self.assertEqual(response.redirect_chain[-1][0], reverse('tasks:task_list') + '?q=report')
+        self.assertContains(response, "3 tasks deleted.")
+        self.assertEqual(Task.objects.filter(owner=self.user).count(), 3)
+        self.assertFalse(get_search_backend().search(Task.objects.all(), 'report').exists())
+        self.assertEqual(dashboard(self.user)['totals']['total'], 3)
+        self.assertEqual(TaskCounter.objects.get(owner=self.user).count, 3)
+
+    def test_move_and_reprioritize(self):
+        ids = [task.pk for task in self.tasks[:2]]
+        self.assertContains(self.bulk({'action': 'move', 'tasks': ids, 'project': self.project.pk}), "2 tasks moved.")
+        self.assertEqual(self.project.tasks.count(), 2)
+        self.bulk({'action': 'priority', 'all_matching': 'on', 'priority': 'high'}, f'?project={self.project.pk}')
+        self.assertEqual(set(Task.objects.filter(priority='high').values_list('pk', flat=True)), set(ids))
+        self.bulk({'action': 'move', 'tasks': ids[:1]})
+        self.assertEqual(self.project.tasks.count(), 1)
+        rows = dashboard(self.user)['projects']
+        self.assertEqual([(row['project'].title, row['total'], row['high']) for row in rows if row['project']], [('Sprint', 1, 1)])
+
+    def test_all_matching_is_the_listed_selection(self):
+        for task in self.tasks[:4]:
+            task.project = self.project
+            task.save()
+        Task.objects.filter(pk=self.tasks[0].pk).update(status='in_progress')
+        query = f'?project={self.project.pk}&status=todo&q=report'
+        listed = {row.pk for row in self.client.get(reverse('tasks:task_list') + query).context['tasks']}
+        self.assertEqual(listed, {self.tasks[1].pk, self.tasks[3].pk})
+        self.bulk({'action': 'priority', 'all_matching': 'on', 'priority': 'high'}, query)
+        self.assertEqual(set(Task.objects.filter(priority='high').values_list('pk', flat=True)), listed)
+
+    def test_rows_are_locked_between_the_read_and_the_update(self):
+        select_for_update = QuerySet.select_for_update
+        locked = []
+
+        def lock(queryset, *args, **kwargs):
+            locked.append(kwargs)
+            # Another transaction editing a selected row now waits for this one
+            # to commit, and then moves the counters from the updated row.
+            def edit():
+                task = Task.objects.get(pk=self.tasks[0].pk)
+                task.status = 'in_progress'
+                task.save()
+            transaction.on_commit(edit)
+            return select_for_update(queryset, *args, **kwargs)
+
+        ids = [task.pk for task in self.tasks[:3]]
+        with patch.object(QuerySet, 'select_for_update', lock), self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(update_tasks(Task.objects.filter(pk__in=ids), status='done'), 3)
+        self.assertEqual(locked, [{'of': ('self',)}])
+        self.assertEqual(Task.objects.get(pk=self.tasks[0].pk).status, 'in_progress')
+        counted = {(c.project_id, c.status, c.priority): c.count for c in TaskCounter.objects.filter(count__gt=0)}
+        self.assertEqual(counted, {(None, 'todo', 'medium'): 3, (None, 'done', 'medium'): 2, (None, 'in_progress', 'medium'): 1})
+        self.assertFalse(Change.objects.filter(action=Change.RESET).exists())
+
+    def test_invalid_requests(self):
+        self.assertContains(self.bulk({'action': 'done'}), "Select at least one task.")
+        self.assertContains(self.bulk({'action': 'priority', 'tasks': [self.tasks[0].pk]}), "Choose a priority.")
+        self.assertContains(self.bulk({'action': 'done', 'tasks': ['nope']}), "Select valid tasks.")
+        self.assertEqual(self.client.get(reverse('tasks:task_bulk')).status_code, 405)
+        self.assertFalse(Task.objects.filter(status='done').exists())
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='queued', email='queued@example.com', password='password123',
+            first_name='Job', last_name='Owner',
+        )
+        self.client.force_login(self.user)
+
+    def test_claims_by_priority_and_runs(self):
+        low = jobs.enqueue('tasks.quick_add', {'text': 'Water plants'}, owner=self.user)
+        high = jobs.enqueue('tasks.quick_add', {'text': 'Pay rent tomorrow high priority'}, owner=self.user, priority=10)
+        jobs.enqueue('tasks.quick_add', {'text': 'Later'}, owner=self.user, priority=20, delay=60)
+        claimed = jobs.claim('worker-1', limit=1)
+        self.assertEqual([job.pk for job in claimed], [high.pk])
+        self.assertEqual(jobs.claim('worker-2', limit=5)[0].pk, low.pk)
+        job = jobs.run(claimed[0])
+        self.assertEqual(job.status, Job.DONE)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_by), (Job.DONE, 1, ''))
+        task = Task.objects.get(pk=job.result['task'])
+        self.assertEqual((task.owner, task.priority), (self.user, 'high'))
+        with self.assertRaises(ValueError):
+            jobs.enqueue('tasks.nothing')
+
+    def test_retries_with_backoff_then_fails(self):
+        calls = []
+
+        def flaky(job):
+            calls.append(job.attempts)
+            raise ConnectionError("parser unavailable")
+
+        with patch.dict(jobs.handlers, {'test.flaky': flaky}):
+            job = jobs.enqueue('test.flaky', max_attempts=2)
+            jobs.run(jobs.claim('worker')[0])
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+            self.assertGreater(job.run_after, timezone.now())
+            self.assertIn('parser unavailable', job.error)
+            self.assertEqual(jobs.claim('worker'), [])
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            jobs.run(jobs.claim('worker')[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, calls), (Job.FAILED, [1, 2]))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_invalid_input_fails_without_retry(self):
+        job = jobs.enqueue('tasks.quick_add', {'text': 'Plan trip #nowhere'}, owner=self.user)
+        job = jobs.run(jobs.claim('worker')[0])
+        self.assertEqual((job.status, job.error), (Job.FAILED, "Unknown project: nowhere"))
+        self.assertFalse(Task.objects.exists())
+
+    def test_requeues_jobs_of_dead_workers(self):
+        stale = timezone.now() - timedelta(seconds=jobs.get_config('STALE_AFTER') + 1)
+        retry = jobs.enqueue('tasks.recount')
+        spent = jobs.enqueue('tasks.recount', max_attempts=1)
+        Job.objects.update(status=Job.RUNNING, locked_by='gone', locked_at=stale, heartbeat_at=stale, attempts=1)
+        self.assertEqual(jobs.requeue_stale(), 2)
+        retry.refresh_from_db()
+        spent.refresh_from_db()
+        self.assertEqual((retry.status, retry.locked_by), (Job.QUEUED, ''))
+        self.assertEqual(spent.status, Job.FAILED)
+
+    @override_settings(TASKS_JOBS={'DEFER_QUICK_ADD': True})
+    def test_deferred_quick_add_and_status_pages(self):
+        self.client.post(reverse('tasks:parse_create_task'), {'text': 'Book dentist'})
+        self.assertFalse(Task.objects.exists())
+        job = Job.objects.get()
+        self.assertEqual((job.name, job.owner, job.priority), ('tasks.quick_add', self.user, 10))
+        self.assertContains(self.client.get(reverse('tasks:job_list')), reverse('tasks:job_detail', args=[job.pk]))
+        jobs.run(jobs.claim('worker')[0])
+        self.assertContains(self.client.get(reverse('tasks:job_detail', args=[job.pk])), 'Book dentist')
+        response = self.client.get(reverse('tasks:api_job', args=[job.pk]), {'fields': 'status,result'})
+        self.assertEqual(response.json()['status'], 'done')
+        other = get_user_model().objects.create_user(username='other', email='other@example.com', password='x')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse('tasks:job_detail', args=[job.pk])).status_code, 404)
+
+    def test_deferred_import(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        with override_settings(MEDIA_ROOT=media.name):
+            upload = SimpleUploadedFile('tasks.csv', b'title,priority\nFirst,high\n,low\n')
+            response = self.client.post(reverse('tasks:task_import'), {'file': upload, 'defer': '1'})
+            self.assertEqual(response.status_code, 202)
+            job = Job.objects.get(pk=response.json()['job'])
+            self.assertEqual(job.max_attempts, 1)
+            self.assertEqual(set(job.payload), {'path', 'format', 'create_projects'})
+            self.assertTrue(default_storage.exists(job.payload['path']))
+            job = jobs.run(jobs.claim('worker')[0])
+            self.assertEqual((job.result['created'], job.result['error_count']), (1, 1))
+            self.assertFalse(default_storage.exists(job.payload['path']))
+
+            upload = SimpleUploadedFile('tasks.csv', b'title\n\xff\xfe\nSecond\n')
+            self.client.post(reverse('tasks:task_import'), {'file': upload, 'defer': '1'})
+            job = jobs.run(jobs.claim('worker')[0])
+            self.assertEqual((job.status, job.result['created'], job.result['error_count']), (Job.DONE, 1, 1))
+            self.assertFalse(default_storage.exists(job.payload['path']))
+
+
+class InlineExecutor:
+    """Runs each job as it is submitted: the in-memory test database cannot take writes from pool threads."""
+
+    def submit(self, function, *args):
+        from concurrent.futures import Future
+
+        future = Future()
+        future.set_result(function(*args))
+        return future
+
+    def shutdown(self):
+        pass
+
+
+class RunJobsCommandTest(TestCase):
+    def test_worker_drains_the_queue(self):
+        user = get_user_model().objects.create_user(username='worker', email='worker@example.com', password='x')
+        for i in range(6):
+            jobs.enqueue('tasks.quick_add', {'text': f'Errand {i}'}, owner=user, priority=i)
+        jobs.enqueue('tasks.quick_add', {'text': 'Errand #missing'}, owner=user)
+        out = StringIO()
+        with patch.object(jobs.Worker, 'get_executor', lambda worker: InlineExecutor()), \
+                patch('apps.tasks.jobs.close_old_connections'):
+            call_command('run_jobs', '--once', '--concurrency', '2', '--poll', '0.01', stdout=out)
+        self.assertIn('Ran 6 done, 1 failed.', out.getvalue())
+        titles = Task.objects.filter(owner=user).order_by('created_at').values_list('title', flat=True)
+        self.assertEqual(list(titles), [f'Errand {i}' for i in reversed(range(6))])
+
+    @override_settings(TASKS_JOBS={'HEARTBEAT': 0})
+    def test_heartbeats_keep_a_long_job_past_the_stale_window(self):
+        from concurrent.futures import Future
+        from types import SimpleNamespace
+
+        user = get_user_model().objects.create_user(username='worker', email='worker@example.com', password='x')
+        job = jobs.enqueue('tasks.recount', owner=user, max_attempts=1)
+        real_now = timezone.now
+        elapsed = [timedelta(0)]
+        pending = []
+
+        class DeferredExecutor(InlineExecutor):
+            def submit(self, function, *args):
+                future = Future()
+                pending.append((future, function, args))
+                return future
+
+        def wait(futures, timeout=None, return_when=None):
+            if not elapsed[0]:
+                # The handler is still running when STALE_AFTER has passed.
+                elapsed[0] = timedelta(seconds=jobs.get_config('STALE_AFTER') + 1)
+                return SimpleNamespace(done=set())
+            for future, function, args in pending:
+                future.set_result(function(*args))
+            return SimpleNamespace(done=set(futures))
+
+        with patch.object(jobs.Worker, 'get_executor', lambda worker: DeferredExecutor()), \
+                patch('apps.tasks.jobs.close_old_connections'), patch('apps.tasks.jobs.wait', wait), \
+                patch.object(timezone, 'now', lambda: real_now() + elapsed[0]):
+            counts = jobs.Worker(poll_interval=0.01).run(once=True)
+        job.refresh_from_db()
+        self.assertEqual((counts['done'], job.status, job.attempts), (1, Job.DONE, 1))
+        self.assertIn('counters', job.result)
+
+
+class AgendaTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='planner', email='planner@example.com', password='password123',
+            first_name='Agenda', last_name='Reader',
+        )
+        self.other = get_user_model().objects.create_user(username='other', email='other@example.com', password='x')
+        self.client.force_login(self.user)
+        today = timezone.localdate()
+        for owner in (self.user, self.other):
+            for offset, status in ((-3, 'todo'), (-1, 'done'), (0, 'in_progress'), (2, 'todo'), (20, 'todo')):
+                Task.objects.create(owner=owner, title=f'{owner.username} {offset}', status=status,
+                                    due_date=today + timedelta(days=offset))
+            Task.objects.create(owner=owner, title=f'{owner.username} undated')
+
+    def test_scan_yields_whole_owners_through_the_partial_index(self):
+        today = timezone.localdate()
+        chunks = list(agenda.scan(today - timedelta(days=7), today + timedelta(days=7), batch_size=1))
+        self.assertEqual([owner_id for owner_id, rows in chunks], [self.user.pk, self.other.pk])
+        self.assertEqual([row['title'] for row in chunks[0][1]], ['planner -3', 'planner 0', 'planner 2'])
+        if connection.vendor == 'sqlite':
+            plan = agenda.owner_counts(today, today).explain()
+            self.assertIn('task_open_due_idx', plan)
+
+    def test_agenda_view(self):
+        response = self.client.get(reverse('tasks:agenda'))
+        self.assertEqual([task.title for task in response.context['overdue']], ['planner -3'])
+        self.assertEqual([task.title for task in response.context['due_today']], ['planner 0'])
+        self.assertEqual([task.title for task in response.context['upcoming']], ['planner 2'])
+        response = self.client.get(reverse('tasks:agenda'), {'days': 30})
+        self.assertContains(response, 'planner 20')
+        self.assertNotContains(response, 'other')
+
+    def test_scan_agenda_queues_reminders(self):
+        out = StringIO()
+        call_command('scan_agenda', '--days', '3', '--overdue', '7', '--remind', stdout=out)
+        self.assertIn('Found 6 open tasks of 2 users', out.getvalue())
+        job = Job.objects.get(owner=self.user)
+        self.assertEqual([task['title'] for task in job.payload['tasks']], ['planner -3', 'planner 0', 'planner 2'])
+        job = jobs.run(jobs.claim('worker', limit=2)[0])
+        self.assertEqual(job.result['tasks'], 3)
+        self.assertEqual(mail.outbox[0].subject, "3 tasks due soon")
+        self.assertIn('planner 2', mail.outbox[0].body)
+
+
+class TaskRowTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='lister', email='lister@example.com', password='password123',
+            first_name='Row', last_name='Reader',
+        )
+        self.project = Project.objects.create(owner=self.user, title='Errands')
+        self.client.force_login(self.user)
+
+    def add_tasks(self, count):
+        Task.objects.bulk_create([
+            Task(owner=self.user, project=self.project if i % 2 else None, title=f'Task {i}',
+                 description='x' * 500 if i % 2 else 'Short', priority='high')
+            for i in range(count)
+        ])
+
+    def test_list_pages_cost_the_same_queries_at_any_size(self):
+        self.add_tasks(3)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('tasks:task_list'))
+        cache.clear()
+        self.add_tasks(20)
+        with CaptureQueriesContext(connection) as full:
+            response = self.client.get(reverse('tasks:task_list'))
+        self.assertEqual(len(full), len(small))
+        rows = response.context['tasks']
+        self.assertEqual(len(rows), 20)
+        self.assertIsInstance(rows[0], TaskRow)
+        self.assertEqual({row.project_title for row in rows}, {'Errands', None})
+        self.assertContains(response, 'Errands')
+        self.assertContains(response, 'High')
+        self.assertFalse(any('description' in query['sql'] for query in full.captured_queries))
+
+    def test_excerpt_is_cut_in_sql(self):
+        self.add_tasks(2)
+        queryset = Task.objects.filter(owner=self.user).order_by('title')
+        self.assertEqual([row.excerpt for row in task_rows(queryset)], [None, None])
+        short, long = task_rows(queryset, excerpt=True)
+        self.assertEqual(short.excerpt, 'Short')
+        self.assertEqual(long.excerpt, 'x' * EXCERPT_LENGTH + '…')
+        response = self.client.get(reverse('tasks:task_list'), {'excerpt': 1, 'paginate': 'cursor'})
+        self.assertContains(response, 'x' * EXCERPT_LENGTH + '…')
+
+    async def test_async_list_and_project_detail(self):
+        await sync_to_async(self.add_tasks)(4)
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('tasks:async_task_list'))
+        self.assertCountEqual([row.project_title for row in response.context['tasks']], ['Errands', None] * 2)
+        response = await self.async_client.get(reverse('tasks:async_project_detail', args=[self.project.pk]))
+        self.assertEqual([type(row) for row in response.context['tasks']], [TaskRow, TaskRow])
+
+class FragmentCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='renderer', email='renderer@example.com', password='password123',
+            first_name='Fragment', last_name='Cache',
+        )
+        self.project = Project.objects.create(owner=self.user, title='Kitchen')
+        self.tasks = [Task.objects.create(owner=self.user, project=self.project, title=f'Task {i}') for i in range(4)]
+        self.client.force_login(self.user)
+        metrics.reset()
+
+    def fragment_counts(self, name):
+        counts = metrics.snapshot()
+        return counts.get('hit', {}).get(f'fragment.{name}', 0), counts.get('miss', {}).get(f'fragment.{name}', 0)
+
+    def rows(self, response):
+        return response.content.split(b'<ul class="list-group">')[1].split(b'</ul>')[0]
+
+    def test_only_changed_rows_are_rendered(self):
+        url = reverse('tasks:task_list')
+        first = self.client.get(url)
+        self.assertEqual(self.fragment_counts('task_row'), (0, 4))
+        self.tasks[0].title = 'Renamed'
+        self.tasks[0].save()
+        response = self.client.get(url)
+        self.assertEqual(self.fragment_counts('task_row'), (3, 5))
+        self.assertContains(response, 'Renamed')
+        self.assertEqual(self.rows(response).replace(b'Renamed', b'Task 0'), self.rows(first))
+
+    def test_one_round_trip_per_page(self):
+        self.client.get(reverse('tasks:task_list'))
+        backend = type(get_cache())
+        with patch.object(backend, 'get_many', autospec=True, side_effect=backend.get_many) as get_many:
+            self.client.get(reverse('tasks:task_list'), {'page': 1})
+        self.assertEqual(get_many.call_count, 1)
+
+    def test_keys_follow_the_project(self):
+        self.client.get(reverse('tasks:project_list'))
+        self.project.title = 'Pantry'
+        self.project.save()
+        response = self.client.get(reverse('tasks:task_list'))
+        self.assertEqual(self.rows(response).count(b'Pantry'), 4)
+        response = self.client.get(reverse('tasks:project_list'))
+        self.assertContains(response, 'Pantry')
+        Task.objects.create(owner=self.user, project=self.project, title='Shelves')
+        self.assertContains(self.client.get(reverse('tasks:project_list')), 'Shelves')
+        self.assertEqual(self.fragment_counts('project_card'), (0, 3))
+
+    def test_disabled(self):
+        cached = self.rows(self.client.get(reverse('tasks:task_list')))
+        with override_settings(TASKS_FRAGMENTS={'ENABLED': False}):
+            self.assertEqual(self.rows(self.client.get(reverse('tasks:task_list'), {'page': 1})), cached)
+        self.assertEqual(self.fragment_counts('task_row'), (0, 8))
+
+    async def test_async_task_list(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('tasks:async_task_list'))
+        self.assertContains(response, 'Task 3')
+        response = await self.async_client.get(reverse('tasks:async_task_list'))
+        self.assertEqual(self.fragment_counts('task_row'), (4, 4))
+
+
+class TaskGraphTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='planner', email='planner@example.com', password='password123',
+            first_name='Graph', last_name='Walker',
+        )
+        self.project = Project.objects.create(owner=self.user, title='Move house')
+        self.client.force_login(self.user)
+
+    def add(self, title, **kwargs):
+        return Task.objects.create(owner=self.user, project=self.project, title=title, **kwargs)
+
+    def titles(self, tasks):
+        return sorted(task.title for task in tasks)
+
+    def test_subtasks(self):
+        root = self.add('Pack')
+        kitchen = self.add('Kitchen', parent=root)
+        plates = self.add('Plates', parent=kitchen)
+        self.add('Books', parent=root)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.titles(graph.descendants(root)), ['Books', 'Kitchen', 'Plates'])
+        with self.assertNumQueries(1):
+            self.assertEqual(graph.ancestors(plates), [root, kitchen])
+        self.assertEqual(graph.ancestors(root), [])
+
+    def test_parent_loops_are_refused(self):
+        root = self.add('Pack')
+        child = self.add('Kitchen', parent=root)
+        grandchild = self.add('Plates', parent=child)
+        root.parent = grandchild
+        with self.assertRaisesMessage(graph.GraphError, "its own subtask"):
+            root.save()
+        child.parent = child
+        with self.assertRaises(graph.GraphError):
+            child.save()
+        other = get_user_model().objects.create_user(username='other', email='other@example.com', password='x')
+        with self.assertRaisesMessage(graph.GraphError, "does not exist"):
+            Task.objects.create(owner=other, title='Borrowed', parent=root)
+        grandchild.parent = root
+        grandchild.save()
+        self.assertEqual(graph.ancestors(grandchild), [root])
+
+    def test_blockers(self):
+        boxes, packing, van, unloading = [self.add(title) for title in ('Boxes', 'Packing', 'Van', 'Unloading')]
+        graph.add_blocker(boxes, packing)
+        graph.add_blocker(packing, unloading)
+        graph.add_blocker(van, unloading)
+        graph.add_blocker(van, unloading)
+        self.assertEqual(TaskDependency.objects.count(), 3)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.titles(graph.blocked_by(boxes)), ['Packing', 'Unloading'])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.titles(graph.blockers(unloading)), ['Boxes', 'Packing', 'Van'])
+        with self.assertRaisesMessage(graph.GraphError, "Boxes already blocks Unloading"):
+            graph.add_blocker(unloading, boxes)
+        with self.assertRaises(graph.GraphError):
+            graph.add_blocker(boxes, boxes)
+        self.assertTrue(graph.remove_blocker(packing, unloading))
+        self.assertFalse(graph.remove_blocker(packing, unloading))
+        self.assertEqual(self.titles(graph.blocked_by(boxes)), ['Packing'])
+
+    def test_critical_path(self):
+        boxes, packing, van, loading, driving, cleaning = [
+            self.add(title) for title in ('Boxes', 'Packing', 'Van', 'Loading', 'Driving', 'Cleaning')
+        ]
+        for blocker, blocked in ((boxes, packing), (packing, loading), (van, loading), (loading, driving),
+                                 (boxes, cleaning), (van, driving)):
+            graph.add_blocker(blocker, blocked)
+        with self.assertNumQueries(1):
+            path = graph.critical_path(self.project)
+        self.assertEqual(path, [boxes.pk, packing.pk, loading.pk, driving.pk])
+        # Packing and Van now both head a chain of three; the earlier created one wins.
+        boxes.status = 'done'
+        boxes.save()
+        started = timezone.now()
+        Task.objects.filter(pk=packing.pk).update(created_at=started)
+        Task.objects.filter(pk=van.pk).update(created_at=started + timedelta(minutes=1))
+        self.assertEqual(graph.critical_path(self.project), [packing.pk, loading.pk, driving.pk])
+        Task.objects.filter(pk=packing.pk).update(created_at=started + timedelta(minutes=2))
+        self.assertEqual(graph.critical_path(self.project), [van.pk, loading.pk, driving.pk])
+        Task.objects.filter(pk=packing.pk).update(created_at=started)
+        response = self.client.get(reverse('tasks:api_project_critical_path', args=[self.project.pk]), {'fields': 'title'})
+        self.assertEqual(response.json(), {'results': [{'title': 'Packing'}, {'title': 'Loading'}, {'title': 'Driving'}]})
+
+    def test_deletes_take_subtasks_and_edges(self):
+        root = self.add('Pack')
+        kitchen = self.add('Kitchen', parent=root)
+        plates = self.add('Plates', parent=kitchen)
+        van = self.add('Van')
+        graph.add_blocker(plates, van)
+        kitchen.delete()
+        self.assertEqual(self.titles(Task.objects.all()), ['Pack', 'Van'])
+        self.assertFalse(TaskDependency.objects.exists())
+        kitchen = self.add('Kitchen', parent=root)
+        graph.add_blocker(van, self.add('Plates', parent=kitchen))
+        self.assertEqual(delete_tasks(Task.objects.filter(pk=root.pk)), 3)
+        self.assertEqual(self.titles(Task.objects.all()), ['Van'])
+        self.assertFalse(TaskDependency.objects.exists())
+        self.assertEqual(sum(TaskCounter.objects.values_list('count', flat=True)), 1)
+
+    def test_api(self):
+        root = self.add('Pack')
+        response = self.client.post(
+            reverse('tasks:api_tasks'), json.dumps({'title': 'Kitchen', 'parent': str(root.pk)}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['parent'], str(root.pk))
+        child = response.json()['id']
+        response = self.client.patch(
+            reverse('tasks:api_task', args=[root.pk]), json.dumps({'parent': child}), content_type='application/json'
+        )
+        self.assertEqual(response.json()['errors']['parent'][0]['code'], 'cycle')
+        response = self.client.get(reverse('tasks:api_task_subtasks', args=[root.pk]), {'fields': 'title'})
+        self.assertEqual(response.json()['results'], [{'title': 'Kitchen'}])
+
+        url = reverse('tasks:api_task_blockers', args=[child])
+        response = self.client.post(url, json.dumps({'blocker': str(root.pk)}), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.client.get(url, {'fields': 'title'}).json()['results'], [{'title': 'Pack'}])
+        response = self.client.get(reverse('tasks:api_task_blocked', args=[root.pk]), {'fields': 'title'})
+        self.assertEqual(response.json()['results'], [{'title': 'Kitchen'}])
+        response = self.client.post(
+            reverse('tasks:api_task_blockers', args=[root.pk]), json.dumps({'blocker': child}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        url = reverse('tasks:api_task_blocker', args=[child, root.pk])
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+
+
+@override_settings(TASKS_CHANGES={'TIMEOUT': 0})
+class ChangeLogTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='watcher', email='watcher@example.com', password='password123',
+            first_name='Change', last_name='Watcher',
+        )
+        self.project = Project.objects.create(owner=self.user, title='Garden')
+        self.task = Task.objects.create(owner=self.user, project=self.project, title='Water')
+
+    def logged(self, **filters):
+        return list(Change.objects.filter(**filters).values_list('model', 'action', 'data'))
+
+    def test_saves_deletes_and_bulk_writes_are_logged(self):
+        self.task.status = 'done'
+        self.task.save()
+        self.assertEqual(self.logged(object_id=self.task.pk)[1][:2], ('task', 'updated'))
+        self.assertEqual(self.logged(object_id=self.task.pk)[1][2]['status'], 'done')
+        tasks = create_tasks([Task(owner=self.user, title=f'Bulk {i}') for i in range(3)])
+        update_tasks(Task.objects.filter(owner=self.user, title__startswith='Bulk'), priority='high')
+        delete_tasks(Task.objects.filter(pk=tasks[0].pk))
+        actions = [action for model, action, data in self.logged(object_id=tasks[0].pk)]
+        self.assertEqual(actions, ['created', 'updated', 'deleted'])
+        self.assertEqual(self.logged(object_id=tasks[1].pk)[1][2]['priority'], 'high')
+        project_id = self.project.pk
+        self.project.delete()
+        model, action, data = self.logged(object_id=self.task.pk)[-1]
+        self.assertEqual((model, action, data['project']), ('task', 'updated', None))
+        self.assertEqual(self.logged(object_id=project_id)[-1], ('project', 'deleted', None))
+        # Nothing is logged for the rows of a deleted owner.
+        self.user.delete()
+        self.assertFalse(Change.objects.exists())
+
+    async def read(self, **headers):
+        response = await self.async_client.get(reverse('tasks:change_stream'), headers=headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join([chunk async for chunk in response.streaming_content]).decode()
+
+    async def test_stream_resumes_after_last_event_id(self):
+        await self.async_client.aforce_login(self.user)
+        first = await Change.objects.aearliest('id')
+        body = await self.read(**{'Last-Event-ID': str(first.id)})
+        self.assertNotIn(f'id: {first.id}\n', body)
+        self.assertIn('event: task', body)
+        self.assertNotIn('event: project', body)
+        self.task.title = 'Water the roses'
+        await self.task.asave()
+        body = await self.read()
+        self.assertIn('event: ready', body)
+        self.assertNotIn('Water the roses', body)
+        latest = await Change.objects.order_by('-id').afirst()
+        body = await self.read(**{'Last-Event-ID': str(latest.id - 1)})
+        self.assertIn(f'id: {latest.id}\nevent: task\ndata: {{"action":"updated","id":"{self.task.pk}"', body)
+
+    def test_compact_and_prune(self):
+        for title in ('Water', 'Water daily', 'Water twice'):
+            self.task.title = title
+            self.task.save()
+        first = Change.objects.earliest('id')
+        Change.objects.update(created_at=timezone.now() - timedelta(days=2))
+        out = StringIO()
+        call_command('compact_changes', '--compact-after', '1', stdout=out)
+        self.assertIn('collapsed 3 changes of 1 users', out.getvalue())
+        model, action, data = self.logged(object_id=self.task.pk)[0]
+        self.assertEqual((action, data['title'], data['project']), ('created', 'Water twice', str(self.project.pk)))
+        call_command('compact_changes', '--retention', '1', stdout=out)
+        self.assertFalse(Change.objects.exists())
+        self.async_client.force_login(self.user)
+        self.assertIn('event: reset', async_to_sync(self.read)(**{'Last-Event-ID': str(first.id)}))
+
+
+@override_settings(TASKS_SYNC={'SETTLE': 0, 'BATCH_SIZE': 2})
+class DeltaSyncTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='offline', email='offline@example.com', password='password123',
+            first_name='Delta', last_name='Sync',
+        )
+        self.project = Project.objects.create(owner=self.user, title='Garden')
+        self.tasks = [Task.objects.create(owner=self.user, project=self.project, title=f'Task {i}') for i in range(5)]
+        self.client.force_login(self.user)
+
+    def sync(self, token=None, **headers):
+        response = self.client.get(reverse('tasks:api_sync'), {'token': token} if token else {}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_full_then_delta(self):
+        data = self.sync()
+        self.assertTrue(data['reset'])
+        self.assertEqual(len(data['tasks']), 5)
+        self.assertEqual([project['title'] for project in data['projects']], ['Garden'])
+        data = self.sync(data['token'])
+        self.assertEqual((data['reset'], data['tasks'], data['projects']), (False, [], []))
+        token = data['token']
+
+        self.tasks[0].title = 'Renamed'
+        self.tasks[0].save()
+        task_id, project_id = self.tasks[1].pk, self.project.pk
+        self.tasks[1].delete()
+        update_tasks(Task.objects.filter(pk=self.tasks[2].pk), status='done')
+        self.project.delete()
+        # Session, user, the log's bounds, its deletions and last settled id,
+        # then the projects and the four changed tasks, two at a time.
+        with self.assertNumQueries(10):
+            data = self.sync(token)
+        self.assertFalse(data['reset'])
+        self.assertEqual(data['deleted'], {'tasks': [str(task_id)], 'projects': [str(project_id)]})
+        tasks = {task['id']: task for task in data['tasks']}
+        self.assertEqual(len(tasks), 4)
+        self.assertEqual(tasks[str(self.tasks[0].pk)]['title'], 'Renamed')
+        self.assertEqual(tasks[str(self.tasks[2].pk)]['status'], 'done')
+        self.assertTrue(all(task['project'] is None for task in tasks.values()))
+
+    def test_recent_writes_are_sent_again(self):
+        with override_settings(TASKS_SYNC={'SETTLE': 60}):
+            token = self.sync()['token']
+            self.assertEqual(len(self.sync(token)['tasks']), 5)
+
+    def test_compressed(self):
+        response = self.client.get(reverse('tasks:api_sync'), headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(b''.join(response.streaming_content)))['tasks']), 5)
+
+    def test_invalid_and_foreign_tokens(self):
+        token = self.sync()['token']
+        response = self.client.get(reverse('tasks:api_sync'), {'token': token + 'x'})
+        self.assertEqual(response.status_code, 400)
+        other = get_user_model().objects.create_user(username='other', email='other@example.com', password='x')
+        self.client.force_login(other)
+        response = self.client.get(reverse('tasks:api_sync'), {'token': token})
+        self.assertEqual(response.json(), {'error': "The token belongs to another user."})
+
+    def test_pruned_log_resets(self):
+        token = self.sync()['token']
+        self.tasks[0].delete()
+        Change.objects.update(created_at=timezone.now() - timedelta(days=30))
+        call_command('compact_changes', stdout=StringIO())
+        Task.objects.create(owner=self.user, title='After')
+        data = self.sync(token)
+        self.assertTrue(data['reset'])
+        self.assertEqual(len(data['tasks']), 5)
@@ -0,0 +1,168 @@
+"""
+Streaming bulk import and export of tasks as CSV or JSONL.
+
+Imports validate each row with the TaskForm rules, then write valid rows
+in ``bulk_create`` batches, one transaction per batch, so a bad row only
+costs its own entry in the error report. Exports stream rows straight
+from a server-side cursor, so memory stays flat whatever the row count.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .bulk import create_tasks
+from .forms import TaskRowForm
+from .models import Project
+
+FIELDS = ('title', 'description', 'due_date', 'priority', 'status', 'project')
+FORMATS = ('csv', 'jsonl')
+
+
+def guess_format(filename, default='csv'):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return extension if extension in FORMATS else default
+
+
+def decode_lines(stream, errors):
+    """
+    Yields the lines of a binary stream as text. A line that is not UTF-8
+    is yielded blank and ``(line_number, exception)`` appended to ``errors``.
+    """
+    for number, line in enumerate(stream, start=1):
+        try:
+            yield line.decode('utf-8-sig' if number == 1 else 'utf-8')
+        except UnicodeDecodeError:
+            errors.append((number, ValueError("The line is not UTF-8 text.")))
+            yield '\n'
+
+
+def read_rows(stream, fmt):
+    """
+    Yields ``(line_number, row)`` from a binary stream. A row that cannot
+    be decoded is yielded as an exception instance instead of a dict; CSV
+    the reader cannot parse ends the rows with its error.
+    """
+    errors = []
+    lines = decode_lines(stream, errors)
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        while True:
+            try:
+                row = next(reader, None)
+            except csv.Error as exc:
+                row = exc
+            # Lines that failed to decode come before the row read past them.
+            yield from errors
+            errors.clear()
+            if row is None:
+                return
+            yield reader.line_num, row
+            if isinstance(row, csv.Error):
+                return
+    elif fmt == 'jsonl':
+        for number, line in enumerate(lines, start=1):
+            if errors:
+                yield errors.pop()
+                continue
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield number, exc
+                continue
+            yield number, row if isinstance(row, dict) else ValueError("Expected a JSON object.")
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+class TaskImporter:
+    """Imports rows for one owner and collects a per-row error report."""
+
+    def __init__(self, owner, batch_size=500, create_projects=False, max_errors=1000):
+        self.owner = owner
+        self.batch_size = batch_size
+        self.create_projects = create_projects
+        self.max_errors = max_errors
+        self.projects = {project.title: project for project in Project.objects.filter(owner=owner)}
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def run(self, rows):
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.batch_size))
+            if not chunk:
+                break
+            tasks = [task for task in (self.build(number, row) for number, row in chunk) if task]
+            if tasks:
+                self.save(tasks)
+        return self.report()
+
+    def build(self, number, row):
+        if isinstance(row, Exception):
+            return self.reject(number, {'__all__': [str(row)]})
+        data = {field: str(row.get(field) or '').strip() for field in FIELDS}
+        data['priority'] = data['priority'].lower() or 'medium'
+        data['status'] = data['status'].lower() or 'todo'
+
+        project = None
+        if data['project']:
+            project = self.resolve_project(data['project'])
+            if project is None:
+                return self.reject(number, {'project': [f"Unknown project: {data['project']}"]})
+
+        form = TaskRowForm(data)
+        if not form.is_valid():
+            return self.reject(number, form.errors.get_json_data())
+        task = form.save(commit=False)
+        task.owner = self.owner
+        task.project = project
+        return task
+
+    def resolve_project(self, title):
+        project = self.projects.get(title)
+        if project is None and self.create_projects:
+            project = self.projects[title] = Project.objects.create(owner=self.owner, title=title)
+        return project
+
+    def reject(self, number, errors):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': number, 'errors': errors})
+        return None
+
+    def save(self, tasks):
+        create_tasks(tasks)
+        self.created += len(tasks)
+
+    def report(self):
+        return {'created': self.created, 'error_count': self.error_count, 'errors': self.errors}
+
+
+class Echo:
+    """File-like object whose write() returns the value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, fmt, chunk_size=2000):
+    """Yields ``queryset`` serialized as CSV or JSONL, in the import column layout."""
+    rows = queryset.values_list(
+        'title', 'description', 'due_date', 'priority', 'status', 'project__title'
+    ).iterator(chunk_size=chunk_size)
+    if fmt == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(FIELDS)
+        for row in rows:
+            yield writer.writerow(['' if value is None else value for value in row])
+    elif fmt == 'jsonl':
+        encoder = DjangoJSONEncoder()
+        for row in rows:
+            yield encoder.encode(dict(zip(FIELDS, row))) + '\n'
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
@@ -1,15 +1,43 @@
 from django.urls import path
-from . import views
+from . import api, async_views, views
 
 app_name = 'tasks'
 
 urlpatterns = [
     path('tasks/', views.TaskListView.as_view(), name='task_list'),
+    path('tasks/feed/', views.TaskFeedView.as_view(), name='task_feed'),
+    path('tasks/export/', views.TaskExportView.as_view(), name='task_export'),
+    path('tasks/import/', views.import_tasks, name='task_import'),
+    path('tasks/bulk/', views.TaskBulkView.as_view(), name='task_bulk'),
     path('tasks/create/', views.TaskCreateView.as_view(), name='task_create'),
     path('tasks/<uuid:pk>/', views.TaskDetailView.as_view(), name='task_detail'),
     path('tasks/<uuid:pk>/update/', views.TaskUpdateView.as_view(), name='task_update'),
     path('tasks/<uuid:pk>/delete/', views.TaskDeleteView.as_view(), name='task_delete'),
     path('projects/', views.ProjectListView.as_view(), name='project_list'),
     path('projects/<uuid:pk>/', views.ProjectDetailView.as_view(), name='project_detail'),
+    path('jobs/', views.JobListView.as_view(), name='job_list'),
+    path('jobs/<uuid:pk>/', views.JobDetailView.as_view(), name='job_detail'),
+    path('agenda/', views.AgendaView.as_view(), name='agenda'),
+    path('dashboard/', views.DashboardView.as_view(), name='dashboard'),
+    path('cache/stats/', views.cache_stats, name='cache_stats'),
+    path('metrics/', views.prometheus_metrics, name='metrics'),
     path('tasks/quick-add/', views.parse_create_task, name='parse_create_task'),
+    path('tasks/quick-add/batch/', views.parse_create_tasks, name='parse_create_tasks'),
+    path('api/tasks/', api.tasks, name='api_tasks'),
+    path('api/tasks/bulk/', api.tasks_bulk, name='api_tasks_bulk'),
+    path('api/tasks/<uuid:pk>/', api.task, name='api_task'),
+    path('api/tasks/<uuid:pk>/subtasks/', api.subtasks, name='api_task_subtasks'),
+    path('api/tasks/<uuid:pk>/blocked/', api.blocked, name='api_task_blocked'),
+    path('api/tasks/<uuid:pk>/blockers/', api.blockers, name='api_task_blockers'),
+    path('api/tasks/<uuid:pk>/blockers/<uuid:blocker_pk>/', api.blocker, name='api_task_blocker'),
+    path('api/jobs/<uuid:pk>/', api.job, name='api_job'),
+    path('api/sync/', api.sync, name='api_sync'),
+    path('api/projects/', api.projects, name='api_projects'),
+    path('api/projects/<uuid:pk>/', api.project, name='api_project'),
+    path('api/projects/<uuid:pk>/critical-path/', api.critical_path, name='api_project_critical_path'),
+    # Native async views for ASGI deployments; see async_views.py.
+    path('async/tasks/', async_views.TaskListView.as_view(), name='async_task_list'),
+    path('async/projects/<uuid:pk>/', async_views.ProjectDetailView.as_view(), name='async_project_detail'),
+    path('async/tasks/quick-add/', async_views.parse_create_task, name='async_parse_create_task'),
+    path('async/changes/', async_views.change_stream, name='change_stream'),
 ]
\ No newline at end of file
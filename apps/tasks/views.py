@@ -1,62 +1,268 @@
+import hmac
+import json
+import uuid
+
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.urls import reverse_lazy
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
-from django.db.models import Q
+from django.urls import reverse, reverse_lazy
+from django.views import View
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView
+from django.db.models import Prefetch, Q
+from django.core.files.storage import default_storage
 from django.core.paginator import Paginator
 from django.shortcuts import redirect
 from django.contrib import messages
+from django.core.serializers.json import DjangoJSONEncoder
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.template.defaultfilters import pluralize
+from django.template.loader import render_to_string
+from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.http import require_POST
+
+from .models import Job, Task, Project
+from .forms import TaskBulkForm, TaskForm, ProjectForm, TaskRowForm
+from .ai_parser import parse_task_text, parse_task_texts
+from .search import get_search_backend
+from .pagination import CachedPaginator, CursorPaginator, approximate_count
+from .counters import dashboard
+from .project_index import aget_project_index, get_project_index
+from .conditional import ConditionalGetMixin
+from .cache import aread_through, read_through
+from .cache_backends import metrics
+from .metrics import registry
+from .bulk import create_tasks, delete_tasks, update_tasks
+from .jobs import enqueue, get_config as get_job_config
+from .agenda import agenda
+from .rows import task_rows
+from .fragments import render_fragments
+from .transfer import FORMATS, TaskImporter, export_rows, guess_format, read_rows
+
+
+class TaskFilterMixin:
+    """Applies the status/priority/search query-string filters shared by the task views."""
+
+    search_placeholder = "Search tasks..."
+    filter_by_project = False  # Whether the filters, and the filter form, include the project
+
+    def filter_tasks(self, queryset):
+        project_id = self.request.GET.get('project')
+        status = self.request.GET.get('status')
+        priority = self.request.GET.get('priority')
+        search_query = self.request.GET.get('q')
+
+        if project_id and self.filter_by_project:
+            queryset = queryset.filter(project__id=project_id)
+        if status:
+            queryset = queryset.filter(status=status)
+        if priority:
+            queryset = queryset.filter(priority=priority)
+        if search_query:
+            queryset = get_search_backend().search(queryset, search_query)
+        return queryset
+
+    def get_task_queryset(self):
+        """The user's tasks as the task list filters and orders them."""
+        return self.filter_tasks(Task.objects.filter(owner=self.request.user)).order_by('-created_at', '-id')
+
+    def get_filter_context(self):
+        return {
+            'current_status': self.request.GET.get('status', ''),
+            'current_priority': self.request.GET.get('priority', ''),
+            'search_query': self.request.GET.get('q', ''),
+            'status_choices': Task.STATUS_CHOICES,
+            'priority_choices': Task.PRIORITY_CHOICES,
+        }
+
+    def get_filter_form_params(self):
+        fields = ('q', 'status', 'priority', 'project')
+        return {'path': self.request.path, **{field: self.request.GET.get(field, '') for field in fields}}
+
+    def render_filter_form(self, projects):
+        return render_to_string('tasks/filter_form.html', {
+            **self.get_filter_context(),
+            'current_project': self.request.GET.get('project', ''),
+            'project_choices': projects,
+            'search_placeholder': self.search_placeholder,
+            'clear_url': self.request.path,
+        })
+
+    def get_filter_form(self):
+        """The filter form's HTML, rendered once per owner generation and filter values."""
+        def render():
+            return self.render_filter_form(get_project_index(self.request.user) if self.filter_by_project else ())
+
+        return read_through(self.request.user, 'filter_form', render, self.get_filter_form_params())
+
+    async def aget_filter_form(self):
+        async def render():
+            projects = await aget_project_index(self.request.user) if self.filter_by_project else ()
+            return self.render_filter_form(projects)
+
+        return await aread_through(self.request.user, 'filter_form', render, self.get_filter_form_params())
+
+    def get_task_rows(self, queryset):
+        """``queryset`` as TaskRow tuples for a list page, with description excerpts on ``?excerpt=1``."""
+        return task_rows(queryset, excerpt=bool(self.request.GET.get('excerpt')))
+
 
-from .models import Task, Project
-from .forms import TaskForm, ProjectForm
-from .ai_parser import parse_task_text
+class OwnerCacheMixin:
+    """
+    Reads owner-scoped rows through the versioned cache in ``cache.py``,
+    keyed by the URL arguments and the full query string.
+    """
 
+    cache_namespace = None
 
-class TaskListView(LoginRequiredMixin, ListView):
+    def cached(self, name, compute, **params):
+        return read_through(self.request.user, f'{self.cache_namespace}.{name}', compute, self.cache_params(params))
+
+    async def acached(self, name, compute, **params):
+        namespace = f'{self.cache_namespace}.{name}'
+        return await aread_through(self.request.user, namespace, compute, self.cache_params(params))
+
+    def cache_params(self, params):
+        return {'kwargs': self.kwargs, 'query': sorted(self.request.GET.lists()), **params}
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        return CachedPaginator(
+            queryset, per_page, self.cached, orphans=orphans, allow_empty_first_page=allow_empty_first_page, **kwargs
+        )
+
+    def get_object(self, queryset=None):
+        get_object = super().get_object
+        return self.cached('object', lambda: get_object(queryset))
+
+
+class TaskListView(LoginRequiredMixin, ConditionalGetMixin, OwnerCacheMixin, TaskFilterMixin, ListView):
     model = Task
-    template_name = 'tasks/list.html'
+    template_name = 'tasks/task_list.html'
     context_object_name = 'tasks'
+    cache_namespace = 'task_list'
     paginate_by = 20
+    count_limit = 1000  # Rows counted for the approximate total in cursor mode
+    filter_by_project = True
 
     def get_queryset(self):
-        queryset = super().get_queryset().filter(owner=self.request.user)
+        return self.get_task_queryset()
 
-        # Filtering
-        status = self.request.GET.get('status')
-        priority = self.request.GET.get('priority')
-        project_id = self.request.GET.get('project')
+    def is_cursor_mode(self):
+        return self.request.GET.get('paginate') == 'cursor'
 
-        if status:
-            queryset = queryset.filter(status=status)
-        if priority:
-            queryset = queryset.filter(priority=priority)
-        if project_id:
-            queryset = queryset.filter(project__id=project_id)
+    def paginate_queryset(self, queryset, page_size):
+        queryset = self.get_task_rows(queryset)
+        if not self.is_cursor_mode():
+            return super().paginate_queryset(queryset, page_size)
+        cursor = self.request.GET.get('cursor')
+        page = self.cached('cursor_page', lambda: CursorPaginator(queryset, page_size).page(cursor))
+        return None, page, page.object_list, False
 
-        # Searching
-        search_query = self.request.GET.get('q')
-        if search_query:
-            queryset = queryset.filter(
-                Q(title__icontains=search_query) | Q(description__icontains=search_query)
-            )
-        return queryset.order_by('-created_at')
+    def get_approximate_count(self):
+        if self.request.GET.get('count'):
+            return self.cached('approximate_count', lambda: approximate_count(self.get_queryset(), self.count_limit))
+        return None, None
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['current_status'] = self.request.GET.get('status', '')
-        context['current_priority'] = self.request.GET.get('priority', '')
+        context.update(self.get_filter_context())
         context['current_project'] = self.request.GET.get('project', '')
-        context['search_query'] = self.request.GET.get('q', '')
-        context['projects'] = Project.objects.filter(owner=self.request.user)
+        context['projects'] = get_project_index(self.request.user)
+        context['filter_form'] = self.get_filter_form()
+        context['task_fragments'] = render_fragments('task_row', context['tasks'])
+        if self.is_cursor_mode():
+            page = context['page_obj']
+            context['cursor_mode'] = True
+            if page.has_next():
+                query = self.request.GET.copy()
+                query['cursor'] = page.next_cursor
+                context['next_page_query'] = query.urlencode()
+            context['approximate_count'], context['count_exact'] = self.get_approximate_count()
         return context
 
 
-class TaskDetailView(LoginRequiredMixin, DetailView):
+class TaskFeedView(TaskListView):
+    """Streams the filtered task list as JSON, always cursor-paginated."""
+
+    paginate_by = 100
+    max_paginate_by = 500
+    cache_namespace = 'task_feed'
+    fields = ('id', 'title', 'description', 'due_date', 'priority', 'status', 'project', 'created_at', 'updated_at')
+
+    def get_paginate_by(self, queryset):
+        try:
+            limit = int(self.request.GET.get('limit', self.paginate_by))
+        except ValueError:
+            limit = self.paginate_by
+        return max(1, min(limit, self.max_paginate_by))
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset().values(*self.fields)
+        paginator = CursorPaginator(queryset, self.get_paginate_by(queryset))
+        page = self.cached('cursor_page', lambda: paginator.page(request.GET.get('cursor')))
+        count, exact = self.get_approximate_count()
+        return StreamingHttpResponse(self.stream(page, count, exact), content_type='application/json')
+
+    def stream(self, page, count, exact):
+        encoder = DjangoJSONEncoder()
+        yield '{"results": ['
+        for index, row in enumerate(page):
+            yield (', ' if index else '') + encoder.encode(row)
+        yield f'], "next_cursor": {encoder.encode(page.next_cursor)}'
+        if count is not None:
+            yield f', "count": {count}, "count_exact": {encoder.encode(exact)}'
+        yield '}'
+
+
+class TaskExportView(TaskListView):
+    """Streams the filtered task list as CSV or JSONL in the import layout."""
+
+    content_types = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+    def get(self, request, *args, **kwargs):
+        fmt = request.GET.get('format', 'csv')
+        if fmt not in FORMATS:
+            fmt = 'csv'
+        response = StreamingHttpResponse(
+            export_rows(self.get_queryset(), fmt), content_type=self.content_types[fmt]
+        )
+        response['Content-Disposition'] = f'attachment; filename="tasks.{fmt}"'
+        return response
+
+
+@login_required
+@require_POST
+def import_tasks(request):
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'error': "No file uploaded."}, status=400)
+    fmt = request.POST.get('format') or guess_format(upload.name)
+    if fmt not in FORMATS:
+        return JsonResponse({'error': f"Unsupported format: {fmt}"}, status=400)
+    create_projects = bool(request.POST.get('create_projects'))
+    if request.POST.get('defer'):
+        # The job row keeps only the file's name; the worker reads and deletes it.
+        path = default_storage.save(f'imports/{uuid.uuid4()}.{fmt}', upload)
+        # Batches commit as they go, so a retry would import them twice.
+        job = enqueue(
+            'tasks.import', {'path': path, 'format': fmt, 'create_projects': create_projects},
+            owner=request.user, max_attempts=1,
+        )
+        return JsonResponse(
+            {'job': str(job.pk), 'status': job.status, 'url': reverse('tasks:job_detail', args=[job.pk])}, status=202
+        )
+    importer = TaskImporter(request.user, create_projects=create_projects)
+    return JsonResponse(importer.run(read_rows(upload, fmt)))
+
+
+class TaskDetailView(LoginRequiredMixin, ConditionalGetMixin, OwnerCacheMixin, DetailView):
     model = Task
     template_name = 'tasks/detail.html'
     context_object_name = 'task'
+    cache_namespace = 'task_detail'
 
     def get_queryset(self):
-        return super().get_queryset().filter(owner=self.request.user)
+        return super().get_queryset().filter(owner=self.request.user).select_related('project')
 
 
 class TaskCreateView(LoginRequiredMixin, CreateView):
@@ -90,13 +296,89 @@ class TaskDeleteView(LoginRequiredMixin, DeleteView):
         return self.model.objects.filter(owner=self.request.user)
 
 
+class TaskBulkView(LoginRequiredMixin, TaskFilterMixin, View):
+    """
+    Applies a TaskBulkForm action with one UPDATE or DELETE. The query
+    string carries the TaskListView filters, which narrow the selection or,
+    with ``all_matching``, are the selection.
+    """
+
+    http_method_names = ['post']
+    verbs = {'done': 'marked done', 'move': 'moved', 'priority': 'reprioritized', 'delete': 'deleted'}
+    filter_by_project = TaskListView.filter_by_project
+
+    def get_queryset(self):
+        return self.get_task_queryset()
+
+    def post(self, request, *args, **kwargs):
+        form = TaskBulkForm(request.user, request.POST)
+        if form.is_valid():
+            queryset = self.get_queryset()
+            if not form.cleaned_data['all_matching']:
+                queryset = queryset.filter(pk__in=form.cleaned_data['tasks'])
+            action = form.cleaned_data['action']
+            if action == 'delete':
+                count = delete_tasks(queryset)
+            else:
+                count = update_tasks(queryset, **form.get_changes())
+            messages.success(request, f"{count} task{pluralize(count)} {self.verbs[action]}.")
+        else:
+            for errors in form.errors.values():
+                for error in errors:
+                    messages.error(request, error)
+        query = request.GET.urlencode()
+        return redirect(reverse('tasks:task_list') + (f'?{query}' if query else ''))
+
+
+def resolve_project_tags(user, parsed_entries):
+    """
+    Maps every ``#tag`` found by the parser to one of the user's projects,
+    with a single query. Tags match titles case-insensitively, with - and _
+    standing in for spaces. Unknown tags map to None.
+    """
+    tags = project_tags(parsed_entries)
+    if not tags:
+        return {}
+    return match_project_tags(tags, project_tag_candidates(user, tags))
+
+
+def project_tags(parsed_entries):
+    return {entry['project_tag'] for entry in parsed_entries if entry.get('project_tag')}
+
+
+def project_tag_candidates(user, tags):
+    """The user's projects that any of ``tags`` could name."""
+    candidates = {tag.lower() for tag in tags} | {tag.replace('-', ' ').replace('_', ' ').lower() for tag in tags}
+    query = Q()
+    for candidate in candidates:
+        query |= Q(title__iexact=candidate)
+    return Project.objects.filter(query, owner=user)
+
+
+def match_project_tags(tags, candidates):
+    projects = {project.title.lower(): project for project in candidates}
+    return {
+        tag: projects.get(tag.lower()) or projects.get(tag.replace('-', ' ').replace('_', ' ').lower())
+        for tag in tags
+    }
+
+
 def parse_create_task(request):
     if request.method == 'POST':
         text = request.POST.get('text')
-        if text:
+        if text and get_job_config('DEFER_QUICK_ADD'):
+            enqueue('tasks.quick_add', {'text': text}, owner=request.user, priority=10)
+            messages.info(request, "Task queued; it will appear in your list shortly.")
+        elif text:
             parsed_data = parse_task_text(text)
+            tag = parsed_data.get('project_tag')
+            if tag:
+                project = resolve_project_tags(request.user, [parsed_data])[tag]
+                parsed_data['project'] = project.pk if project else None
             form = TaskForm(parsed_data)
-            if form.is_valid():
+            if tag and not parsed_data['project']:
+                messages.error(request, f"project: Unknown project: {tag}")
+            elif form.is_valid():
                 task = form.save(commit=False)
                 task.owner = request.user
                 task.save()
@@ -111,69 +393,195 @@ def parse_create_task(request):
     return redirect('tasks:task_list')
 
 
-class ProjectListView(LoginRequiredMixin, ListView):
+BATCH_QUICK_ADD_LIMIT = 1000  # Lines accepted by one batch quick-add request
+
+
+@login_required
+@require_POST
+def parse_create_tasks(request):
+    """
+    Batch quick-add: one task per line of the ``text`` field, or per string
+    of a JSON array body. Every entry is parsed in one pass and validated on
+    its own; the valid ones are inserted with a single bulk_create.
+    """
+    wants_json = request.content_type == 'application/json'
+    if wants_json:
+        try:
+            texts = json.loads(request.body)
+        except ValueError:
+            texts = None
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            return JsonResponse({'error': "Expected a JSON array of strings."}, status=400)
+    else:
+        texts = request.POST.get('text', '').splitlines()
+
+    entries = [(number, text.strip()) for number, text in enumerate(texts, start=1) if text.strip()]
+    error = None
+    if not entries:
+        error = "Task text cannot be empty."
+    elif len(entries) > BATCH_QUICK_ADD_LIMIT:
+        error = f"At most {BATCH_QUICK_ADD_LIMIT} tasks can be added at once."
+    if error:
+        if wants_json:
+            return JsonResponse({'error': error}, status=400)
+        messages.error(request, error)
+        return redirect('tasks:task_list')
+
+    tasks = []
+    results = []
+    parsed_entries = parse_task_texts(text for number, text in entries)
+    projects = resolve_project_tags(request.user, parsed_entries)
+    for (number, text), parsed_data in zip(entries, parsed_entries):
+        tag = parsed_data['project_tag']
+        form = TaskRowForm(parsed_data)
+        if tag and projects[tag] is None:
+            unknown = {'message': f"Unknown project: {tag}", 'code': 'unknown_project'}
+            results.append({'line': number, 'text': text, 'errors': {'project': [unknown]}})
+        elif form.is_valid():
+            task = form.save(commit=False)
+            task.owner = request.user
+            task.project = projects.get(tag)
+            tasks.append(task)
+            results.append({'line': number, 'text': text, 'id': task.pk})
+        else:
+            results.append({'line': number, 'text': text, 'errors': form.errors.get_json_data()})
+    create_tasks(tasks)
+
+    if wants_json:
+        return JsonResponse({'created': len(tasks), 'results': results})
+    if tasks:
+        messages.success(request, f"{len(tasks)} tasks added successfully!")
+    for result in results:
+        for field, errors in result.get('errors', {}).items():
+            for error in errors:
+                messages.error(request, f"Line {result['line']}: {field}: {error['message']}")
+    return redirect('tasks:task_list')
+
+
+class ProjectListView(LoginRequiredMixin, ConditionalGetMixin, OwnerCacheMixin, TaskFilterMixin, ListView):
     model = Project
     template_name = 'tasks/project_list.html'
     context_object_name = 'projects'
+    cache_namespace = 'project_list'
     paginate_by = 10  # Projects per page
+    tasks_per_project = 5  # Newest matching tasks embedded in each project card
+    search_placeholder = "Search projects..."
 
     def get_queryset(self):
-        return super().get_queryset().filter(owner=self.request.user).order_by('title')
+        return (
+            super().get_queryset()
+            .filter(owner=self.request.user)
+            .order_by('title')
+            .prefetch_related(self.get_tasks_prefetch())
+        )
+
+    def get_tasks_prefetch(self):
+        # One query for the whole page; the slice becomes a per-project
+        # ROW_NUMBER() window so a large project cannot crowd out the rest.
+        tasks_queryset = self.filter_tasks(Task.objects.filter(owner=self.request.user))
+        tasks_queryset = tasks_queryset.only('id', 'title', 'status', 'project_id', 'created_at', 'updated_at')
+        tasks_queryset = tasks_queryset.order_by('-created_at')[:self.tasks_per_project]
+        return Prefetch('tasks', queryset=tasks_queryset, to_attr='filtered_tasks')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # For each project, get its tasks and apply filters/search
-        for project in context['projects']:
-            tasks_queryset = project.task_set.filter(owner=self.request.user)
-
-            status = self.request.GET.get('status')
-            priority = self.request.GET.get('priority')
-            search_query = self.request.GET.get('q')
-
-            if status:
-                tasks_queryset = tasks_queryset.filter(status=status)
-            if priority:
-                tasks_queryset = tasks_queryset.filter(priority=priority)
-            if search_query:
-                tasks_queryset = tasks_queryset.filter(
-                    Q(title__icontains=search_query) | Q(description__icontains=search_query)
-                )
-            project.tasks = tasks_queryset.order_by('-created_at')
-
-        context['current_status'] = self.request.GET.get('status', '')
-        context['current_priority'] = self.request.GET.get('priority', '')
-        context['search_query'] = self.request.GET.get('q', '')
+        context.update(self.get_filter_context())
+        context['filter_form'] = self.get_filter_form()
+        context['project_cards'] = render_fragments('project_card', context['projects'])
         return context
 
 
-class ProjectDetailView(LoginRequiredMixin, DetailView):
+class ProjectDetailView(LoginRequiredMixin, ConditionalGetMixin, OwnerCacheMixin, TaskFilterMixin, DetailView):
     model = Project
     template_name = 'tasks/project_detail.html'
     context_object_name = 'project'
+    cache_namespace = 'project_detail'
 
     def get_queryset(self):
         return super().get_queryset().filter(owner=self.request.user)
 
+    def get_project_tasks(self, project):
+        tasks_queryset = Task.objects.filter(owner=self.request.user, project=project)
+        return self.get_task_rows(self.filter_tasks(tasks_queryset).order_by('-created_at'))
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        project = self.get_object()
-        tasks_queryset = project.task_set.filter(owner=self.request.user)
+        context['tasks'] = self.cached('tasks', lambda: list(self.get_project_tasks(self.object)))
+        context.update(self.get_filter_context())
+        context['filter_form'] = self.get_filter_form()
+        return context
 
-        status = self.request.GET.get('status')
-        priority = self.request.GET.get('priority')
-        search_query = self.request.GET.get('q')
 
-        if status:
-            tasks_queryset = tasks_queryset.filter(status=status)
-        if priority:
-            tasks_queryset = tasks_queryset.filter(priority=priority)
-        if search_query:
-            tasks_queryset = tasks_queryset.filter(
-                Q(title__icontains=search_query) | Q(description__icontains=search_query)
-            )
-        context['tasks'] = tasks_queryset.order_by('-created_at')
-
-        context['current_status'] = self.request.GET.get('status', '')
-        context['current_priority'] = self.request.GET.get('priority', '')
-        context['search_query'] = self.request.GET.get('q', '')
+class DashboardView(LoginRequiredMixin, ConditionalGetMixin, OwnerCacheMixin, TemplateView):
+    template_name = 'tasks/dashboard.html'
+    cache_namespace = 'dashboard'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Overdue counts depend on the date as well as on the rows.
+        context.update(self.cached('counts', lambda: dashboard(self.request.user), today=timezone.localdate()))
         return context
+
+
+class AgendaView(LoginRequiredMixin, ConditionalGetMixin, OwnerCacheMixin, TemplateView):
+    """Overdue tasks and those due in the next ``?days=`` days (7 by default)."""
+
+    template_name = 'tasks/agenda.html'
+    cache_namespace = 'agenda'
+    default_days = 7
+    max_days = 90
+
+    def get_days(self):
+        try:
+            days = int(self.request.GET.get('days', self.default_days))
+        except ValueError:
+            days = self.default_days
+        return max(1, min(days, self.max_days))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        today = timezone.localdate()
+        days = self.get_days()
+        # Like the dashboard, the sections depend on the date as well as on the rows.
+        context.update(self.cached('sections', lambda: agenda(self.request.user, today, days), today=today, days=days))
+        context.update(days=days, today=today)
+        return context
+
+
+class JobListView(LoginRequiredMixin, ListView):
+    template_name = 'tasks/job_list.html'
+    context_object_name = 'jobs'
+    paginate_by = 20
+
+    def get_queryset(self):
+        return Job.objects.filter(owner=self.request.user).defer('payload', 'result', 'error')
+
+
+class JobDetailView(LoginRequiredMixin, DetailView):
+    template_name = 'tasks/job_detail.html'
+    context_object_name = 'job'
+
+    def get_queryset(self):
+        return Job.objects.filter(owner=self.request.user).defer('payload')
+
+
+@staff_member_required
+def cache_stats(request):
+    """Hit, miss and eviction counts of this process's task caches, per namespace."""
+    return JsonResponse(metrics.snapshot())
+
+
+def prometheus_metrics(request):
+    """
+    This process's request and cache metrics in the Prometheus text format,
+    for staff sessions or a scraper sending ``TASKS_METRICS['TOKEN']`` as a
+    bearer token.
+    """
+    token = getattr(settings, 'TASKS_METRICS', {}).get('TOKEN')
+    authorization = request.headers.get('Authorization', '')
+    authorized = request.user.is_active and request.user.is_staff
+    if token and authorization.startswith('Bearer '):
+        authorized = authorized or hmac.compare_digest(authorization[len('Bearer '):], token)
+    if not authorized:
+        return HttpResponse("Forbidden", status=403, content_type='text/plain')
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,15 @@
+"""
+Benchmarks, run as modules from the repository root, e.g.
+``python -m benchmarks.endpoints``.
+"""
+import os
+
+
+def setup_django(settings_module='task_manager.settings'):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    # Each benchmark serves requests from this one process, so its memory
+    # cache is every worker's cache.
+    os.environ.setdefault('TASKS_CACHE_SHARED', '1')
+    import django
+
+    django.setup()
@@ -0,0 +1,196 @@
+"""
+Agenda scan times over a large task table, with and without the partial
+due-date indexes.
+
+Loads ``--tasks`` tasks spread over ``--users`` owners straight into a
+fresh test database with executemany (no counters or search rows: the
+agenda reads neither), builds the task indexes once the rows are in, and
+times, for each window:
+
+* ``scan``: ``apps.tasks.agenda.scan()`` over every owner, as run by the
+  ``scan_agenda`` command;
+* ``agenda``: one owner's agenda page query, over ``--samples`` owners.
+
+Then it drops the two partial indexes and times the same work again, which
+is what the ad hoc queries cost.
+
+    python -m benchmarks.agenda --tasks 10000000 --users 10000
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+
+from benchmarks import setup_django
+
+PARTIAL_INDEXES = ('task_open_due_idx', 'task_owner_open_due_idx')
+
+
+def load(tasks, users, seed=0, chunk_size=50000):
+    """Inserts ``users`` users and ``tasks`` tasks; returns the user ids and the seconds taken."""
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.db import connection, transaction
+
+    from apps.tasks.models import Task
+
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    User = get_user_model()
+    started = time.perf_counter()
+    password = make_password('benchmark')
+    User.objects.bulk_create(
+        [User(username=f'agenda{i}', email=f'agenda{i}@example.com', password=password) for i in range(users)],
+        batch_size=1000,
+    )
+    owner_ids = list(User.objects.filter(username__startswith='agenda').values_list('pk', flat=True))
+    # Due dates from a month ago to two months ahead on 70% of the tasks, a
+    # third of them done: the same mix as benchmarks.data.
+    due_dates = [str(today + datetime.timedelta(days=offset)) for offset in range(-30, 61)]
+    now = connection.ops.adapt_datetimefield_value(datetime.datetime.now(datetime.timezone.utc))
+    prepare_pk = Task._meta.pk.get_db_prep_value
+    columns = 'id, owner_id, title, description, due_date, priority, status, created_at, updated_at'
+    sql = f"INSERT INTO tasks_task ({columns}) VALUES ({', '.join(['%s'] * 9)})"
+    with connection.cursor() as cursor:
+        for start in range(0, tasks, chunk_size):
+            rows = [
+                (
+                    prepare_pk(uuid.UUID(int=rng.getrandbits(128), version=4), connection),
+                    owner_ids[number % users],
+                    f'Task {number}',
+                    '',
+                    rng.choice(due_dates) if rng.random() < 0.7 else None,
+                    rng.choice(('low', 'medium', 'high')),
+                    rng.choice(('todo', 'in_progress', 'done')),
+                    now,
+                    now,
+                )
+                for number in range(start, min(start + chunk_size, tasks))
+            ]
+            with transaction.atomic():
+                cursor.executemany(sql, rows)
+    return owner_ids, time.perf_counter() - started
+
+
+def set_indexes(names, present):
+    """Creates or drops the Task indexes called ``names``; returns the seconds taken."""
+    from django.db import connection
+
+    from apps.tasks.models import Task
+
+    started = time.perf_counter()
+    with connection.schema_editor() as editor:
+        for index in Task._meta.indexes:
+            if index.name in names:
+                (editor.add_index if present else editor.remove_index)(Task, index)
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+    return time.perf_counter() - started
+
+
+def measure(owner_ids, windows, batch_size, samples, seed=0):
+    from apps.tasks.agenda import agenda, scan
+
+    rng = random.Random(seed)
+    sample = rng.sample(owner_ids, min(samples, len(owner_ids)))
+    today = datetime.date.today()
+    results = {}
+    for name, (start, end) in windows.items():
+        started = time.perf_counter()
+        owners = tasks = 0
+        for owner_id, rows in scan(start, end, batch_size):
+            owners += 1
+            tasks += len(rows)
+        scan_seconds = time.perf_counter() - started
+        latencies = []
+        for owner_id in sample:
+            started = time.perf_counter()
+            agenda(owner_id, today, days=(end - today).days)
+            latencies.append(time.perf_counter() - started)
+        latencies.sort()
+        results[name] = {
+            'tasks': tasks,
+            'owners': owners,
+            'scan_s': round(scan_seconds, 3),
+            'tasks_per_s': round(tasks / scan_seconds) if scan_seconds else None,
+            'agenda_p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+            'agenda_p95_ms': round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+            'agenda_mean_ms': round(statistics.fmean(latencies) * 1000, 2),
+        }
+    return results
+
+
+def run(tasks=10_000_000, users=10_000, batch_size=1000, samples=50, seed=0):
+    from django.db import connection
+
+    from apps.tasks.models import Task
+
+    if connection.vendor == 'sqlite':
+        # The default test database is in memory; 10M rows belong on disk.
+        connection.settings_dict['TEST']['NAME'] = connection.settings_dict['NAME'] + '.test'
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        # Indexes are built once the rows are in, as a bulk load would.
+        index_names = {index.name for index in Task._meta.indexes}
+        set_indexes(index_names, present=False)
+        owner_ids, load_seconds = load(tasks, users, seed)
+        index_seconds = set_indexes(index_names, present=True)
+        today = datetime.date.today()
+        windows = {
+            'today': (today, today),
+            'next_7_days': (today, today + datetime.timedelta(days=7)),
+            'overdue_30_days': (today - datetime.timedelta(days=30), today - datetime.timedelta(days=1)),
+        }
+        indexed = measure(owner_ids, windows, batch_size, samples, seed)
+        set_indexes(PARTIAL_INDEXES, present=False)
+        unindexed = measure(owner_ids, windows, batch_size, samples, seed)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    return {
+        'vendor': connection.vendor,
+        'tasks': tasks,
+        'users': users,
+        'load_s': round(load_seconds, 1),
+        'index_build_s': round(index_seconds, 1),
+        'partial_indexes': indexed,
+        'no_partial_indexes': unindexed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=10_000_000)
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--batch-size', type=int, default=1000, help="Tasks per scan() query.")
+    parser.add_argument('--samples', type=int, default=50, help="Owners whose agenda is timed.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Without a DATABASE_URL, a throwaway SQLite file with the WAL profile.
+        os.environ.setdefault('DATABASE_URL', f'sqlite:///{directory}/agenda.db')
+        os.environ.setdefault('METRICS_SAMPLE_RATE', '0')
+        setup_django()
+        results = run(args.tasks, args.users, args.batch_size, args.samples, args.seed)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{results['tasks']} tasks, {results['users']} users on {results['vendor']}: "
+          f"loaded in {results['load_s']}s, indexes built in {results['index_build_s']}s")
+    print(f"  {'window':<16} {'indexes':<8} {'tasks':>9} {'owners':>7} {'scan s':>8} {'tasks/s':>9} "
+          f"{'agenda p50':>11} {'p95 ms':>8}")
+    for label, key in (('partial', 'partial_indexes'), ('none', 'no_partial_indexes')):
+        for window, row in results[key].items():
+            print(f"  {window:<16} {label:<8} {row['tasks']:>9} {row['owners']:>7} {row['scan_s']:>8} "
+                  f"{row['tasks_per_s']!s:>9} {row['agenda_p50_ms']:>11} {row['agenda_p95_ms']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+The JSON API against the HTML task list, for the same 20 newest tasks.
+
+Runs the matching scenarios of benchmarks.endpoints and prints latency,
+queries and body size side by side, relative to the HTML page.
+
+    python -m benchmarks.api --requests 100
+    python -m benchmarks.api --no-cache
+"""
+import argparse
+import json
+
+from benchmarks import setup_django
+from benchmarks.endpoints import run
+
+COMPARED = ['task_list', 'api_tasks[20]', 'api_tasks[20,sparse]']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--projects', type=int, default=20, help="Projects per user.")
+    parser.add_argument('--tasks', type=int, default=50, help="Tasks per project.")
+    parser.add_argument('--requests', type=int, default=50, help="Timed requests per scenario.")
+    parser.add_argument('--no-cache', action='store_true', help="Measure with the owner cache disabled.")
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+    args = parser.parse_args()
+
+    setup_django()
+    results = run(1, args.projects, args.tasks, args.requests, only=COMPARED, no_cache=args.no_cache)
+    rows = {name: results['scenarios'][name] for name in COMPARED}
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    html = rows['task_list']
+    print(f"20 tasks per response, {args.requests} requests each, cache {'off' if args.no_cache else 'on'}")
+    print(f"  {'scenario':<22} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8} {'body KiB':>9} {'vs HTML':>8}")
+    for name, row in rows.items():
+        print(f"  {name:<22} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['queries']:>8} {row['body_kib']:>9} "
+              f"{row['p50_ms'] / html['p50_ms']:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Requests per second of the sync views against their async versions under ASGI.
+
+Calls ``task_manager.asgi.application`` in-process with ``--concurrency``
+simultaneous connections, so the numbers cover Django's ASGI handler,
+middleware, views and templates but no network or server. Each scenario
+pairs a sync view with its native async version from
+apps/tasks/async_views.py and runs against the same data.
+
+    python -m benchmarks.asgi --concurrency 200 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from urllib.parse import urlencode
+
+from benchmarks import setup_django
+from benchmarks.data import generate
+
+SCENARIOS = [
+    ('task_list', 'GET', 'tasks:task_list', 'tasks:async_task_list'),
+    ('project_detail', 'GET', 'tasks:project_detail', 'tasks:async_project_detail'),
+    ('quick_add', 'POST', 'tasks:parse_create_task', 'tasks:async_parse_create_task'),
+]
+
+
+class Connection:
+    """One keep-alive client: a session cookie and an ASGI app to send requests to."""
+
+    def __init__(self, application, cookies):
+        self.application = application
+        self.cookie = '; '.join(f'{name}={value}' for name, value in cookies.items())
+        self.csrf_token = cookies['csrftoken']
+
+    async def request(self, method, path, data=None):
+        body = urlencode(data or {}).encode()
+        headers = [(b'host', b'localhost'), (b'cookie', self.cookie.encode())]
+        if method == 'POST':
+            headers += [
+                (b'content-type', b'application/x-www-form-urlencoded'),
+                (b'content-length', str(len(body)).encode()),
+                (b'x-csrftoken', self.csrf_token.encode()),
+            ]
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+            'headers': headers, 'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+        }
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        disconnected = asyncio.get_running_loop().create_future()
+        status = None
+
+        async def receive():
+            # The handler keeps listening for a disconnect until it responds.
+            return messages.pop() if messages else await disconnected
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+
+        try:
+            await self.application(scope, receive, send)
+        finally:
+            disconnected.cancel()
+        return status
+
+
+async def load(connection, method, path, data, concurrency, duration):
+    latencies = []
+    statuses = {}
+    deadline = time.monotonic() + duration
+
+    async def client():
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            status = await connection.request(method, path, data)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 1),
+        'p99_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 1),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 1),
+        'statuses': statuses,
+    }
+
+
+def prepare(projects, tasks):
+    """Creates a test database with one user's data; returns ``(old_name, cookies, project)``."""
+    from django.conf import settings
+    from django.db import connection
+    from django.middleware.csrf import _get_new_csrf_string
+    from django.test import Client
+
+    if connection.vendor == 'sqlite':
+        # The default test database is in memory, which request threads cannot share.
+        connection.settings_dict['TEST']['NAME'] = connection.settings_dict['NAME'] + '.test'
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    user = generate(1, projects, tasks)[0]
+    client = Client()
+    client.force_login(user)
+    cookies = {
+        settings.SESSION_COOKIE_NAME: client.cookies[settings.SESSION_COOKIE_NAME].value,
+        settings.CSRF_COOKIE_NAME: _get_new_csrf_string(),
+    }
+    project = user.projects.order_by('title').first()
+    connection.close()
+    return old_name, cookies, project
+
+
+def run(concurrency=200, duration=10.0, projects=20, tasks=50):
+    from django.db import connection
+    from django.urls import reverse
+
+    from task_manager.asgi import application
+
+    old_name, cookies, project = prepare(projects, tasks)
+    results = {}
+    try:
+        client = Connection(application, cookies)
+        for name, method, sync_name, async_name in SCENARIOS:
+            args = [project.pk] if 'project' in sync_name else []
+            data = {'text': f'Benchmark task tomorrow #{project.title}'} if method == 'POST' else None
+            results[name] = {
+                mode: asyncio.run(load(client, method, reverse(url_name, args=args), data, concurrency, duration))
+                for mode, url_name in (('sync', sync_name), ('async', async_name))
+            }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=200, help="Simultaneous connections.")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per view.")
+    parser.add_argument('--projects', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=50, help="Tasks per project.")
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Request threads never reuse a connection, so keep none open (see task_manager/database.py).
+        os.environ.setdefault('DATABASE_URL', f'sqlite:///{directory}/asgi.db?conn_max_age=0')
+        os.environ.setdefault('METRICS_SAMPLE_RATE', '0')
+        setup_django()
+        results = run(args.concurrency, args.duration, args.projects, args.tasks)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.concurrency} concurrent connections, {args.duration:g}s per view")
+    print(f"  {'scenario':<16} {'mode':<6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}  statuses")
+    for name, modes in results.items():
+        for mode, row in modes.items():
+            statuses = ', '.join(f'{status}: {count}' for status, count in sorted(row['statuses'].items()))
+            print(f"  {name:<16} {mode:<6} {row['requests_per_second']:>8} {row['p50_ms']:>8} {row['p99_ms']:>8}  {statuses}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Synthetic data for the benchmarks: N users x M projects x K tasks each.
+
+Rows are written with bulk_create in batches; tasks go through
+apps.tasks.bulk.create_tasks so counters and the search index match what
+the views expect.
+
+    python -m benchmarks.data --users 10 --projects 20 --tasks 50
+"""
+import argparse
+import datetime
+import random
+
+from benchmarks import setup_django
+
+WORDS = [
+    'report', 'invoice', 'release', 'garden', 'budget', 'meeting', 'flight', 'review', 'backup',
+    'dentist', 'groceries', 'deploy', 'newsletter', 'migration', 'taxes', 'roadmap', 'interview',
+]
+STATUSES = ['todo', 'in_progress', 'done']
+PRIORITIES = ['low', 'medium', 'high']
+
+
+def generate(users=10, projects=20, tasks=50, seed=0, batch_size=2000, prefix='bench'):
+    """
+    Creates ``users`` users, each with ``projects`` projects of ``tasks``
+    tasks, and returns the created users. Due dates are spread from a month
+    ago to two months ahead, so some tasks are overdue.
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.db import transaction
+
+    from apps.tasks.bulk import create_tasks
+    from apps.tasks.models import Project, Task
+    from apps.tasks.project_index import invalidate_project_index
+
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    User = get_user_model()
+    # Hashing is deliberately slow; every benchmark user shares one password.
+    password = make_password('benchmark')
+    with transaction.atomic():
+        created_users = User.objects.bulk_create([
+            User(
+                username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password=password,
+                first_name='Bench', last_name=f'User {i}',
+            )
+            for i in range(users)
+        ])
+        # Primary keys only come back from bulk_create where RETURNING is supported.
+        created_users = list(User.objects.filter(username__startswith=prefix).order_by('pk'))
+        for user in created_users:
+            user_projects = Project.objects.bulk_create([
+                Project(owner=user, title=f'{rng.choice(WORDS).title()} {j}', description=rng.choice(WORDS))
+                for j in range(projects)
+            ])
+            invalidate_project_index(user.pk)
+            batch = []
+            for project in user_projects:
+                for k in range(tasks):
+                    batch.append(Task(
+                        owner=user,
+                        project=project,
+                        title=f'{rng.choice(WORDS).title()} {rng.choice(WORDS)} {k}',
+                        description=' '.join(rng.choices(WORDS, k=6)),
+                        due_date=today + datetime.timedelta(days=rng.randint(-30, 60)) if rng.random() < 0.7 else None,
+                        priority=rng.choice(PRIORITIES),
+                        status=rng.choice(STATUSES),
+                    ))
+                    if len(batch) >= batch_size:
+                        create_tasks(batch)
+                        batch = []
+            if batch:
+                create_tasks(batch)
+    return created_users
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--projects', type=int, default=20, help="Projects per user.")
+    parser.add_argument('--tasks', type=int, default=50, help="Tasks per project.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--prefix', default='bench', help="Username prefix; must not match existing users.")
+    args = parser.parse_args()
+
+    setup_django()
+    users = generate(args.users, args.projects, args.tasks, args.seed, prefix=args.prefix)
+    print(f"Created {len(users)} users, {len(users) * args.projects} projects, "
+          f"{len(users) * args.projects * args.tasks} tasks.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+"""
+Latency, query count and peak memory of every URL in apps/tasks/urls.py.
+
+Builds a throwaway test database, fills it with benchmarks.data, then drives
+each endpoint through the Django test client (full middleware stack, no
+network) and reports p50/p95/p99 latency, queries per request and the peak
+Python memory of one request. Save the JSON output as a baseline and pass
+it to --compare on a later run to flag regressions.
+
+    python -m benchmarks.endpoints --requests 50 --json > baseline.json
+    python -m benchmarks.endpoints --requests 50 --compare baseline.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from asgiref.sync import async_to_sync
+
+from benchmarks import setup_django
+from benchmarks.data import generate
+
+
+class Context:
+    """The benchmark user and the rows the scenarios point at."""
+
+    def __init__(self, user):
+        from django.test import override_settings
+
+        from apps.tasks.jobs import enqueue
+        from apps.tasks.models import Change, Project, Task
+        from apps.tasks.sync import Delta
+
+        self.user = user
+        self.project = Project.objects.filter(owner=user).order_by('title').first()
+        self.task = Task.objects.filter(owner=user).order_by('-created_at').first()
+        self.task_ids = [str(pk) for pk in Task.objects.filter(owner=user).values_list('pk', flat=True)[:100]]
+        self.job = enqueue('tasks.recount', owner=user)
+        # A change id and a sync token from before the scenarios, whose
+        # writes are what the change stream and the delta sync send.
+        self.change_id = Change.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        with override_settings(TASKS_SYNC={'SETTLE': 0}):
+            delta = Delta(user)
+            for model in ('project', 'task'):
+                for rows in delta.batches(model, ('id', 'updated_at')):
+                    pass
+            self.sync_token = delta.token
+        self.seed_graph()
+
+    def seed_graph(self, layers=8, width=5):
+        """
+        Gives the project a subtask tree (a root, its children and their
+        children) and a blocker graph of ``layers`` layers, each task
+        blocking every task of the next layer, so its paths fan out.
+        """
+        from apps.tasks.models import Task, TaskDependency
+
+        tasks = list(Task.objects.filter(project=self.project).order_by('created_at', 'id'))
+        self.graph_root = tasks[0]
+        children = tasks[1:8]
+        Task.objects.filter(pk__in=[task.pk for task in children]).update(parent=self.graph_root)
+        for i, child in enumerate(children):
+            Task.objects.filter(pk__in=[task.pk for task in tasks[8 + 4 * i:12 + 4 * i]]).update(parent=child)
+        grid = [tasks[i:i + width] for i in range(0, min(layers * width, len(tasks)), width)]
+        TaskDependency.objects.bulk_create([
+            TaskDependency(blocker=blocker, blocked=blocked)
+            for layer, following in zip(grid, grid[1:]) for blocker in layer for blocked in following
+        ])
+        self.graph_head, self.graph_tail = grid[0][0], grid[-1][0]
+
+    def victim(self):
+        """A fresh task for one delete request."""
+        from apps.tasks.models import Task
+
+        return Task.objects.create(owner=self.user, title='Delete me').pk
+
+    def blocked_victim(self):
+        """A fresh task the graph's head blocks, for one unblock request."""
+        from apps.tasks import graph
+        from apps.tasks.models import Task
+
+        task = Task.objects.create(owner=self.user, project=self.project, title='Unblock me')
+        graph.add_blocker(self.graph_head, task)
+        return task.pk
+
+
+def scenarios(context):
+    """
+    Maps a scenario name to ``(url_name, prepare)``; ``prepare()`` runs
+    untimed and returns ``(method, path, kwargs)`` for the test client.
+    """
+    from django.urls import reverse
+
+    def get(name, args=(), data=None):
+        return lambda: ('get', reverse(f'tasks:{name}', args=args), {'data': data or {}})
+
+    def post(name, args=(), data=None, **kwargs):
+        return lambda: ('post', reverse(f'tasks:{name}', args=args), {'data': data, **kwargs})
+
+    def import_file():
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        rows = ''.join(json.dumps({'title': f'Imported {i}', 'priority': 'low'}) + '\n' for i in range(100))
+        upload = SimpleUploadedFile('tasks.jsonl', rows.encode(), content_type='application/x-ndjson')
+        return 'post', reverse('tasks:task_import'), {'data': {'file': upload}}
+
+    def delete():
+        return 'post', reverse('tasks:task_delete', args=[context.victim()]), {}
+
+    def add_blocker():
+        data = json.dumps({'blocker': str(context.graph_head.pk)})
+        path = reverse('tasks:api_task_blockers', args=[context.victim()])
+        return 'post', path, {'data': data, 'content_type': 'application/json'}
+
+    def remove_blocker():
+        path = reverse('tasks:api_task_blocker', args=[context.blocked_victim(), context.graph_head.pk])
+        return 'delete', path, {}
+
+    task_form = {'title': 'Benchmark task', 'priority': 'medium', 'status': 'todo'}
+    batch = json.dumps([f'Batch task {i} tomorrow #{context.project.title} p1' for i in range(20)])
+    return {
+        'task_list': ('task_list', get('task_list')),
+        'task_list[status]': ('task_list', get('task_list', data={'status': 'todo'})),
+        'task_list[search]': ('task_list', get('task_list', data={'q': 'report'})),
+        'task_list[page=5]': ('task_list', get('task_list', data={'page': 5})),
+        'task_list[cursor]': ('task_list', get('task_list', data={'paginate': 'cursor', 'count': 1})),
+        'task_feed': ('task_feed', get('task_feed', data={'limit': 100})),
+        'task_export': ('task_export', get('task_export', data={'format': 'jsonl', 'status': 'done'})),
+        'task_import': ('task_import', import_file),
+        'task_create': ('task_create', post('task_create', data=task_form)),
+        'task_detail': ('task_detail', get('task_detail', args=[context.task.pk])),
+        'task_update': ('task_update', post('task_update', args=[context.task.pk], data=task_form)),
+        'task_delete': ('task_delete', delete),
+        'task_bulk': ('task_bulk', post('task_bulk', data={'action': 'priority', 'priority': 'high', 'tasks': context.task_ids})),
+        'task_bulk[filter]': ('task_bulk', lambda: (
+            'post', reverse('tasks:task_bulk') + '?status=todo&priority=low',
+            {'data': {'action': 'priority', 'priority': 'low', 'all_matching': 'on'}},
+        )),
+        'project_list': ('project_list', get('project_list')),
+        'project_list[status]': ('project_list', get('project_list', data={'status': 'done'})),
+        'project_detail': ('project_detail', get('project_detail', args=[context.project.pk])),
+        'dashboard': ('dashboard', get('dashboard')),
+        'agenda': ('agenda', get('agenda')),
+        'agenda[30]': ('agenda', get('agenda', data={'days': 30})),
+        'job_list': ('job_list', get('job_list')),
+        'job_detail': ('job_detail', get('job_detail', args=[context.job.pk])),
+        'api_job': ('api_job', get('api_job', args=[context.job.pk])),
+        'cache_stats': ('cache_stats', get('cache_stats')),
+        'metrics': ('metrics', get('metrics')),
+        'parse_create_task': ('parse_create_task', post('parse_create_task', data={'text': 'Call mom tomorrow p1'})),
+        'parse_create_tasks': (
+            'parse_create_tasks', post('parse_create_tasks', data=batch, content_type='application/json')
+        ),
+        'api_tasks': ('api_tasks', get('api_tasks')),
+        'api_tasks[sparse]': ('api_tasks', get('api_tasks', data={'fields': 'id,title,status'})),
+        'api_tasks[status]': ('api_tasks', get('api_tasks', data={'status': 'todo'})),
+        # The HTML task list's page size, for benchmarks.api.
+        'api_tasks[20]': ('api_tasks', get('api_tasks', data={'limit': 20})),
+        'api_tasks[20,sparse]': ('api_tasks', get('api_tasks', data={'limit': 20, 'fields': 'id,title,status,due_date'})),
+        'api_tasks_bulk': ('api_tasks_bulk', lambda: (
+            'patch', reverse('tasks:api_tasks_bulk'),
+            {'data': json.dumps({'ids': context.task_ids, 'status': 'in_progress'}), 'content_type': 'application/json'},
+        )),
+        'api_task': ('api_task', get('api_task', args=[context.task.pk])),
+        'api_sync': ('api_sync', get('api_sync')),
+        'api_sync[delta]': ('api_sync', get('api_sync', data={'token': context.sync_token})),
+        # The graph seeded by Context.seed_graph(), walked by recursive CTEs.
+        'api_task_subtasks': ('api_task_subtasks', get('api_task_subtasks', args=[context.graph_root.pk])),
+        'api_task_blocked': ('api_task_blocked', get('api_task_blocked', args=[context.graph_head.pk])),
+        'api_task_blockers': ('api_task_blockers', get('api_task_blockers', args=[context.graph_tail.pk])),
+        'api_task_blockers[add]': ('api_task_blockers', add_blocker),
+        'api_task_blocker': ('api_task_blocker', remove_blocker),
+        'api_project_critical_path': (
+            'api_project_critical_path', get('api_project_critical_path', args=[context.project.pk])
+        ),
+        'api_projects': ('api_projects', get('api_projects')),
+        'api_project': ('api_project', get('api_project', args=[context.project.pk])),
+        # Under the test client the async views run through async_to_sync;
+        # benchmarks.asgi measures them under ASGI.
+        'async_task_list': ('async_task_list', get('async_task_list')),
+        'async_project_detail': ('async_project_detail', get('async_project_detail', args=[context.project.pk])),
+        'async_parse_create_task': (
+            'async_parse_create_task', post('async_parse_create_task', data={'text': 'Call mom tomorrow p1'})
+        ),
+        # Under WSGI the stream sends what is pending and closes.
+        'change_stream': ('change_stream', get('change_stream', data={'last_event_id': context.change_id})),
+    }
+
+
+def send(client, method, path, kwargs):
+    """Returns the response and its body size."""
+    response = getattr(client, method)(path, **kwargs)
+    if response.streaming:
+        # Streaming views do their work while the body is consumed.
+        if response.is_async:
+            return response, async_to_sync(async_body_size)(response.streaming_content)
+        return response, sum(len(chunk) for chunk in response.streaming_content)
+    return response, len(response.content)
+
+
+async def async_body_size(chunks):
+    return sum([len(chunk) async for chunk in chunks])
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def measure(client, prepare, requests, warmup):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    for _ in range(warmup):
+        send(client, *prepare())
+    timings = []
+    queries = []
+    statuses = set()
+    for _ in range(requests):
+        request = prepare()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response, size = send(client, *request)
+            timings.append(time.perf_counter() - start)
+        queries.append(len(captured))
+        statuses.add(response.status_code)
+    # tracemalloc slows everything down, so memory gets its own request.
+    request = prepare()
+    tracemalloc.start()
+    send(client, *request)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'p50_ms': round(percentile(timings, 0.5) * 1000, 2),
+        'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 2),
+        'mean_ms': round(statistics.fmean(timings) * 1000, 2),
+        'queries': round(statistics.fmean(queries), 1),
+        'max_queries': max(queries),
+        'peak_kib': round(peak / 1024, 1),
+        'body_kib': round(size / 1024, 1),
+        'statuses': sorted(statuses),
+    }
+
+
+def run(users=3, projects=20, tasks=50, requests=30, warmup=3, seed=0, only=None, no_cache=False):
+    from django.conf import settings
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.test.utils import setup_test_environment, teardown_test_environment
+    from django.urls import get_resolver
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    overrides = {}
+    if no_cache:
+        overrides['CACHES'] = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+    try:
+        with override_settings(**overrides):
+            user = generate(users, projects, tasks, seed)[0]
+            user.is_staff = True
+            user.save()
+            client = Client()
+            client.force_login(user)
+            context = Context(user)
+            plan = scenarios(context)
+            covered = {url_name for url_name, prepare in plan.values()}
+            patterns = get_resolver().url_patterns
+            tasks_urls = next(p for p in patterns if getattr(p, 'namespace', None) == 'tasks')
+            missing = sorted({p.name for p in tasks_urls.url_patterns} - covered)
+            results = {}
+            for name, (url_name, prepare) in plan.items():
+                if only and not any(part in name for part in only):
+                    continue
+                results[name] = measure(client, prepare, requests, warmup)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+    return {
+        'meta': {
+            'users': users, 'projects_per_user': projects, 'tasks_per_project': tasks,
+            'requests': requests, 'seed': seed, 'cache': not no_cache,
+            'database': connection.vendor, 'python': platform.python_version(),
+            'debug': settings.DEBUG, 'uncovered_urls': missing,
+        },
+        'scenarios': results,
+    }
+
+
+def compare(baseline, results, threshold):
+    """
+    Returns regression messages: p95 latency worse than ``threshold`` times
+    the baseline, or more queries per request than before.
+    """
+    regressions = []
+    for name, current in results['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if before is None:
+            continue
+        if current['p95_ms'] > before['p95_ms'] * threshold:
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current['max_queries'] > before['max_queries']:
+            regressions.append(f"{name}: queries {before['max_queries']} -> {current['max_queries']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=3)
+    parser.add_argument('--projects', type=int, default=20, help="Projects per user.")
+    parser.add_argument('--tasks', type=int, default=50, help="Tasks per project.")
+    parser.add_argument('--requests', type=int, default=30, help="Timed requests per scenario.")
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='*', help="Run only scenarios whose name contains one of these.")
+    parser.add_argument('--no-cache', action='store_true', help="Measure with the owner cache disabled.")
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+    parser.add_argument('--compare', metavar='BASELINE', help="Baseline JSON to check for regressions.")
+    parser.add_argument('--threshold', type=float, default=1.5, help="Allowed p95 slowdown factor.")
+    args = parser.parse_args()
+
+    setup_django()
+    results = run(
+        args.users, args.projects, args.tasks, args.requests, args.warmup, args.seed, args.only, args.no_cache
+    )
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        meta = results['meta']
+        print(f"{meta['users']} users x {meta['projects_per_user']} projects x {meta['tasks_per_project']} tasks, "
+              f"{meta['requests']} requests per scenario, cache {'on' if meta['cache'] else 'off'}")
+        print(f"  {'scenario':<26} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8} {'peak KiB':>9} {'body KiB':>9}  status")
+        for name, row in results['scenarios'].items():
+            print(f"  {name:<26} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8} "
+                  f"{row['queries']:>8} {row['peak_kib']:>9} {row['body_kib']:>9}  {','.join(map(str, row['statuses']))}")
+        if meta['uncovered_urls']:
+            print(f"  not covered: {', '.join(meta['uncovered_urls'])}")
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(json.load(baseline_file), results, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Task list render time by page size, with and without cached row fragments.
+
+Creates one owner with ``--tasks`` tasks in a fresh test database and
+times the task list view, response rendering included, at each page size
+in three states, with the owner cache warm in the first two:
+
+* ``uncached``: fragments disabled, so every row is rendered;
+* ``fragments``: every row fragment cached, read with one ``get_many``;
+* ``after_edit``: one task on the page is saved before each request, so
+  the page is read from the database again and that row re-rendered.
+
+    python -m benchmarks.fragments --sizes 20 50 100 200
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks import setup_django
+
+
+def timed(view, request, repeat, before=None):
+    latencies = []
+    for _ in range(repeat):
+        if before:
+            before()
+        started = time.perf_counter()
+        response = view(request)
+        response.render()
+        latencies.append(time.perf_counter() - started)
+    return round(statistics.median(latencies) * 1000, 2)
+
+
+def measure(owner, sizes, repeat):
+    from django.test import RequestFactory, override_settings
+
+    from apps.tasks.models import Task
+    from apps.tasks.views import TaskListView
+
+    request = RequestFactory().get('/tasks/')
+    request.user = owner
+    newest = Task.objects.filter(owner=owner).order_by('-created_at', '-id').first()
+
+    def edit():
+        newest.priority = 'low' if newest.priority == 'high' else 'high'
+        newest.save()
+
+    results = {}
+    for size in sizes:
+        view = TaskListView.as_view(paginate_by=size)
+        with override_settings(TASKS_FRAGMENTS={'ENABLED': False}):
+            view(request).render()
+            uncached = timed(view, request, repeat)
+        view(request).render()
+        results[size] = {
+            'uncached_ms': uncached,
+            'fragments_ms': timed(view, request, repeat),
+            'after_edit_ms': timed(view, request, repeat, before=edit),
+        }
+    return results
+
+
+def run(tasks=2000, sizes=(20, 50, 100, 200), repeat=30):
+    from django.db import connection
+
+    from benchmarks.data import generate
+
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = connection.settings_dict['NAME'] + '.test'
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        owner = generate(users=1, projects=10, tasks=max(tasks // 10, 1), prefix='fragments')[0]
+        results = measure(owner, sizes, repeat)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    return {'vendor': connection.vendor, 'tasks': tasks, 'sizes': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=2000)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 50, 100, 200], help="Page sizes.")
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ.setdefault('DATABASE_URL', f'sqlite:///{directory}/fragments.db')
+        os.environ.setdefault('METRICS_SAMPLE_RATE', '0')
+        setup_django()
+        results = run(args.tasks, args.sizes, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"Task list with {results['tasks']} tasks on {results['vendor']}, median ms")
+    print(f"  {'page size':>9} {'uncached':>9} {'fragments':>10} {'after edit':>11}")
+    for size, row in results['sizes'].items():
+        print(f"  {size:>9} {row['uncached_ms']:>9} {row['fragments_ms']:>10} {row['after_edit_ms']:>11}")
+
+
+if __name__ == '__main__':
+    main()
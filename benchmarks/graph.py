@@ -0,0 +1,154 @@
+"""
+Subtask and blocker graph queries on deep and wide graphs.
+
+Builds two shapes in a fresh test database, each as a subtask tree and as
+a blocker graph over the same tasks:
+
+* ``deep``: a chain ``--depth`` tasks long;
+* ``wide``: one root with ``--children`` direct subtasks, which it also
+  blocks.
+
+and times, from the root (or, for ``ancestors``, from the deepest task),
+``descendants()``, ``ancestors()``, ``blocked_by()``, the cycle check of a
+new parent and of a new blocker edge, and ``critical_path()``. For each it
+reports the median latency over ``--repeat`` runs and the queries run.
+
+    python -m benchmarks.graph --depth 50 --children 10000
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks import setup_django
+
+
+def build(owner, project, shape, size):
+    from apps.tasks.bulk import create_tasks
+    from apps.tasks.models import Task, TaskDependency
+
+    root, = create_tasks([Task(owner=owner, project=project, title=f'{shape} root')])
+    if shape == 'deep':
+        tasks = [root]
+        for i in range(size - 1):
+            tasks += create_tasks([Task(owner=owner, project=project, title=f'{shape} {i}', parent=tasks[-1])])
+        edges = zip(tasks, tasks[1:])
+    else:
+        tasks = [root] + create_tasks(
+            [Task(owner=owner, project=project, title=f'{shape} {i}', parent=root) for i in range(size)],
+            batch_size=500,
+        )
+        edges = ((root, task) for task in tasks[1:])
+    TaskDependency.objects.bulk_create(
+        [TaskDependency(blocker=blocker, blocked=blocked) for blocker, blocked in edges], batch_size=500
+    )
+    return tasks
+
+
+def operations(owner, project, tasks):
+    from django.db import transaction
+
+    from apps.tasks import graph
+    from apps.tasks.models import Task
+
+    root, deepest = tasks[0], tasks[-1]
+    outsider = Task.objects.create(owner=owner, title='outsider')
+
+    def check_parent():
+        # Moving the root under the deepest task must be refused.
+        root.parent_id = deepest.pk
+        try:
+            graph.check_parent(root)
+        except graph.GraphError:
+            pass
+        finally:
+            root.parent_id = None
+
+    def add_blocker():
+        # An edge that closes no loop, rolled back so every run checks the same graph.
+        with transaction.atomic():
+            graph.add_blocker(deepest, outsider)
+            transaction.set_rollback(True)
+
+    return {
+        'descendants': lambda: len(graph.descendants(root)),
+        'ancestors': lambda: len(graph.ancestors(deepest)),
+        'blocked_by': lambda: len(graph.blocked_by(root)),
+        'check_parent': check_parent,
+        'add_blocker': add_blocker,
+        'critical_path': lambda: len(graph.critical_path(project)),
+    }
+
+
+def measure(owner, project, tasks, repeat):
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+
+    results = {}
+    for name, operation in operations(owner, project, tasks).items():
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            operation()
+            latencies.append(time.perf_counter() - started)
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            operation()
+        results[name] = {
+            'median_ms': round(statistics.median(latencies) * 1000, 2),
+            # Savepoints are not queries the graph runs.
+            'queries': sum('SAVEPOINT' not in query['sql'] for query in queries.captured_queries),
+        }
+    return results
+
+
+def run(depth=50, children=10000, repeat=20):
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+
+    from apps.tasks.models import Project
+
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = connection.settings_dict['NAME'] + '.test'
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        results = {}
+        for shape, size in (('deep', depth), ('wide', children)):
+            owner = get_user_model().objects.create_user(
+                username=f'graph-{shape}', email=f'graph-{shape}@example.com', password='benchmark'
+            )
+            project = Project.objects.create(owner=owner, title=shape)
+            tasks = build(owner, project, shape, size)
+            results[shape] = {'tasks': len(tasks), 'operations': measure(owner, project, tasks, repeat)}
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    return {'vendor': connection.vendor, 'shapes': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--depth', type=int, default=50, help="Length of the deep chain.")
+    parser.add_argument('--children', type=int, default=10000, help="Subtasks of the wide root.")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ.setdefault('DATABASE_URL', f'sqlite:///{directory}/graph.db')
+        os.environ.setdefault('METRICS_SAMPLE_RATE', '0')
+        setup_django()
+        results = run(args.depth, args.children, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"Graph queries on {results['vendor']}, median ms (queries)")
+    for shape, result in results['shapes'].items():
+        print(f"  {shape}, {result['tasks']} tasks")
+        for name, row in result['operations'].items():
+            print(f"    {name:>14} {row['median_ms']:>9} ({row['queries']})")
+
+
+if __name__ == '__main__':
+    main()
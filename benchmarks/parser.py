@@ -0,0 +1,101 @@
+"""
+Throughput of the quick-add text parser.
+
+Parses a corpus of synthetic phrases with the rule engine in
+apps/tasks/ai_parser.py and with the original keyword implementation, and
+reports parses/sec for each.
+
+    python -m benchmarks.parser [--count 100000] [--seed 0] [--json]
+"""
+import argparse
+import datetime
+import json
+import random
+import time
+
+from apps.tasks.ai_parser import TaskTextParser
+
+VERBS = ['Buy', 'Call', 'Email', 'Write', 'Review', 'Fix', 'Plan', 'Book', 'Ship', 'Clean']
+NOUNS = ['groceries', 'report', 'dentist', 'release notes', 'invoice', 'flights', 'the garage', 'bug 1234']
+EXTRAS = [
+    'tomorrow', 'today', 'on friday', 'by monday', 'next week', 'in 3 days', 'in two weeks', 'due 2030-01-15',
+    'high priority', 'low priority', 'urgent', 'p2', '!low',
+    '#home', '#work-ops', 'status:doing', '[x]',
+]
+
+
+def legacy_parse_task_text(text):
+    """The keyword parser this engine replaced, kept as the baseline."""
+    title = text
+    description = ""
+    due_date = None
+    priority = "medium"
+
+    if "tomorrow" in text.lower():
+        due_date = (datetime.date.today() + datetime.timedelta(days=1)).isoformat() + "T17:00:00"
+        title = title.replace("tomorrow", "").strip()
+    if "high priority" in text.lower():
+        priority = "high"
+        title = title.replace("high priority", "").strip()
+    elif "low priority" in text.lower():
+        priority = "low"
+        title = title.replace("low priority", "").strip()
+
+    return {
+        "title": title.strip() if title.strip() else "New Task",
+        "description": description,
+        "due_date": due_date,
+        "priority": priority,
+    }
+
+
+def make_corpus(count, seed=0):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        words = [rng.choice(VERBS), rng.choice(NOUNS)] + rng.sample(EXTRAS, rng.randint(0, 3))
+        rng.shuffle(words[1:])
+        corpus.append(' '.join(words))
+    return corpus
+
+
+def measure(parse, corpus):
+    start = time.perf_counter()
+    for text in corpus:
+        parse(text)
+    elapsed = time.perf_counter() - start
+    return {'seconds': round(elapsed, 4), 'parses_per_sec': round(len(corpus) / elapsed)}
+
+
+def run(count=100000, seed=0):
+    corpus = make_corpus(count, seed)
+    parser = TaskTextParser()
+    today = datetime.date.today()
+    results = {
+        'count': count,
+        'legacy': measure(legacy_parse_task_text, corpus),
+        'rule_engine': measure(lambda text: parser.parse(text, today), corpus),
+    }
+    results['ratio'] = round(results['rule_engine']['parses_per_sec'] / results['legacy']['parses_per_sec'], 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+    args = parser.parse_args()
+
+    results = run(args.count, args.seed)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{results['count']} phrases")
+    for name in ('legacy', 'rule_engine'):
+        print(f"  {name:<12} {results[name]['parses_per_sec']:>10,} parses/sec  ({results[name]['seconds']}s)")
+    print(f"  rule engine / legacy: {results['ratio']}x")
+
+
+if __name__ == '__main__':
+    main()
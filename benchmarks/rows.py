@@ -0,0 +1,132 @@
+"""
+Task list page cost as model instances versus TaskRow tuples.
+
+Creates one owner with ``--tasks`` tasks spread over projects, with
+``--description`` characters of description each, in a fresh test
+database, then for each page size loads a page and reads what a list row
+shows (title, status, priority, due date and project title) along four
+paths:
+
+* ``models``: Task instances, the project loaded lazily per row;
+* ``select_related``: Task instances with the project joined in;
+* ``rows``: ``apps.tasks.rows.task_rows()``, as the list views read them;
+* ``rows+excerpt``: the same with the description excerpt column.
+
+For each it reports the median latency over ``--repeat`` runs, the queries
+run, the peak memory traced while loading the page and the pickled size,
+which is what the owner cache stores per page.
+
+    python -m benchmarks.rows --tasks 5000 --description 4000
+"""
+import argparse
+import json
+import os
+import pickle
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks import setup_django
+
+
+def load(tasks, description, projects=20):
+    from django.contrib.auth import get_user_model
+
+    from apps.tasks.models import Task
+    from benchmarks.data import generate
+
+    user = generate(users=1, projects=projects, tasks=max(tasks // projects, 1), prefix='rows')[0]
+    # Lists never show descriptions; make them as heavy as real notes get.
+    Task.objects.filter(owner=user).update(description='lorem ipsum ' * (description // 12))
+    return get_user_model().objects.get(pk=user.pk)
+
+
+def paths(owner):
+    from apps.tasks.models import Task
+    from apps.tasks.rows import task_rows
+
+    queryset = Task.objects.filter(owner=owner).order_by('-created_at', '-id')
+    return {
+        'models': (queryset, lambda task: task.project and task.project.title),
+        'select_related': (queryset.select_related('project'), lambda task: task.project and task.project.title),
+        'rows': (task_rows(queryset), lambda row: row.project_title),
+        'rows+excerpt': (task_rows(queryset, excerpt=True), lambda row: row.project_title),
+    }
+
+
+def read_page(queryset, project_title, size):
+    page = list(queryset[:size])
+    for task in page:
+        task.title, task.get_status_display(), task.get_priority_display(), task.due_date, project_title(task)
+    return page
+
+
+def measure(owner, sizes, repeat):
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+
+    results = {}
+    for size in sizes:
+        for name, (queryset, project_title) in paths(owner).items():
+            latencies = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                read_page(queryset, project_title, size)
+                latencies.append(time.perf_counter() - started)
+            # The log is capped; a full one miscounts what is captured.
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                page = read_page(queryset, project_title, size)
+            tracemalloc.start()
+            read_page(queryset, project_title, size)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results[f'{name}[{size}]'] = {
+                'p50_ms': round(statistics.median(latencies) * 1000, 2),
+                'queries': len(queries),
+                'peak_kib': round(peak / 1024, 1),
+                'pickled_kib': round(len(pickle.dumps(page, pickle.HIGHEST_PROTOCOL)) / 1024, 1),
+            }
+    return results
+
+
+def run(tasks=5000, description=4000, sizes=(20, 200), repeat=50):
+    from django.db import connection
+
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = connection.settings_dict['NAME'] + '.test'
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        owner = load(tasks, description)
+        results = measure(owner, sizes, repeat)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    return {'vendor': connection.vendor, 'tasks': tasks, 'description': description, 'paths': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=5000)
+    parser.add_argument('--description', type=int, default=4000, help="Description length in characters.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 200], help="Page sizes.")
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ.setdefault('DATABASE_URL', f'sqlite:///{directory}/rows.db')
+        os.environ.setdefault('METRICS_SAMPLE_RATE', '0')
+        setup_django()
+        results = run(args.tasks, args.description, args.sizes, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{results['tasks']} tasks with {results['description']}-character descriptions on {results['vendor']}")
+    print(f"  {'path':<22} {'p50 ms':>8} {'queries':>8} {'peak KiB':>9} {'pickled KiB':>12}")
+    for name, row in results['paths'].items():
+        print(f"  {name:<22} {row['p50_ms']:>8} {row['queries']:>8} {row['peak_kib']:>9} {row['pickled_kib']:>12}")
+
+
+if __name__ == '__main__':
+    main()
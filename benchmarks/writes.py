@@ -0,0 +1,172 @@
+"""
+Concurrent write throughput per database profile.
+
+Each profile is a DATABASE_URL, run in its own process against a fresh
+test database. Forked writer processes, like the workers of a
+multi-process app server, alternately create and edit tasks, each in
+one transaction that reads before it writes and fires the usual counter,
+search and cache signals, while one more process keeps reading the task
+list. The run reports writes per second, commit latency, and how many
+writes failed with "database is locked".
+
+    python -m benchmarks.writes                       # untuned SQLite vs the WAL profile
+    python -m benchmarks.writes --url postgres://user:pw@localhost/tasks
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import setup_django
+
+# Django's own SQLite defaults: rollback journal, deferred transactions, 5s timeout.
+UNTUNED_SQLITE = 'journal_mode=delete&synchronous=full&busy_timeout=5000&mmap_size=0&transaction_mode=deferred'
+
+
+def default_profiles(directory):
+    return {
+        'sqlite-untuned': f'sqlite:///{directory}/untuned.db?{UNTUNED_SQLITE}',
+        'sqlite-wal': f'sqlite:///{directory}/wal.db',
+    }
+
+
+def writer(user, deadline, results):
+    from django.db import OperationalError, close_old_connections, connection, transaction
+
+    from apps.tasks.models import Task
+
+    latencies, errors = [], []
+    try:
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                # The task, its counter row and its search row commit together.
+                # Every other write edits a task: the transaction reads before
+                # it writes, like an import or a bulk edit.
+                with transaction.atomic():
+                    task = Task.objects.filter(owner=user).order_by('-created_at').first()
+                    if task is not None and len(latencies) % 2:
+                        task.status = 'done' if task.status == 'todo' else 'todo'
+                        task.save()
+                    else:
+                        Task.objects.create(owner=user, title='Concurrent write', priority='medium')
+            except OperationalError as error:
+                errors.append(str(error))
+                # A failed SQLite transaction can leave the connection unusable.
+                close_old_connections()
+                continue
+            latencies.append(time.perf_counter() - start)
+    finally:
+        connection.close()
+        results.put(('write', latencies, errors))
+
+
+def reader(user, deadline, results):
+    from django.db import OperationalError, connection
+
+    from apps.tasks.models import Task
+
+    reads, errors = 0, []
+    try:
+        while time.monotonic() < deadline:
+            try:
+                list(Task.objects.filter(owner=user).order_by('-created_at')[:50])
+            except OperationalError as error:
+                errors.append(str(error))
+                continue
+            reads += 1
+    finally:
+        connection.close()
+        results.put(('read', reads, errors))
+
+
+def measure(processes, duration):
+    """Runs against the configured DATABASE_URL in this process."""
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+
+    if connection.vendor == 'sqlite':
+        # The default test database is in memory, which processes cannot share.
+        connection.settings_dict['TEST']['NAME'] = connection.settings_dict['NAME'] + '.test'
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        user = get_user_model().objects.create_user(
+            username='writer', email='writer@example.com', password='benchmark'
+        )
+        # Forked children must not inherit an open connection.
+        connection.close()
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        deadline = time.monotonic() + duration
+        pool = [context.Process(target=writer, args=(user, deadline, results)) for _ in range(processes)]
+        pool.append(context.Process(target=reader, args=(user, deadline, results)))
+        for process in pool:
+            process.start()
+        latencies, errors, reads = [], [], 0
+        for _ in pool:
+            kind, value, process_errors = results.get()
+            if kind == 'write':
+                latencies.extend(value)
+            else:
+                reads = value
+            errors.extend(process_errors)
+        for process in pool:
+            process.join()
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    latencies.sort()
+    return {
+        'vendor': connection.vendor,
+        'writes_per_second': round(len(latencies) / duration, 1),
+        'reads_per_second': round(reads / duration, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+        'p99_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 2) if latencies else None,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2) if latencies else None,
+        'errors': len(errors),
+        'locked_errors': sum('locked' in error for error in errors),
+    }
+
+
+def run_profile(url, processes, duration):
+    """Measures one profile in a child process, since settings are read once per process."""
+    env = {**os.environ, 'DATABASE_URL': url, 'METRICS_SAMPLE_RATE': '0'}
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.writes', '--child', '--processes', str(processes), '--duration', str(duration)],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', action='append', help="DATABASE_URL to measure; repeatable. Defaults to two SQLite profiles.")
+    parser.add_argument('--processes', type=int, default=8, help="Concurrent writer processes.")
+    parser.add_argument('--duration', type=float, default=5.0, help="Seconds per profile.")
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        setup_django()
+        print(json.dumps(measure(args.processes, args.duration)))
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        profiles = {url: url for url in args.url} if args.url else default_profiles(directory)
+        results = {name: run_profile(url, args.processes, args.duration) for name, url in profiles.items()}
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.processes} writer processes + 1 reader, {args.duration:g}s per profile")
+    print(f"  {'profile':<40} {'writes/s':>9} {'reads/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'locked':>7}")
+    for name, row in results.items():
+        print(f"  {name[:40]:<40} {row['writes_per_second']:>9} {row['reads_per_second']:>9} "
+              f"{row['p50_ms']!s:>8} {row['p99_ms']!s:>8} {row['locked_errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
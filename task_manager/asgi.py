@@ -3,6 +3,10 @@ ASGI config for task_manager project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Long-lived responses, such as the change stream at ``async/changes/``,
+need an ASGI server (e.g. ``uvicorn task_manager.asgi:application``);
+under WSGI they return what is pending and the client reconnects.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
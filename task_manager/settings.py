@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .database import database_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -43,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.tasks.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,6 +68,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'apps.tasks.context_processors.project_index',
             ],
         },
     },
@@ -75,11 +80,44 @@ WSGI_APPLICATION = 'task_manager.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# DATABASE_URL selects SQLite (tuned for concurrent writes) or pooled
+# Postgres; see task_manager/database.py for the options.
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(os.environ.get('DATABASE_URL', ''), BASE_DIR / 'db.sqlite3'),
+}
+
+
+# Cache
+# The task views read through this cache (see apps/tasks/cache.py). The
+# in-memory default is per process, where one worker's writes cannot
+# invalidate another's entries, so those reads then go uncached; set
+# CACHE_URL to file:///some/dir or redis://host:6379/0 to share it between
+# worker processes, or TASKS_CACHE_SHARED=1 if there is only one process.
+
+CACHE_URL = os.environ.get('CACHE_URL', '')
+if CACHE_URL.startswith('redis://'):
+    DEFAULT_CACHE = {'BACKEND': 'apps.tasks.cache_backends.RedisCache', 'LOCATION': CACHE_URL}
+elif CACHE_URL.startswith('file://'):
+    DEFAULT_CACHE = {'BACKEND': 'apps.tasks.cache_backends.FileCache', 'LOCATION': CACHE_URL[len('file://'):]}
+else:
+    DEFAULT_CACHE = {'BACKEND': 'apps.tasks.cache_backends.LRUMemoryCache', 'LOCATION': 'task-manager'}
+
+CACHES = {
+    'default': {**DEFAULT_CACHE, 'OPTIONS': {'MAX_ENTRIES': 10000}},
+}
+
+# None: guessed from the backend.
+TASKS_CACHE_SHARED = {'1': True, '0': False}.get(os.environ.get('TASKS_CACHE_SHARED', ''))
+
+
+# Request metrics, served at /metrics/ (see apps/tasks/middleware.py).
+# Only SAMPLE_RATE of requests pay for query profiling.
+
+TASKS_METRICS = {
+    'SAMPLE_RATE': float(os.environ.get('METRICS_SAMPLE_RATE', '0.1')),
+    'N_PLUS_ONE_THRESHOLD': 5,
+    'TOKEN': os.environ.get('METRICS_TOKEN', ''),
 }
 
 
@@ -119,6 +157,10 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploads, such as deferred imports waiting for the job worker. Workers on
+# other hosts need this on shared storage (or another STORAGES backend).
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', BASE_DIR / 'media')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 